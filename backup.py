@@ -0,0 +1,199 @@
+import argparse
+import datetime
+import glob
+import gzip
+import os
+import shutil
+import sqlite3
+import time
+from pathlib import Path
+
+import config
+import database
+
+# Pages copied per backup step (4 KB pages: 4 MB per step)
+BACKUP_PAGES = 1024
+# Pause between steps, so the copy never keeps the disk busy for long
+BACKUP_PAUSE = 0.01
+# A write from another connection restarts a stepped backup from page one;
+# after this many restarts the copy is taken in a single step instead
+MAX_RESTARTS = 3
+# Compressed snapshots kept per directory; older ones are deleted
+KEEP_SNAPSHOTS = 14
+SNAPSHOT_TIME_FORMAT = "%Y%m%d-%H%M%S"
+
+
+class SnapshotResult:
+    def __init__(self, path):
+        self.path = path
+        self.pages = 0
+        self.restarts = 0
+        self.bytes = 0
+        self.pruned = []
+        self.seconds = 0.0
+
+
+class _Restarted(Exception):
+    pass
+
+
+def snapshot_dir_for(db_file=None):
+    # radios.db -> backups/ next to it
+    return os.path.join(os.path.dirname(os.path.abspath(db_file or database.DB_FILE)), "backups")
+
+
+def _open_source(path):
+    # Read-only, so the copy can never take the write lock
+    uri = f"{Path(os.path.abspath(path)).as_uri()}?mode=ro"
+    return sqlite3.connect(uri, uri=True, timeout=database.BUSY_TIMEOUT)
+
+
+def copy_database(dest, source=None, pages=BACKUP_PAGES, pause=BACKUP_PAUSE, result=None):
+    # Online copy through the backup API, `pages` at a time. Under WAL each
+    # step is a short read transaction, so desks keep writing throughout.
+    result = result or SnapshotResult(dest)
+    last_remaining = None
+
+    def progress(status, remaining, total):
+        nonlocal last_remaining
+        result.pages = total
+        if last_remaining is not None and remaining > last_remaining:
+            result.restarts += 1
+            if result.restarts > MAX_RESTARTS:
+                raise _Restarted()
+        last_remaining = remaining
+        if pause and remaining:
+            time.sleep(pause)
+
+    src = _open_source(source or database.DB_FILE)
+    try:
+        dst = sqlite3.connect(dest)
+        try:
+            try:
+                src.backup(dst, pages=pages, progress=progress)
+            except _Restarted:
+                # Too busy to finish in steps: one step reads a single
+                # consistent snapshot, which under WAL doesn't block writers
+                src.backup(dst, pages=-1)
+        finally:
+            dst.close()
+    finally:
+        src.close()
+    return result
+
+
+def check_integrity(path):
+    # PRAGMA integrity_check on a copy; returns the problems found, [] if none
+    conn = sqlite3.connect(path)
+    try:
+        rows = [row[0] for row in conn.execute("PRAGMA integrity_check")]
+    finally:
+        conn.close()
+    return [] if rows == ["ok"] else rows
+
+
+def prune_snapshots(directory, keep=KEEP_SNAPSHOTS, prefix=None):
+    # Timestamped names sort oldest first
+    prefix = prefix or Path(database.DB_FILE).stem
+    snapshots = sorted(glob.glob(os.path.join(glob.escape(directory), f"{glob.escape(prefix)}-*.db.gz")))
+    removed = snapshots[:-keep] if keep else snapshots
+    for path in removed:
+        os.remove(path)
+    return removed
+
+
+def snapshot(directory=None, keep=KEEP_SNAPSHOTS, pages=BACKUP_PAGES, pause=BACKUP_PAUSE, now=None):
+    # Copies the live database, verifies the copy, then gzips it to
+    # <directory>/<name>-YYYYmmdd-HHMMSS.db.gz and prunes old snapshots
+    started = time.perf_counter()
+    directory = directory or snapshot_dir_for()
+    os.makedirs(directory, exist_ok=True)
+    stamp = (now or datetime.datetime.now()).strftime(SNAPSHOT_TIME_FORMAT)
+    prefix = Path(database.DB_FILE).stem
+    copy = os.path.join(directory, f"{prefix}-{stamp}.db")
+    result = SnapshotResult(copy + ".gz")
+
+    try:
+        copy_database(copy, pages=pages, pause=pause, result=result)
+        problems = check_integrity(copy)
+        if problems:
+            raise RuntimeError(f"Snapshot failed integrity check: {'; '.join(problems[:5])}")
+        with open(copy, "rb") as f, gzip.open(result.path + ".part", "wb", compresslevel=6) as out:
+            shutil.copyfileobj(f, out, 1024 * 1024)
+        os.replace(result.path + ".part", result.path)
+    finally:
+        for leftover in (copy, result.path + ".part"):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+
+    result.bytes = os.path.getsize(result.path)
+    result.pruned = prune_snapshots(directory, keep, prefix)
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+def restore_snapshot(path, dest):
+    # Unpacks a snapshot to `dest` (which must not be in use) and checks it
+    with gzip.open(path, "rb") as f, open(dest, "wb") as out:
+        shutil.copyfileobj(f, out, 1024 * 1024)
+    return check_integrity(dest)
+
+
+def run_schedule(every_hours, directory=None, keep=KEEP_SNAPSHOTS, runs=None):
+    # Snapshot now and then every `every_hours`; for a console window or a
+    # service running next to the app. One failed run doesn't stop the loop.
+    done = 0
+    while runs is None or done < runs:
+        started = time.monotonic()
+        try:
+            _report(snapshot(directory, keep))
+        except (sqlite3.Error, OSError, RuntimeError) as e:
+            print(f"{datetime.datetime.now():%Y-%m-%d %H:%M:%S} snapshot failed: {e}", flush=True)
+        done += 1
+        if runs is None or done < runs:
+            time.sleep(max(0.0, every_hours * 3600 - (time.monotonic() - started)))
+
+
+def _report(result):
+    restarts = f", {result.restarts} restarts" if result.restarts else ""
+    print(f"{datetime.datetime.now():%Y-%m-%d %H:%M:%S} wrote {result.path} "
+          f"({result.pages} pages, {result.bytes / 1024 / 1024:.1f} MB compressed, "
+          f"{result.seconds:.1f} s{restarts})", flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Online snapshots of radios.db, safe while the app is in use.")
+    parser.add_argument("--db", help="Database file (default: the configured database)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    for name, help_text in (("snapshot", "Take one verified, compressed snapshot"),
+                            ("schedule", "Take a snapshot now and then at a fixed interval")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("--dest", help="Snapshot directory (default: backups/ next to the database)")
+        command.add_argument("--keep", type=int, default=KEEP_SNAPSHOTS, help="Snapshots to keep")
+        if name == "schedule":
+            command.add_argument("--every", type=float, default=24.0, help="Hours between snapshots")
+
+    restore = commands.add_parser("restore", help="Unpack a snapshot to a new database file and verify it")
+    restore.add_argument("snapshot")
+    restore.add_argument("dest")
+    args = parser.parse_args(argv)
+
+    # The shared database itself, even on a terminal configured for snapshots
+    database.DB_FILE = args.db or config.load().source_path
+
+    if args.command == "snapshot":
+        result = snapshot(args.dest, args.keep)
+        _report(result)
+        return result
+    if args.command == "schedule":
+        run_schedule(args.every, args.dest, args.keep)
+    elif args.command == "restore":
+        if os.path.exists(args.dest):
+            parser.error(f"{args.dest} already exists")
+        problems = restore_snapshot(args.snapshot, args.dest)
+        print("\n".join(problems) if problems else f"Restored {args.dest}: integrity ok")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import argparse
+import datetime
+import os
+import random
+import sqlite3
+
+from database import migrate
+
+# departments, radios, services, radio_changes rows
+SCALES = {
+    "small": (20, 1_000, 2_000, 10_000),
+    "medium": (50, 10_000, 20_000, 100_000),
+    "large": (100, 100_000, 200_000, 1_000_000),
+}
+
+MODELS = ("XTS 5000", "XTS 2500", "APX 900", "APX 6000", "CP200d", "SL300")
+STATUSES = ("Active",) * 9 + ("In Service",)
+PROBLEMS = ("cracked housing", "no transmit", "battery will not hold charge", "antenna broken",
+            "speaker distorted", "channel knob loose", "water damage", "display dead")
+FIRST_NAMES = ("James", "Maria", "Robert", "Linda", "Michael", "Patricia", "David", "Jennifer")
+LAST_NAMES = ("Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis")
+FIELDS = ("serial", "model", "assigned_to", "notes", "department_id", "status", "missing")
+START_DATE = datetime.date(2018, 1, 1)
+BATCH_SIZE = 10_000
+
+
+def _date(rng, span_days=2500):
+    return (START_DATE + datetime.timedelta(days=rng.randrange(span_days))).isoformat()
+
+
+def _insert(conn, sql, rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == BATCH_SIZE:
+            conn.executemany(sql, batch)
+            batch = []
+    if batch:
+        conn.executemany(sql, batch)
+
+
+def generate(path, departments, radios, services, changes, seed=1):
+    # Builds a fresh database at `path` with the current schema. The same
+    # arguments and seed always give the same rows, so timings from different
+    # commits are measured against identical data.
+    rng = random.Random(seed)
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    migrate(conn)
+
+    dept_ids = [f"D{i:03d}" for i in range(departments)]
+    with conn:
+        conn.executemany(
+            "INSERT INTO departments (id, name, contact) VALUES (?, ?, ?)",
+            [(dept_id, f"Department {i}", f"x{1000 + i}") for i, dept_id in enumerate(dept_ids)],
+        )
+        _insert(conn, """
+            INSERT INTO radios (radio_id, serial, model, assigned_to, notes, department_id,
+                                date_received, date_issued, last_updated, status, missing)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            (f"R{i:06d}", f"SN{i:07d}", rng.choice(MODELS),
+             f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}" if rng.random() < 0.8 else "",
+             rng.choice(PROBLEMS) if rng.random() < 0.1 else "",
+             rng.choice(dept_ids) if dept_ids and rng.random() < 0.95 else None,
+             _date(rng), _date(rng), _date(rng) + " 12:00:00",
+             rng.choice(STATUSES), "Yes" if rng.random() < 0.02 else "No")
+            for i in range(radios)
+        ))
+        _insert(conn, """
+            INSERT INTO services (radio_id, status, date_service, lrc_service_num, date_sent,
+                                  date_repaired, amount, problem, notes)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            (rng.randint(1, radios), "closed" if rng.random() < 0.8 else "open", _date(rng),
+             f"LRC{i:07d}", _date(rng), _date(rng), round(rng.uniform(20, 400), 2),
+             rng.choice(PROBLEMS), "")
+            for i in range(services)
+        ) if radios else ())
+        _insert(conn, """
+            INSERT INTO radio_changes (radio_id, change_type, field_changed, old_value, new_value, timestamp)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (
+            (rng.randint(1, radios), "EDIT", rng.choice(FIELDS), "old", "new", _date(rng) + " 09:30:00")
+            for _ in range(changes)
+        ) if radios else ())
+    conn.execute("PRAGMA optimize")
+    conn.close()
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic radio fleet database.")
+    parser.add_argument("path")
+    parser.add_argument("--scale", choices=SCALES, default="small")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+    generate(args.path, *SCALES[args.scale], seed=args.seed)
+
+
+if __name__ == "__main__":
+    main()
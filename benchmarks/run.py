@@ -0,0 +1,215 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+import database
+from benchmarks.generate import SCALES, generate
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SEARCH_TERMS = ("s", "sn00", "smith", "xts 5000", "cracked housing", "zzzz")
+
+
+def _time(func, repeat):
+    runs = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        runs.append(time.perf_counter() - started)
+    return {"median_s": statistics.median(runs), "min_s": min(runs), "runs": runs}
+
+
+def _drain(source):
+    for _ in source.iter_rows():
+        pass
+
+
+def measure_memory():
+    # Bytes held per radio by the main window's in-memory fleet: the loaded
+    # rows, and the search index built over them
+    from repository import radios
+    from search_index import RadioSearchIndex
+
+    tracemalloc.start()
+    try:
+        rows = radios.grid_rows()
+        after_rows = tracemalloc.get_traced_memory()[0]
+        index = RadioSearchIndex(rows)
+        after_index = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    count = max(1, len(index))
+    return {
+        "radios": len(index),
+        "rows_bytes_per_radio": after_rows / count,
+        "index_bytes_per_radio": (after_index - after_rows) / count,
+        "total_mb": after_index / 1024 / 1024,
+    }
+
+
+def cases(workdir):
+    # name -> zero-argument callable; each builds fresh sources so no case is
+    # served from another's page cache. Imported here, after DB_FILE is set.
+    from main import fetch_fleet
+    from repository import audit, radios, services
+    from repository.reports import (
+        REPORT_TYPES,
+        report_source,
+        write_excel_report,
+        write_pdf_report,
+    )
+
+    fleet = fetch_fleet()
+    sample_ids = sorted(fleet.rows)[::max(1, len(fleet) // 100)][:100]
+    result = {
+        "load_data": fetch_fleet,
+        "patch_100_radios": lambda: radios.grid_rows_for(sample_ids),
+    }
+
+    for term in SEARCH_TERMS:
+        # filter_rows: in-memory scan for short terms, full-text index for
+        # longer, with the (empty) dropdown filters the main window passes
+        def search(term=term):
+            filters = {"term": term, "status": "", "missing": "", "department": ""}
+            ranked = database.search_radios(term)
+            if ranked is None:
+                return fleet.search(**filters)
+            return fleet.ranked(ranked, **filters)
+        result[f"filter_rows[{term}]"] = search
+    result["filter_rows[status+missing]"] = lambda: fleet.search(status="Active", missing="No")
+
+    for report in REPORT_TYPES:
+        department = "Department 1" if report == "Radios by Department" else None
+        result[f"run_report[{report}]"] = lambda report=report, department=department: (
+            report_source(report, department)[1].prefetch()
+        )
+        result[f"report_rows[{report}]"] = lambda report=report, department=department: (
+            _drain(report_source(report, department)[1])
+        )
+
+    for status in ("all", "open"):
+        def load_services(status=status):
+            source = services.history_source(status).prefetch()
+            # Scroll: next page by keyset, then jump to the end by OFFSET
+            source.fetch(200, 50)
+            source.fetch(max(0, source.count() - 50), 50)
+        result[f"load_services[{status}]"] = load_services
+
+    def load_history(radio_id=None):
+        source = audit.history_source(radio_id).prefetch()
+        source.fetch(200, 50)
+        source.fetch(max(0, source.count() - 50), 50)
+    result["load_history[radio]"] = lambda: load_history(sample_ids[0])
+    result["load_history[all]"] = load_history
+
+    headers, _ = report_source("All Radios")
+
+    def export_excel():
+        write_excel_report(os.path.join(workdir, "bench.xlsx"), headers, "BENCHMARK", report_source("All Radios")[1])
+
+    def export_pdf():
+        write_pdf_report(os.path.join(workdir, "bench.pdf"), headers, "BENCHMARK", report_source("All Radios")[1])
+
+    result["export_excel[All Radios]"] = export_excel
+    result["export_pdf[All Radios]"] = export_pdf
+    return result
+
+
+def run_scale(name, workdir, seed, repeat, only=None, regenerate=False):
+    counts = SCALES[name]
+    path = os.path.join(workdir, f"fleet-{name}-{seed}.db")
+    generate_s = None
+    if regenerate or not os.path.exists(path):
+        started = time.perf_counter()
+        generate(path, *counts, seed=seed)
+        generate_s = time.perf_counter() - started
+
+    database.close_pool()
+    database.DB_FILE = path
+    database.init_db()
+
+    timings = {}
+    for case, func in cases(workdir).items():
+        if only and not any(part in case for part in only):
+            continue
+        timings[case] = _time(func, repeat)
+        print(f"{name:>7} {case:<40} {timings[case]['median_s'] * 1000:10.1f} ms", flush=True)
+    memory = measure_memory()
+    print(f"{name:>7} {'memory per radio':<40} {memory['rows_bytes_per_radio'] + memory['index_bytes_per_radio']:10.0f} B",
+          flush=True)
+    database.close_pool()
+
+    return {
+        "departments": counts[0], "radios": counts[1], "services": counts[2], "changes": counts[3],
+        "generate_s": generate_s,
+        "memory": memory,
+        "cases": timings,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline, current):
+    # Prints median time per case relative to an earlier results file
+    for scale, result in current["scales"].items():
+        before = baseline.get("scales", {}).get(scale, {}).get("cases", {})
+        for case, timing in result["cases"].items():
+            if case in before:
+                ratio = timing["median_s"] / before[case]["median_s"] if before[case]["median_s"] else float("inf")
+                print(f"{scale:>7} {case:<40} {before[case]['median_s'] * 1000:10.1f} -> "
+                      f"{timing['median_s'] * 1000:10.1f} ms  x{ratio:.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the app's query, filter and export paths on synthetic fleets.")
+    parser.add_argument("--scale", action="append", choices=SCALES,
+                        help="Repeat for several scales (default: small and medium)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", action="append", help="Run only cases whose name contains this text")
+    parser.add_argument("--workdir", default=os.path.join(tempfile.gettempdir(), "radio-inventory-bench"),
+                        help="Where generated databases are kept and reused")
+    parser.add_argument("--regenerate", action="store_true")
+    parser.add_argument("--output", help="Write the JSON results here")
+    parser.add_argument("--compare", help="Earlier JSON results to compare against")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.workdir, exist_ok=True)
+    results = {
+        "commit": git_commit(),
+        "recorded": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "scales": {},
+    }
+    for name in args.scale or ["small", "medium"]:
+        results["scales"][name] = run_scale(name, args.workdir, args.seed, args.repeat, args.only, args.regenerate)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(json.load(f), results)
+    return results
+
+
+if __name__ == "__main__":
+    main()
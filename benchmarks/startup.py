@@ -0,0 +1,105 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROBE_ENV = "RADIO_INVENTORY_STARTUP_PROBE"
+# config.DB_ENV; not imported, so measuring never loads the app's modules here
+DB_ENV = "RADIO_INVENTORY_DB"
+PAINT_MARKER = "first-paint"
+
+
+def parse_importtime(stderr):
+    # -X importtime lines: "import time: <self us> | <cumulative us> | <indented name>"
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    return modules
+
+
+def measure_imports(python=sys.executable, module="main", top=15):
+    # Import cost of the app module on its own, without creating a window
+    result = subprocess.run(
+        [python, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_DIR, capture_output=True, text=True, check=True,
+    )
+    modules = parse_importtime(result.stderr)
+    total = next((cumulative for name, _, cumulative in modules if name == module), None)
+    heaviest = sorted(modules, key=lambda item: item[1], reverse=True)[:top]
+    return {
+        "module": module,
+        "total_ms": total / 1000 if total is not None else None,
+        "modules_loaded": len(modules),
+        "heaviest_self_ms": [{"module": name, "self_ms": self_us / 1000} for name, self_us, _ in heaviest],
+    }
+
+
+def measure_first_paint(command, data_dir, timeout=60):
+    # Runs the app with the probe set; it writes "first-paint <seconds>" to the
+    # probe file once the main window has drawn and then exits. Wall time
+    # includes interpreter (or PyInstaller bootloader) start-up; in_process
+    # starts at main.py's first line.
+    with tempfile.TemporaryDirectory() as tmp:
+        probe = os.path.join(tmp, "startup.txt")
+        env = dict(os.environ, **{PROBE_ENV: probe, DB_ENV: os.path.join(os.path.abspath(data_dir), "radios.db")})
+        started = time.perf_counter()
+        result = subprocess.run(command, cwd=data_dir, env=env, capture_output=True, text=True,
+                                timeout=timeout, check=False)
+        wall = time.perf_counter() - started
+        if os.path.exists(probe):
+            with open(probe) as f:
+                marker, seconds = f.read().split()
+            if marker == PAINT_MARKER:
+                return {"wall_s": wall, "in_process_s": float(seconds)}
+    raise RuntimeError(f"No {PAINT_MARKER} marker from {command}:\n{result.stderr[-2000:]}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure Radio Inventory start-up time.")
+    parser.add_argument("--exe", help="Time a PyInstaller build instead of main.py")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--data-dir", default=os.getcwd(), help="Directory holding radios.db (default: current)")
+    parser.add_argument("--output", help="Write the JSON result here as well as to stdout")
+    args = parser.parse_args(argv)
+
+    if args.exe:
+        command = [os.path.abspath(args.exe)]
+    else:
+        command = [sys.executable, os.path.join(REPO_DIR, "main.py")]
+
+    runs = [measure_first_paint(command, args.data_dir) for _ in range(args.runs)]
+    result = {
+        "recorded": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "command": command,
+        "first_paint": {
+            "runs": runs,
+            "median_wall_s": statistics.median(run["wall_s"] for run in runs),
+            "median_in_process_s": statistics.median(run["in_process_s"] for run in runs),
+        },
+        # A frozen exe can't be run with -X importtime; its imports are the
+        # same as main.py's, so measure those from source.
+        "imports": measure_imports(),
+    }
+
+    text = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
+    return result
+
+
+if __name__ == "__main__":
+    main()
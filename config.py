@@ -0,0 +1,108 @@
+import configparser
+import os
+import re
+import sys
+from collections import namedtuple
+
+import database
+
+# radio_inventory.ini next to the app (or the .exe), unless this names another
+CONFIG_ENV = "RADIO_INVENTORY_CONFIG"
+CONFIG_FILE = "radio_inventory.ini"
+# Override the file's [database] path and mode on one machine
+DB_ENV = "RADIO_INVENTORY_DB"
+MODE_ENV = "RADIO_INVENTORY_MODE"
+
+# readwrite: the dispatch desks. readonly: opens the shared file mode=ro and
+# never takes the write lock. snapshot: reads a local copy of the shared file,
+# refreshed every snapshot_refresh_minutes, so reports never touch it at all.
+READWRITE, READONLY, SNAPSHOT = "readwrite", "readonly", "snapshot"
+MODES = (READWRITE, READONLY, SNAPSHOT)
+SNAPSHOT_REFRESH_MINUTES = 15
+
+# Pragmas a config file may set per connection. journal_mode is left out: the
+# app relies on WAL.
+PRAGMA_NAMES = frozenset((
+    "busy_timeout", "cache_size", "foreign_keys", "journal_size_limit", "mmap_size",
+    "synchronous", "temp_store", "wal_autocheckpoint",
+))
+PRAGMA_VALUE = re.compile(r"-?\w+")
+
+Settings = namedtuple("Settings", [
+    "source_path", "db_path", "mode", "pragmas", "snapshot_refresh_minutes", "config_file",
+])
+
+
+def app_dir():
+    # Where main.py lives, or the .exe for a PyInstaller build; relative paths
+    # resolve here rather than against whatever directory the app started in
+    if getattr(sys, "frozen", False):
+        return os.path.dirname(sys.executable)
+    return os.path.dirname(os.path.abspath(__file__))
+
+
+def local_data_dir():
+    base = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "RadioInventory")
+
+
+def _pragmas(section):
+    pragmas = {}
+    for name, value in section.items():
+        name, value = name.strip().lower(), value.strip()
+        if name not in PRAGMA_NAMES:
+            raise ValueError(f"Unsupported pragma '{name}' in [pragmas]")
+        if not PRAGMA_VALUE.fullmatch(value):
+            raise ValueError(f"Invalid value '{value}' for pragma {name}")
+        pragmas[name] = value
+    return pragmas
+
+
+def load(path=None, environ=None):
+    environ = os.environ if environ is None else environ
+    path = path or environ.get(CONFIG_ENV) or os.path.join(app_dir(), CONFIG_FILE)
+    parser = configparser.ConfigParser()
+    found = parser.read(path, encoding="utf-8")
+    # Relative paths in the file are relative to the file itself
+    base = os.path.dirname(os.path.abspath(path)) if found else app_dir()
+    db = parser["database"] if parser.has_section("database") else {}
+
+    source_path = environ.get(DB_ENV) or db.get("path", "radios.db")
+    source_path = os.path.normpath(os.path.join(base, os.path.expanduser(source_path)))
+    mode = (environ.get(MODE_ENV) or db.get("mode", READWRITE)).strip().lower()
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode '{mode}'; expected one of {', '.join(MODES)}")
+
+    db_path = source_path
+    if mode == SNAPSHOT:
+        stem = os.path.splitext(os.path.basename(source_path))[0]
+        default = os.path.join(local_data_dir(), f"{stem}-snapshot.db")
+        db_path = os.path.normpath(os.path.join(base, os.path.expanduser(db.get("snapshot_path", default))))
+
+    return Settings(
+        source_path=source_path,
+        db_path=db_path,
+        mode=mode,
+        pragmas=_pragmas(parser["pragmas"]) if parser.has_section("pragmas") else {},
+        snapshot_refresh_minutes=float(db.get("snapshot_refresh_minutes", SNAPSHOT_REFRESH_MINUTES)),
+        config_file=path if found else None,
+    )
+
+
+def apply(settings):
+    # Points the database module at the configured file; call before anything
+    # opens a connection
+    database.close_pool()
+    database.DB_FILE = settings.db_path
+    database.READ_ONLY = settings.mode != READWRITE
+    database.PRAGMAS = dict(settings.pragmas)
+    return settings
+
+
+def refresh_snapshot(settings):
+    # Copies the shared database over the local one in place. Open readers see
+    # the new data on their next query, and the main window's change feed
+    # patches just the radios that changed since the last copy.
+    import backup
+    os.makedirs(os.path.dirname(settings.db_path), exist_ok=True)
+    return backup.copy_database(settings.db_path, source=settings.source_path)
@@ -1,75 +1,750 @@
+import os
+import queue
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
 
 DB_FILE = "radios.db"
+READER_POOL_SIZE = 4
+BUSY_TIMEOUT = 10.0
+# Applied to every connection when it opens. synchronous=NORMAL is safe under
+# WAL: a power cut can lose the last few commits but never corrupts the file.
+# foreign_keys makes services' ON DELETE CASCADE (and the department
+# reference) actually enforced. journal_size_limit truncates the WAL back
+# after a checkpoint instead of leaving it at its high-water mark.
+# Memory-mapped I/O stays off: the shared file usually lives on a network
+# drive, where mmap is unsafe. A desk with a local database can turn it on
+# with mmap_size in the config's [pragmas].
+PRAGMA_PROFILE = {
+    "synchronous": "NORMAL",
+    "foreign_keys": "ON",
+    "busy_timeout": str(int(BUSY_TIMEOUT * 1000)),
+    "cache_size": "-16000",
+    "mmap_size": "0",
+    "temp_store": "MEMORY",
+    "journal_size_limit": str(64 * 1024 * 1024),
+}
+# Set by config.apply(): [pragmas] from the config file, overriding the
+# profile, and READ_ONLY for report-only terminals, where even the writer
+# opens mode=ro
+PRAGMAS = {}
+READ_ONLY = False
+
+def _apply_pragmas(conn, readonly=False):
+    if readonly:
+        conn.execute("PRAGMA query_only=ON;")
+    else:
+        conn.execute("PRAGMA journal_mode=WAL;")
+    for name, value in {**PRAGMA_PROFILE, **PRAGMAS}.items():
+        conn.execute(f"PRAGMA {name}={value}")
 
 def get_connection():
-    conn = sqlite3.connect(DB_FILE, timeout=10.0)
-    conn.execute("PRAGMA journal_mode=WAL;")
+    conn = sqlite3.connect(DB_FILE, timeout=BUSY_TIMEOUT)
+    _apply_pragmas(conn)
     return conn
 
+
+class ConnectionPool:
+    # One long-lived writer connection per thread plus a small set of shared
+    # read-only connections. Pragmas are applied once, when a connection opens.
+    def __init__(self, path, max_readers=READER_POOL_SIZE):
+        self.path = path
+        self.max_readers = max_readers
+        self._local = threading.local()
+        self._readers = queue.LifoQueue()
+        self._reader_count = 0
+        self._lock = threading.Lock()
+        self._connections = []
+        self._monitor = None
+        self._monitor_lock = threading.Lock()
+
+    def _open(self, readonly=False):
+        readonly = readonly or READ_ONLY
+        if readonly:
+            uri = f"{Path(os.path.abspath(self.path)).as_uri()}?mode=ro"
+            # Autocommit, so a reader never sits in an implicit transaction
+            # that would pin an old snapshot of the database
+            conn = sqlite3.connect(uri, uri=True, timeout=BUSY_TIMEOUT, check_same_thread=False,
+                                   isolation_level=None)
+        else:
+            conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, check_same_thread=False)
+        _apply_pragmas(conn, readonly)
+        with self._lock:
+            self._connections.append(conn)
+        return conn
+
+    def writer(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._open()
+            self._local.conn = conn
+        return conn
+
+    def acquire_reader(self):
+        try:
+            return self._readers.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_open = self._reader_count < self.max_readers
+            if can_open:
+                self._reader_count += 1
+
+        if not can_open:
+            return self._readers.get(timeout=BUSY_TIMEOUT)
+
+        try:
+            return self._open(readonly=True)
+        except sqlite3.Error:
+            with self._lock:
+                self._reader_count -= 1
+            raise
+
+    def release_reader(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        self._readers.put(conn)
+
+    def data_version(self):
+        # PRAGMA data_version on one dedicated connection moves whenever any
+        # other connection, in this process or on another workstation, commits.
+        # Values from different connections aren't comparable, so the token
+        # carries the connection too.
+        with self._monitor_lock:
+            if self._monitor is None:
+                self._monitor = self._open(readonly=True)
+            return self._monitor, self._monitor.execute("PRAGMA data_version").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            connections, self._connections = self._connections, []
+            self._reader_count = 0
+            self._monitor = None
+        self._readers = queue.LifoQueue()
+        self._local = threading.local()
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool.path != DB_FILE:
+            if _pool is not None:
+                _pool.close()
+            _pool = ConnectionPool(DB_FILE)
+        return _pool
+
+def close_pool():
+    global _pool
+    _deferred_audit.drain()
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+def data_version():
+    # Cheap "has anything been committed since?" check; compare tokens for equality
+    return get_pool().data_version()
+
+_tx_state = threading.local()
+_change_listeners = []
+
+def subscribe(listener):
+    # listener(radio_ids, department_ids) is called after a commit that
+    # reported changes through notify_changes().
+    _change_listeners.append(listener)
+
+def unsubscribe(listener):
+    if listener in _change_listeners:
+        _change_listeners.remove(listener)
+
+def _dispatch_changes(radio_ids, department_ids):
+    if not radio_ids and not department_ids:
+        return
+    # A copy: a listener may unsubscribe while it is being called
+    for listener in _change_listeners.copy():
+        listener(frozenset(radio_ids), frozenset(department_ids))
+
+def notify_changes(radio_ids=(), department_ids=()):
+    # Inside a connection() block the notification is held until the outermost
+    # block commits (and dropped on rollback); otherwise it goes out at once.
+    radio_ids = {int(radio_id) for radio_id in radio_ids}
+    department_ids = set(department_ids)
+    if getattr(_tx_state, "depth", 0):
+        _tx_state.radio_ids |= radio_ids
+        _tx_state.department_ids |= department_ids
+    else:
+        _dispatch_changes(radio_ids, department_ids)
+
+@contextmanager
+def connection(readonly=False):
+    # Yields a pooled connection. Writer blocks commit on success and roll back
+    # on error; nested blocks join the outermost transaction.
+    pool = get_pool()
+
+    if readonly:
+        conn = pool.acquire_reader()
+        try:
+            yield conn
+        finally:
+            pool.release_reader(conn)
+        return
+
+    conn = pool.writer()
+    depth = getattr(_tx_state, "depth", 0)
+    if depth == 0:
+        _tx_state.radio_ids, _tx_state.department_ids = set(), set()
+    _tx_state.depth = depth + 1
+    try:
+        yield conn
+        if depth == 0:
+            conn.commit()
+    except BaseException:
+        if depth == 0:
+            conn.rollback()
+        raise
+    finally:
+        _tx_state.depth = depth
+
+    if depth == 0:
+        _dispatch_changes(_tx_state.radio_ids, _tx_state.department_ids)
+
+# Full-text indexes for the main search box: radio_search holds one row per
+# radio (rowid = radios.id) with its department name, service_search one row
+# per service record (rowid = services.id), so logging a service touches only
+# its own row however long the radio's history gets. Triggers keep both in
+# step with the base tables. The trigram tokenizer gives case-insensitive
+# substring matching for terms of three or more characters.
+SEARCH_MIN_LENGTH = 3
+# bm25 weights per column: a serial hit outranks one buried in the notes
+RADIO_SEARCH_COLUMNS = (("serial", 10.0), ("model", 4.0), ("assigned_to", 3.0), ("notes", 1.0), ("department", 2.0))
+SERVICE_SEARCH_COLUMNS = (("problem", 1.0), ("notes", 0.5))
+
+_RADIO_SEARCH_ROW = """
+    INSERT OR REPLACE INTO radio_search (rowid, serial, model, assigned_to, notes, department)
+    SELECT r.id, r.serial, r.model, r.assigned_to, r.notes, d.name
+    FROM radios r
+    LEFT JOIN departments d ON d.id = r.department_id
+    WHERE {where}
+"""
+
+_SERVICE_SEARCH_ROW = """
+    INSERT INTO service_search (rowid, radio_id, problem, notes)
+    SELECT id, radio_id, problem, notes FROM services WHERE {where}
+"""
+
+_SEARCH_TRIGGERS = [
+    ("radios_search_insert", "AFTER INSERT ON radios",
+     _RADIO_SEARCH_ROW.format(where="r.id = NEW.id")),
+    ("radios_search_update", "AFTER UPDATE OF id, serial, model, assigned_to, notes, department_id ON radios",
+     "DELETE FROM radio_search WHERE rowid = OLD.id;" + _RADIO_SEARCH_ROW.format(where="r.id = NEW.id")),
+    ("radios_search_delete", "AFTER DELETE ON radios",
+     "DELETE FROM radio_search WHERE rowid = OLD.id"),
+    ("departments_search_update", "AFTER UPDATE OF id, name ON departments",
+     _RADIO_SEARCH_ROW.format(where="r.department_id IN (OLD.id, NEW.id)")),
+    ("departments_search_delete", "AFTER DELETE ON departments",
+     _RADIO_SEARCH_ROW.format(where="r.department_id = OLD.id")),
+    ("services_search_insert", "AFTER INSERT ON services",
+     _SERVICE_SEARCH_ROW.format(where="id = NEW.id")),
+    ("services_search_update", "AFTER UPDATE OF id, radio_id, problem, notes ON services",
+     "DELETE FROM service_search WHERE rowid = OLD.id;" + _SERVICE_SEARCH_ROW.format(where="id = NEW.id")),
+    ("services_search_delete", "AFTER DELETE ON services",
+     "DELETE FROM service_search WHERE rowid = OLD.id"),
+]
+
+def _create_search_index(cursor):
+    radio_columns = ", ".join(name for name, _ in RADIO_SEARCH_COLUMNS)
+    service_columns = ", ".join(name for name, _ in SERVICE_SEARCH_COLUMNS)
+    try:
+        cursor.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS radio_search USING fts5({radio_columns}, tokenize = 'trigram')")
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS service_search USING fts5(radio_id UNINDEXED, {service_columns}, tokenize = 'trigram')"
+        )
+    except sqlite3.OperationalError:
+        # SQLite built without FTS5 or older than 3.34 (no trigram tokenizer);
+        # search_radios() reports it unavailable and callers scan in memory.
+        return
+    for name, event, body in _SEARCH_TRIGGERS:
+        cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN {body.rstrip().rstrip(';')}; END")
+    cursor.execute(_RADIO_SEARCH_ROW.format(where="1"))
+    cursor.execute(_SERVICE_SEARCH_ROW.format(where="1"))
+
+# Change feed for other workstations (repository/changes.py): triggers keep
+# one change_log row per changed radio or department. INSERT OR REPLACE on
+# (source, row_id) moves an existing row to a fresh seq, so the table stays
+# one row per id however often it changes, and "everything since seq N" is a
+# range scan of the primary key. AUTOINCREMENT keeps seq from ever going back.
+_CHANGE_LOG_ROW = "INSERT OR REPLACE INTO change_log (source, row_id) VALUES ('{source}', {row_id})"
+# Only when the key itself changed; otherwise the NEW row covers it
+_CHANGE_LOG_OLD_KEY = (
+    "INSERT OR REPLACE INTO change_log (source, row_id) SELECT '{source}', OLD.id WHERE OLD.id IS NOT NEW.id"
+)
+
+_CHANGE_LOG_TRIGGERS = [
+    ("radios_change_log_insert", "AFTER INSERT ON radios",
+     _CHANGE_LOG_ROW.format(source="radios", row_id="NEW.id")),
+    ("radios_change_log_update", "AFTER UPDATE ON radios",
+     _CHANGE_LOG_OLD_KEY.format(source="radios") + ";"
+     + _CHANGE_LOG_ROW.format(source="radios", row_id="NEW.id")),
+    ("radios_change_log_delete", "AFTER DELETE ON radios",
+     _CHANGE_LOG_ROW.format(source="radios", row_id="OLD.id")),
+    ("departments_change_log_insert", "AFTER INSERT ON departments",
+     _CHANGE_LOG_ROW.format(source="departments", row_id="NEW.id")),
+    ("departments_change_log_update", "AFTER UPDATE ON departments",
+     _CHANGE_LOG_OLD_KEY.format(source="departments") + ";"
+     + _CHANGE_LOG_ROW.format(source="departments", row_id="NEW.id")),
+    ("departments_change_log_delete", "AFTER DELETE ON departments",
+     _CHANGE_LOG_ROW.format(source="departments", row_id="OLD.id")),
+]
+# Service text is part of the main grid's full-text search, so a service
+# change is fed to other workstations as a change to its radio
+_SERVICE_CHANGE_LOG_TRIGGERS = [
+    ("services_change_log_insert", "AFTER INSERT ON services",
+     _CHANGE_LOG_ROW.format(source="radios", row_id="NEW.radio_id")),
+    ("services_change_log_update", "AFTER UPDATE ON services",
+     "INSERT OR REPLACE INTO change_log (source, row_id) SELECT 'radios', OLD.radio_id"
+     " WHERE OLD.radio_id IS NOT NEW.radio_id;"
+     + _CHANGE_LOG_ROW.format(source="radios", row_id="NEW.radio_id")),
+    ("services_change_log_delete", "AFTER DELETE ON services",
+     _CHANGE_LOG_ROW.format(source="radios", row_id="OLD.radio_id")),
+]
+
+# Dashboard counters for the "Fleet Summary" report: one department_summary
+# row per department ('' for radios without one), adjusted by triggers as
+# radios and services change, so the summary reads a handful of rows however
+# large the fleet and service history grow. A service counts toward its
+# radio's department while that radio exists.
+SUMMARY_COLUMNS = ("radios", "active", "in_service", "missing", "services", "open_services", "repair_spend")
+
+_SUMMARY_UPSERT = """
+    INSERT INTO department_summary (department_id, {columns})
+    {select}
+    ON CONFLICT (department_id) DO UPDATE SET {updates}
+""".format(
+    columns=", ".join(SUMMARY_COLUMNS),
+    select="{select}",
+    updates=", ".join(f"{column} = {column} + excluded.{column}" for column in SUMMARY_COLUMNS),
+)
+
+# One radio (row {row}) with its services, added or taken away ({sign})
+_RADIO_SUMMARY_ROW = _SUMMARY_UPSERT.format(select="""
+    SELECT COALESCE({row}.department_id, ''), {sign}, {sign} * ({row}.status IS 'Active'),
+           {sign} * ({row}.status IS 'In Service'), {sign} * ({row}.missing IS 'Yes'),
+           {sign} * COUNT(s.id), {sign} * COALESCE(SUM(s.status IS 'open'), 0), {sign} * TOTAL(s.amount)
+    FROM (SELECT 1) LEFT JOIN services s ON s.radio_id = {row}.id
+    WHERE 1
+""")
+
+# One service record, charged to its radio's current department
+_SERVICE_SUMMARY_ROW = _SUMMARY_UPSERT.format(select="""
+    SELECT COALESCE(r.department_id, ''), 0, 0, 0, 0,
+           {sign}, {sign} * ({row}.status IS 'open'), {sign} * COALESCE(CAST({row}.amount AS REAL), 0)
+    FROM radios r WHERE r.id = {row}.radio_id
+""")
+
+# The same counters computed from scratch; used to fill the table
+SUMMARY_TOTALS_QUERY = """
+    SELECT COALESCE(r.department_id, ''), COUNT(*), SUM(r.status IS 'Active'),
+           SUM(r.status IS 'In Service'), SUM(r.missing IS 'Yes'),
+           COALESCE(SUM(s.services), 0), COALESCE(SUM(s.open_services), 0), TOTAL(s.repair_spend)
+    FROM radios r
+    LEFT JOIN (
+        SELECT radio_id, COUNT(*) AS services, SUM(status IS 'open') AS open_services,
+               TOTAL(amount) AS repair_spend
+        FROM services GROUP BY radio_id
+    ) s ON s.radio_id = r.id
+    GROUP BY 1
+"""
+
+_SUMMARY_TRIGGERS = [
+    ("radios_summary_insert", "AFTER INSERT ON radios",
+     _RADIO_SUMMARY_ROW.format(row="NEW", sign="1")),
+    ("radios_summary_update", "AFTER UPDATE OF id, department_id, status, missing ON radios",
+     _RADIO_SUMMARY_ROW.format(row="OLD", sign="-1") + ";" + _RADIO_SUMMARY_ROW.format(row="NEW", sign="1")),
+    # BEFORE: with foreign keys on, the cascade has already removed the
+    # radio's services by the time an AFTER trigger runs
+    ("radios_summary_delete", "BEFORE DELETE ON radios",
+     _RADIO_SUMMARY_ROW.format(row="OLD", sign="-1")),
+    ("services_summary_insert", "AFTER INSERT ON services",
+     _SERVICE_SUMMARY_ROW.format(row="NEW", sign="1")),
+    ("services_summary_update", "AFTER UPDATE OF radio_id, status, amount ON services",
+     _SERVICE_SUMMARY_ROW.format(row="OLD", sign="-1") + ";" + _SERVICE_SUMMARY_ROW.format(row="NEW", sign="1")),
+    ("services_summary_delete", "AFTER DELETE ON services",
+     _SERVICE_SUMMARY_ROW.format(row="OLD", sign="-1")),
+]
+
+# Numbered schema migrations. Each step is a list of idempotent statements (or
+# callables taking a cursor) applied in one transaction, after which
+# PRAGMA user_version records the step number.
+MIGRATIONS = [
+    (1, [
+        """
+        CREATE TABLE IF NOT EXISTS departments (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            contact TEXT
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS radios (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            radio_id TEXT,
+            serial TEXT NOT NULL,
+            model TEXT,
+            assigned_to TEXT,
+            notes TEXT,
+            department_id TEXT,
+            date_received TEXT,
+            date_issued TEXT,
+            date_returned TEXT,
+            last_updated TEXT,
+            status TEXT DEFAULT 'Active',
+            missing TEXT DEFAULT 'No',
+            FOREIGN KEY (department_id) REFERENCES departments(id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS radio_changes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            radio_id INTEGER,
+            change_type TEXT,
+            field_changed TEXT,
+            old_value TEXT,
+            new_value TEXT,
+            timestamp TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS services (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            radio_id INTEGER NOT NULL,
+            status TEXT NOT NULL DEFAULT 'open',
+            date_service TEXT,
+            lrc_service_num TEXT,
+            date_sent TEXT,
+            date_repaired TEXT,
+            amount REAL,
+            problem TEXT,
+            notes TEXT,
+            FOREIGN KEY (radio_id) REFERENCES radios(id) ON DELETE CASCADE
+        )
+        """,
+    ]),
+    (2, [
+        # ServiceManager.load_services: WHERE radio_id = ? ORDER BY date_service
+        "CREATE INDEX IF NOT EXISTS idx_services_radio ON services(radio_id, date_service)",
+        # AllServicesViewer: WHERE status = ? ORDER BY date_service
+        "CREATE INDEX IF NOT EXISTS idx_services_status ON services(status, date_service)",
+        # radios -> departments joins and "Radios by Department"
+        "CREATE INDEX IF NOT EXISTS idx_radios_department ON radios(department_id)",
+        "CREATE INDEX IF NOT EXISTS idx_departments_name ON departments(name, id)",
+        # Report filters
+        "CREATE INDEX IF NOT EXISTS idx_radios_status ON radios(status)",
+        "CREATE INDEX IF NOT EXISTS idx_radios_missing ON radios(missing)",
+    ]),
+    (3, [
+        # Keyset paging of the service history (repository/sources.QuerySource)
+        "CREATE INDEX IF NOT EXISTS idx_services_recent ON services(COALESCE(date_service, ''), id)",
+        "CREATE INDEX IF NOT EXISTS idx_services_status_recent ON services(status, COALESCE(date_service, ''), id)",
+    ]),
+    (4, [
+        _create_search_index,
+    ]),
+    (5, [
+        """
+        CREATE TABLE IF NOT EXISTS change_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            source TEXT NOT NULL,
+            row_id NOT NULL,
+            UNIQUE (source, row_id)
+        )
+        """,
+    ] + [
+        f"CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN {body}; END"
+        for name, event, body in _CHANGE_LOG_TRIGGERS
+    ]),
+    (6, [
+        f"""
+        CREATE TABLE IF NOT EXISTS department_summary (
+            department_id TEXT PRIMARY KEY,
+            {", ".join(f"{column} INTEGER NOT NULL DEFAULT 0" for column in SUMMARY_COLUMNS[:-1])},
+            repair_spend REAL NOT NULL DEFAULT 0
+        )
+        """,
+        "DELETE FROM department_summary",
+        f"INSERT INTO department_summary (department_id, {', '.join(SUMMARY_COLUMNS)}) {SUMMARY_TOTALS_QUERY}",
+    ] + [
+        f"CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN {body.strip()}; END"
+        for name, event, body in _SUMMARY_TRIGGERS
+    ]),
+    (7, [
+        # Keyset paging of the audit history (repository/audit.py): one
+        # radio's timeline, and the fleet-wide browser, newest first
+        "CREATE INDEX IF NOT EXISTS idx_radio_changes_radio ON radio_changes(radio_id, COALESCE(timestamp, ''), id)",
+        "CREATE INDEX IF NOT EXISTS idx_radio_changes_recent ON radio_changes(COALESCE(timestamp, ''), id)",
+    ]),
+    (8, [
+        # Foreign keys are enforced from here on (PRAGMA_PROFILE). No
+        # department is NULL, which the key allows, rather than ''
+        "UPDATE radios SET department_id = NULL WHERE department_id = ''",
+        # Radios still pointing at a department deleted before enforcement
+        # keep it, as a department named after its id, so saving them works
+        """
+        INSERT OR IGNORE INTO departments (id, name)
+        SELECT DISTINCT department_id, department_id FROM radios
+        WHERE department_id IS NOT NULL AND department_id NOT IN (SELECT id FROM departments)
+        """,
+        "DROP TRIGGER IF EXISTS radios_summary_delete",
+    ] + [
+        f"CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN {body.strip()}; END"
+        for name, event, body in _SUMMARY_TRIGGERS if name == "radios_summary_delete"
+    ]),
+    (9, [
+        f"CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN {body}; END"
+        for name, event, body in _SERVICE_CHANGE_LOG_TRIGGERS
+    ]),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+def get_schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def migrate(conn):
+    applied = []
+    if get_schema_version(conn) == 0 and not conn.execute("SELECT 1 FROM sqlite_master").fetchone():
+        # Lets maintenance return free pages to the filesystem with
+        # incremental_vacuum. WAL has already written the header, so the
+        # empty file is rebuilt (instantly) for the setting to take effect.
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+    for version, steps in MIGRATIONS:
+        if version <= get_schema_version(conn):
+            continue
+
+        # BEGIN IMMEDIATE takes the write lock, so re-check the version in case
+        # another workstation migrated while we were waiting.
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if version <= get_schema_version(conn):
+                conn.rollback()
+                continue
+            cursor = conn.cursor()
+            for step in steps:
+                if callable(step):
+                    step(cursor)
+                else:
+                    cursor.execute(step)
+            cursor.execute(f"PRAGMA user_version = {int(version)}")
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        applied.append(version)
+    return applied
+
+_schema_ready = set()
+
 def init_db():
-    with get_connection() as conn:
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS departments (
-                id TEXT PRIMARY KEY,
-                name TEXT NOT NULL,
-                contact TEXT
-            )
-        """)
-
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS radios (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                radio_id TEXT,
-                serial TEXT NOT NULL,
-                model TEXT,
-                assigned_to TEXT,
-                notes TEXT,
-                department_id TEXT,
-                date_received TEXT,
-                date_issued TEXT,
-                date_returned TEXT,
-                last_updated TEXT,
-                status TEXT DEFAULT 'Active',
-                missing TEXT DEFAULT 'No',
-                FOREIGN KEY (department_id) REFERENCES departments(id)
-            )
-        """)
-
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS radio_changes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                radio_id INTEGER,
-                change_type TEXT,
-                field_changed TEXT,
-                old_value TEXT,
-                new_value TEXT,
-                timestamp TEXT DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS services (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                radio_id INTEGER NOT NULL,
-                status TEXT NOT NULL DEFAULT 'open',
-                date_service TEXT,
-                lrc_service_num TEXT,
-                date_sent TEXT,
-                date_repaired TEXT,
-                amount REAL,
-                problem TEXT,
-                notes TEXT,
-                FOREIGN KEY (radio_id) REFERENCES radios(id) ON DELETE CASCADE
+    path = os.path.abspath(DB_FILE)
+    if path in _schema_ready:
+        return
+
+    with connection() as conn:
+        if get_schema_version(conn) < SCHEMA_VERSION:
+            if READ_ONLY:
+                raise RuntimeError(
+                    f"{path} uses an older schema; open it once from a read-write workstation to upgrade it"
+                )
+            migrate(conn)
+    _schema_ready.add(path)
+
+def search_radios(term, limit=None):
+    # Radio ids whose details or service history contain `term`, best match
+    # first. Returns None when the index can't answer (term too short, or no
+    # FTS5 in this SQLite) so the caller can fall back to scanning rows itself.
+    if len(term) < SEARCH_MIN_LENGTH:
+        return None
+    with connection(readonly=True) as conn:
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'radio_search'"
+        ).fetchone()
+        if not exists:
+            return None
+        radio_weights = ", ".join(str(weight) for _, weight in RADIO_SEARCH_COLUMNS)
+        service_weights = ", ".join(str(weight) for _, weight in SERVICE_SEARCH_COLUMNS)
+        # bm25 scores are negative; the lowest is the best match
+        sql = f"""
+            SELECT radio_id FROM (
+                SELECT rowid AS radio_id, bm25(radio_search, {radio_weights}) AS score
+                FROM radio_search WHERE radio_search MATCH :term
+                UNION ALL
+                SELECT radio_id, bm25(service_search, 0, {service_weights})
+                FROM service_search WHERE service_search MATCH :term
+                AND radio_id IN (SELECT id FROM radios)
             )
-        """)
+            GROUP BY radio_id
+            ORDER BY MIN(score), radio_id
+        """
+        params = {"term": '"' + term.replace('"', '""') + '"'}
+        if limit is not None:
+            sql += " LIMIT :limit"
+            params["limit"] = int(limit)
+        return [row[0] for row in conn.execute(sql, params)]
 
-        conn.commit()
+AUDIT_INSERT = """
+    INSERT INTO radio_changes (radio_id, change_type, field_changed, old_value, new_value)
+    VALUES (?, ?, ?, ?, ?)
+"""
 
 def log_radio_change(cursor, radio_id, change_type, field_changed, old_value, new_value):
-    cursor.execute("""
-        INSERT INTO radio_changes (radio_id, change_type, field_changed, old_value, new_value)
-        VALUES (?, ?, ?, ?, ?)
-    """, (radio_id, change_type, field_changed, old_value, new_value))
+    cursor.execute(AUDIT_INSERT, (radio_id, change_type, field_changed, old_value, new_value))
+
+
+class AuditWriter:
+    # Collects radio_changes rows during a unit of work so they can be written
+    # with one executemany instead of one INSERT per changed field.
+    def __init__(self):
+        self.records = []
+
+    def __len__(self):
+        return len(self.records)
+
+    def record(self, radio_id, change_type, field_changed, old_value, new_value):
+        self.records.append((radio_id, change_type, field_changed, old_value, new_value))
+
+    def record_many(self, records):
+        self.records.extend(records)
+
+    def flush(self, cursor):
+        if self.records:
+            cursor.executemany(AUDIT_INSERT, self.records)
+            self.records = []
+
+
+class DeferredAuditQueue:
+    # Background writer for audit rows that do not have to share the data
+    # change's transaction. Records from several units of work are written
+    # together, and a busy database is retried with backoff instead of
+    # holding up the caller.
+    BATCH = 500
+    MAX_BACKOFF = 5.0
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, records):
+        if not records:
+            return
+        self._queue.put(list(records))
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+                self._thread.start()
+
+    def _take(self, timeout):
+        records = self._queue.get(timeout=timeout)
+        while len(records) < self.BATCH:
+            try:
+                records.extend(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return records
+
+    def _write(self, records):
+        with connection() as conn:
+            conn.executemany(AUDIT_INSERT, records)
+
+    def _run(self):
+        backoff = 0.1
+        pending = None
+        while True:
+            if pending is None:
+                try:
+                    pending = self._take(timeout=1.0)
+                except queue.Empty:
+                    # Exit only with nothing queued, and under the lock, so a
+                    # submit() racing this either is seen here or starts a
+                    # new writer
+                    with self._lock:
+                        if self._queue.empty():
+                            self._thread = None
+                            return
+                    continue
+            try:
+                self._write(pending)
+            except Exception as e:
+                # Busy is expected under contention; anything else is
+                # reported, but the records are kept and retried all the same
+                if not is_busy(e):
+                    import traceback
+                    traceback.print_exc()
+                time.sleep(backoff)
+                backoff = min(backoff * 2, self.MAX_BACKOFF)
+                continue
+            pending, backoff = None, 0.1
+
+    def drain(self):
+        # Write whatever is still queued on the calling thread (shutdown)
+        with self._lock:
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout=BUSY_TIMEOUT)
+        records = []
+        while True:
+            try:
+                records.extend(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if records:
+            self._write(records)
+
+
+_deferred_audit = DeferredAuditQueue()
+
+def is_busy(error):
+    # SQLITE_BUSY / SQLITE_LOCKED (with their extended codes): another
+    # connection held the lock past busy_timeout
+    code = getattr(error, "sqlite_errorcode", None)
+    if code is not None:
+        return code & 0xFF in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+    return isinstance(error, sqlite3.OperationalError) and "locked" in str(error)
+
+def write_with_audit_fallback(write, *args):
+    # Calls write(*args), a change that writes its audit rows in its own
+    # transaction. Only if the database stays locked past busy_timeout is it
+    # tried once more with defer_audit=True, holding the lock for the change
+    # alone and leaving the audit rows to the background writer.
+    try:
+        return write(*args)
+    except sqlite3.OperationalError as e:
+        if not is_busy(e):
+            raise
+    return write(*args, defer_audit=True)
+
+@contextmanager
+def unit_of_work(defer_audit=False):
+    # with unit_of_work() as (conn, audit): ... make changes, audit.record(...)
+    # The audit rows are flushed with one executemany inside the same
+    # transaction, just before it commits. With defer_audit they are handed to
+    # the background writer after the commit instead, so the write lock is
+    # held only for the data change.
+    audit = AuditWriter()
+    with connection() as conn:
+        yield conn, audit
+        if not defer_audit:
+            audit.flush(conn)
+    if defer_audit:
+        _deferred_audit.submit(audit.records)
@@ -0,0 +1,232 @@
+import csv
+import datetime
+import os
+
+from database import connection, notify_changes
+from repository.radios import EDITABLE_FIELDS
+
+BATCH_SIZE = 500
+
+RADIO_FIELDS = EDITABLE_FIELDS
+DATE_FIELDS = ("date_received", "date_issued", "date_returned")
+
+# Accepted spellings of each column heading, compared lower-cased with spaces
+# and underscores removed
+HEADER_ALIASES = {
+    "radioid": "radio_id",
+    "radio": "radio_id",
+    "serial": "serial",
+    "serialnumber": "serial",
+    "model": "model",
+    "assigned": "assigned_to",
+    "assignedto": "assigned_to",
+    "notes": "notes",
+    "department": "department",
+    "dept": "department",
+    "departmentid": "department",
+    "deptid": "department",
+    "departmentname": "department",
+    "datereceived": "date_received",
+    "received": "date_received",
+    "dateissued": "date_issued",
+    "issued": "date_issued",
+    "datereturned": "date_returned",
+    "returned": "date_returned",
+    "id": "id",
+    "name": "name",
+    "contact": "contact",
+}
+
+
+class ImportResult:
+    def __init__(self, dry_run):
+        self.dry_run = dry_run
+        self.rows_read = 0
+        self.valid = 0
+        self.imported = 0
+        self.conflicts = []
+
+    def conflict(self, line, key, problem):
+        self.conflicts.append((line, key, problem))
+
+
+def _normalize_header(header):
+    text = str(header or "").strip().lower().replace(" ", "").replace("_", "").replace("#", "")
+    return HEADER_ALIASES.get(text)
+
+
+def read_rows(path):
+    # Yields (line_number, {field: value}) from a CSV or XLSX file without
+    # loading the whole file
+    if os.path.splitext(path)[1].lower() in (".xlsx", ".xlsm"):
+        from openpyxl import load_workbook
+        wb = load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = wb.active.iter_rows(values_only=True)
+            yield from _keyed_rows(rows)
+        finally:
+            wb.close()
+    else:
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            yield from _keyed_rows(csv.reader(f))
+
+
+def _keyed_rows(rows):
+    header = None
+    for line, values in enumerate(rows, start=1):
+        if header is None:
+            header = [_normalize_header(value) for value in values]
+            continue
+        record = {}
+        for field, value in zip(header, values):
+            if field is None:
+                continue
+            if isinstance(value, (datetime.date, datetime.datetime)):
+                value = value.strftime("%Y-%m-%d")
+            record[field] = "" if value is None else str(value).strip()
+        if any(record.values()):
+            yield line, record
+
+
+def _batches(rows, size=BATCH_SIZE):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _valid_date(text):
+    try:
+        datetime.datetime.strptime(text, "%Y-%m-%d")
+        return True
+    except ValueError:
+        return False
+
+
+def _department_lookup(conn):
+    # One query resolves departments by id or by name for the whole file
+    lookup = {}
+    for dept_id, name in conn.execute("SELECT id, name FROM departments"):
+        lookup.setdefault(str(name).strip().lower(), dept_id)
+        lookup[str(dept_id).strip().lower()] = dept_id
+    return lookup
+
+
+def _existing_serials(conn, serials):
+    placeholders = ", ".join("?" for _ in serials)
+    cursor = conn.execute(
+        f"SELECT serial FROM radios WHERE serial IN ({placeholders})", tuple(serials)
+    )
+    return {row[0] for row in cursor.fetchall()}
+
+
+def _validate_radios(conn, batch, departments, seen, result):
+    valid = []
+    existing = _existing_serials(conn, [record.get("serial", "") for _, record in batch])
+    for line, record in batch:
+        result.rows_read += 1
+        serial = record.get("serial", "")
+        if not serial or not record.get("radio_id"):
+            result.conflict(line, serial, "Radio ID and Serial are required")
+            continue
+        if serial in seen:
+            result.conflict(line, serial, f"Duplicate serial in file (line {seen[serial]})")
+            continue
+        seen[serial] = line
+        if serial in existing:
+            result.conflict(line, serial, "Serial already exists")
+            continue
+
+        department = record.get("department", "")
+        dept_id = None
+        if department:
+            dept_id = departments.get(department.lower())
+            if dept_id is None:
+                result.conflict(line, serial, f"Unknown department '{department}'")
+                continue
+
+        bad_dates = [field for field in DATE_FIELDS if record.get(field) and not _valid_date(record[field])]
+        if bad_dates:
+            result.conflict(line, serial, f"Invalid date in {', '.join(bad_dates)} (use YYYY-MM-DD)")
+            continue
+
+        record["department_id"] = dept_id
+        valid.append(tuple(record.get(field, "") for field in RADIO_FIELDS))
+    result.valid += len(valid)
+    return valid
+
+
+def import_radios(path, dry_run=False):
+    # Validates the file in batches and, unless dry_run, inserts every valid
+    # row with executemany inside one transaction, followed by a single
+    # set-based insert of the matching audit rows. Rows with conflicts are
+    # reported and skipped.
+    result = ImportResult(dry_run)
+    seen = {}
+    with connection(readonly=dry_run) as conn:
+        departments = _department_lookup(conn)
+        if not dry_run:
+            # Take the write lock up front so every id above first_id is ours
+            if not conn.in_transaction:
+                conn.execute("BEGIN IMMEDIATE")
+            first_id = conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM radios").fetchone()[0]
+
+        for batch in _batches(read_rows(path)):
+            valid = _validate_radios(conn, batch, departments, seen, result)
+            if valid and not dry_run:
+                conn.executemany(f"""
+                    INSERT INTO radios ({", ".join(RADIO_FIELDS)})
+                    VALUES ({", ".join("?" for _ in RADIO_FIELDS)})
+                """, valid)
+
+        if not dry_run and result.valid:
+            conn.execute("""
+                INSERT INTO radio_changes (radio_id, change_type, field_changed, old_value, new_value)
+                SELECT id, 'ADD', 'ALL', '',
+                       COALESCE(radio_id, '') || ', ' || serial || ', ' || COALESCE(model, '') || ', ' ||
+                       COALESCE(assigned_to, '') || ', ' || COALESCE(notes, '')
+                FROM radios WHERE id >= ?
+            """, (first_id,))
+            new_ids = [row[0] for row in conn.execute("SELECT id FROM radios WHERE id >= ?", (first_id,))]
+            result.imported = len(new_ids)
+            notify_changes(radio_ids=new_ids)
+    return result
+
+
+def import_departments(path, dry_run=False):
+    result = ImportResult(dry_run)
+    seen = {}
+    imported = []
+    with connection(readonly=dry_run) as conn:
+        existing = {str(row[0]).lower() for row in conn.execute("SELECT id FROM departments")}
+        if not dry_run and not conn.in_transaction:
+            conn.execute("BEGIN IMMEDIATE")
+
+        for batch in _batches(read_rows(path)):
+            valid = []
+            for line, record in batch:
+                result.rows_read += 1
+                dept_id = record.get("id") or record.get("department", "")
+                name = record.get("name", "")
+                if not dept_id or not name:
+                    result.conflict(line, dept_id, "Department ID and Name are required")
+                elif dept_id.lower() in seen:
+                    result.conflict(line, dept_id, f"Duplicate department in file (line {seen[dept_id.lower()]})")
+                elif dept_id.lower() in existing:
+                    result.conflict(line, dept_id, "Department already exists")
+                else:
+                    seen[dept_id.lower()] = line
+                    valid.append((dept_id, name, record.get("contact", "")))
+                    imported.append(dept_id)
+            result.valid += len(valid)
+            if valid and not dry_run:
+                conn.executemany("INSERT INTO departments (id, name, contact) VALUES (?, ?, ?)", valid)
+
+        if not dry_run:
+            result.imported = result.valid
+            notify_changes(department_ids=imported)
+    return result
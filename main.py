@@ -1,18 +1,90 @@
+import time
+
+STARTED = time.perf_counter()
+
+import os
 import tkinter as tk
-from tkinter import ttk, messagebox
-from ui.add_radio_form import AddRadioForm
-from ui.department_manager import DepartmentManager
-from ui.service_manager import ServiceManager
-from ui.all_services_viewer import AllServicesViewer
-from ui.reports_window import ReportsWindow
-from database import init_db, get_connection, log_radio_change
+from tkinter import messagebox, ttk
+
+# Only what the main window needs at startup is imported here. Other windows
+# (and their openpyxl/reportlab dependencies) are imported where they are
+# opened; plain import statements, so PyInstaller still finds and bundles them.
+import config
+from database import (
+    SEARCH_MIN_LENGTH,
+    close_pool,
+    init_db,
+    search_radios,
+    subscribe,
+    write_with_audit_fallback,
+)
+from repository import changes, departments, radios
+from search_index import RadioSearchIndex
+from ui.background import get_runner, set_busy
+from ui.virtual_tree import ListSource, VirtualTreeview
+
+# Set by benchmarks/startup.py to a file path: write the time to first paint
+# there and exit (a --windowed PyInstaller build has no stdout)
+STARTUP_PROBE_ENV = "RADIO_INVENTORY_STARTUP_PROBE"
+
+# Above this many changed radios a full reload is cheaper than patching
+MAX_PATCHED_ROWS = 500
+# How often to check for changes saved from other workstations; between
+# commits a check is one PRAGMA on an idle connection
+CHANGE_POLL_MS = 2000
+# Maintenance (statistics, free pages, WAL checkpoint) runs once the window
+# has had no keyboard or mouse input for this long, and again on exit
+IDLE_MAINTENANCE_MINUTES = 15
+IDLE_CHECK_MS = 60000
+# What each run did and how long it took, per workstation, in the local data
+# folder (config.local_data_dir)
+MAINTENANCE_LOG = "maintenance.log"
+# At exit, wait at most this long (seconds) on another desk's lock, so
+# closing the window never hangs for the full busy timeout
+EXIT_BUSY_TIMEOUT = 0.5
+
+def fetch_fleet():
+    # The schema check runs here, on a worker thread, so it never delays the
+    # first paint; init_db() is a no-op once the schema is known current.
+    init_db()
+    return RadioSearchIndex(radios.grid_rows())
+
+def fetch_fleet_from_feed():
+    # The feed position is read first, so a commit that lands mid-load is
+    # pulled again by the next poll instead of being missed
+    init_db()
+    seq = changes.current_seq()
+    return seq, fetch_fleet()
+
+def fetch_department_names():
+    init_db()
+    return departments.names()
+
+def run_maintenance(reason, busy_timeout=None):
+    # Best effort: another desk holding the write lock just means next time.
+    # The steps, or why it failed, go to the maintenance log either way.
+    import sqlite3
+
+    import maintenance
+    log = os.path.join(config.local_data_dir(), MAINTENANCE_LOG)
+    steps, error = None, None
+    try:
+        steps = maintenance.run_maintenance(busy_timeout=busy_timeout)
+    except sqlite3.Error as e:
+        error = e
+    try:
+        maintenance.log_steps(log, reason, steps or (), error)
+    except OSError:
+        pass
+    return steps
 
-init_db()
 
 class RadioInventoryApp:
-    def __init__(self, root):
+    def __init__(self, root, settings=None):
         self.root = root
-        self.root.title("Radios Inventory")
+        self.settings = settings
+        mode = settings.mode if settings else config.READWRITE
+        self.root.title("Radios Inventory" if mode == config.READWRITE else "Radios Inventory (read-only)")
         self.root.bind("<Control-n>", lambda e: self.open_add_radio())
         self.root.bind("<Control-d>", lambda e: self.delete_selected_radio())
         self.root.bind("<Control-e>", lambda e: self.edit_selected_radio())
@@ -20,9 +92,10 @@ class RadioInventoryApp:
         self.root.bind("<Control-s>", lambda e: self.open_services())
         self.root.geometry("1200x700")
 
-        self.tree = ttk.Treeview(root, columns=(
+        self.grid = VirtualTreeview(root, columns=(
             "ID", "Serial", "Model", "Last Updated", "Dept ID", "Department", "Assigned", "Status", "Missing", "Notes"
-        ), show="headings")
+        ), tags=self.row_tags)
+        self.tree = self.grid.tree
 
         column_widths = {
             "ID": 40,
@@ -44,7 +117,7 @@ class RadioInventoryApp:
             self.tree.heading(col, text=col)
             self.tree.column(col, anchor="center", width=column_widths.get(col, 100))
 
-        self.tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        self.grid.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
 
         self.menu = tk.Menu(self.root, tearoff=0)
         self.menu.add_command(label="Edit Radio", command=self.edit_selected_radio)
@@ -93,12 +166,17 @@ class RadioInventoryApp:
         tk.Button(toolbar, text="Departments", command=self.open_departments).pack(side=tk.LEFT, padx=5)
         tk.Button(toolbar, text="Services", command=self.open_services).pack(side=tk.LEFT, padx=5)
         tk.Button(toolbar, text="All Services Viewer", command=self.open_all_services_viewer).pack(side=tk.LEFT, padx=5)
+        tk.Button(toolbar, text="Audit History", command=self.open_audit_history).pack(side=tk.LEFT, padx=5)
         tk.Button(toolbar, text="Reports", command=self.open_reports).pack(side=tk.LEFT, padx=5)
+        tk.Button(toolbar, text="Import", command=self.open_import).pack(side=tk.LEFT, padx=5)
+
+        self.status_label = tk.Label(toolbar, text="", font=("Segoe UI", 9), fg="gray")
+        self.status_label.pack(side=tk.RIGHT, padx=5)
 
         # Keyboard shortcuts tooltip
         shortcut_tip = tk.Label(
             self.root,
-            text="Shortcuts: Ctrl+N = Add | Ctrl+D = Delete | Ctrl+E = Edit | Ctrl+M = Toggle Missing | Ctrl+S = Services",
+            text="Shortcuts: Ctrl+N = Add | Ctrl+D = Delete | Ctrl+E = Edit | Ctrl+M = Toggle Missing | Ctrl+S = Services | Shift/Ctrl+Click = Select several",
             font=("Segoe UI", 9),
             anchor="w",
             justify="left",
@@ -106,265 +184,442 @@ class RadioInventoryApp:
         )
         shortcut_tip.pack(fill=tk.X, side=tk.BOTTOM, padx=10, pady=(0, 5))
 
-        self.load_data()
+        self.search_index = None
+        # The rows the grid shows. Set by show_matches, which can still be
+        # waiting on a full-text search when the first change arrives
+        self.matches = []
+        self.match_positions = None
+        self.pending_changes = set()
+        self.feed_seq = None
+        self.feed_version = None
+        self.runner = get_runner(root)
+        if mode == config.SNAPSHOT:
+            # Report-only terminal reading a local copy: the first start
+            # waits for the copy, later starts show the last one at once
+            first_run = not os.path.exists(settings.db_path)
+            self.refresh_snapshot(then=self.load_data if first_run else None)
+            if not first_run:
+                self.load_data()
+        else:
+            self.load_data()
+        subscribe(lambda radio_ids, department_ids: self.runner.call_soon(
+            self.on_data_changed, radio_ids, department_ids
+        ))
+        self.root.after(CHANGE_POLL_MS, self.poll_changes)
+        if mode == config.READWRITE:
+            self.last_input = time.monotonic()
+            self.maintenance_due = True
+            for sequence in ("<Any-KeyPress>", "<Any-ButtonPress>", "<MouseWheel>"):
+                self.root.bind_all(sequence, self.note_input, add="+")
+            self.root.after(IDLE_CHECK_MS, self.check_idle)
+
+    def note_input(self, event=None):
+        self.last_input = time.monotonic()
+        self.maintenance_due = True
+
+    def check_idle(self):
+        # At most once per idle spell; the next input re-arms it
+        if self.maintenance_due and time.monotonic() - self.last_input >= IDLE_MAINTENANCE_MINUTES * 60:
+            self.maintenance_due = False
+            self.runner.submit(run_maintenance, "idle", on_done=self.on_maintenance_done, key="maintenance")
+        self.root.after(IDLE_CHECK_MS, self.check_idle)
+
+    def on_maintenance_done(self, steps):
+        if steps:
+            total = sum(step.seconds for step in steps) * 1000
+            self.status_label.config(text=f"Database maintenance at {time.strftime('%H:%M')} ({total:.0f} ms)")
+
+    def refresh_snapshot(self, then=None):
+        self.status_label.config(text="Refreshing local copy...")
+        self.runner.submit(
+            config.refresh_snapshot, self.settings,
+            on_done=lambda result: self.on_snapshot_refreshed(then),
+            # Without a first copy there is nothing to show; later failures
+            # (share offline) keep the last copy and just say so
+            on_error=self.on_load_failed if then else self.on_snapshot_failed,
+            key="snapshot",
+        )
+        if then is None:
+            self.root.after(int(self.settings.snapshot_refresh_minutes * 60000), self.refresh_snapshot)
+
+    def on_snapshot_refreshed(self, then):
+        # The change feed patches in whatever the new copy changed
+        self.status_label.config(text=f"Local copy refreshed {time.strftime('%H:%M')}")
+        if then is not None:
+            then()
+            self.root.after(int(self.settings.snapshot_refresh_minutes * 60000), self.refresh_snapshot)
 
+    def on_snapshot_failed(self, error):
+        self.status_label.config(text=f"Local copy not refreshed: {error}")
 
     def load_data(self):
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT r.id, r.serial, r.model, r.last_updated, r.department_id,
-                   d.name, r.assigned_to, r.status, r.missing, r.notes
-            FROM radios r
-            LEFT JOIN departments d ON r.department_id = d.id
-        """)
-        rows = cursor.fetchall()
+        set_busy(self.root, True, self.status_label, "Loading radios...")
+        self.runner.submit(
+            fetch_fleet_from_feed,
+            on_done=self.on_fleet_loaded,
+            on_error=self.on_load_failed,
+            key="load_data",
+        )
+        self.load_departments()
+
+    def on_fleet_loaded(self, result):
+        self.feed_seq, search_index = result
+        set_busy(self.root, False, self.status_label, f"{len(search_index)} radios")
+        self.search_index = search_index
+        self.filter_rows(keep_position=True)
+        if self.pending_changes:
+            pending, self.pending_changes = self.pending_changes, set()
+            self.refresh_radios(pending)
+
+    def on_load_failed(self, error):
+        set_busy(self.root, False, self.status_label, "Load failed")
+        messagebox.showerror("Error", f"Could not load radios:\n{error}")
+
+    def load_departments(self):
         # Populate department filter dropdown
-        cursor.execute("SELECT DISTINCT name FROM departments ORDER BY name")
-        dept_names = [row[0] for row in cursor.fetchall()]
-        self.dept_combo["values"] = [""] + dept_names
-        conn.close()
-
-        self.tree.delete(*self.tree.get_children())
-        self.all_rows = rows
-        self.filter_rows()
-
-    def filter_rows(self, event=None):
-        search_term = self.search_var.get().lower()
-        status_filter = self.status_filter.get().lower()
-        missing_filter = self.missing_filter.get().lower()
-        dept_filter = self.dept_filter.get().lower()
-
-        self.tree.delete(*self.tree.get_children())
-
-        for row in self.all_rows:
-            match = True
-
-            if search_term and not any(search_term in str(cell).lower() for cell in row):
-                match = False
+        self.runner.submit(
+            fetch_department_names,
+            on_done=lambda names: self.dept_combo.configure(values=[""] + names),
+            key="departments",
+        )
 
-            if status_filter and status_filter != str(row[7]).lower():
-                match = False
+    def current_filters(self):
+        return {
+            "term": self.search_var.get(),
+            "status": self.status_filter.get(),
+            "missing": self.missing_filter.get(),
+            "department": self.dept_filter.get(),
+        }
 
-            if missing_filter and missing_filter != str(row[8]).lower():
-                match = False
+    def uses_text_index(self, filters):
+        return len(filters["term"]) >= SEARCH_MIN_LENGTH
 
-            if dept_filter and dept_filter != str(row[5]).lower():
-                match = False
+    def filter_rows(self, event=None, keep_position=False):
+        if self.search_index is None:
+            return
+        filters = self.current_filters()
+        if self.uses_text_index(filters):
+            # Longer terms also search department names and service history
+            # through the full-text index, ranked best match first
+            self.runner.submit(
+                search_radios, filters["term"],
+                on_done=lambda ranked_ids: self.show_ranked(ranked_ids, filters, keep_position),
+                on_error=self.on_load_failed,
+                key="search",
+            )
+            return
+        self.runner.cancel("search")
+        self.show_matches(self.search_index.search(**filters), keep_position)
+
+    def show_ranked(self, ranked_ids, filters, keep_position):
+        if ranked_ids is None:
+            # No full-text index in this SQLite build
+            matches = self.search_index.search(**filters)
+        else:
+            matches = self.search_index.ranked(ranked_ids, **filters)
+        self.show_matches(matches, keep_position)
+
+    def show_matches(self, matches, keep_position=False):
+        self.matches = matches
+        self.match_positions = None
+        self.grid.set_source(ListSource(self.matches), keep_position=keep_position)
+
+    def poll_changes(self):
+        # Other workstations' commits reach this desk only through the feed;
+        # changes made here are also patched straight away by on_data_changed
+        if self.feed_seq is not None:
+            since = self.feed_seq
+            self.runner.submit(
+                changes.changes_since, since, self.feed_version,
+                on_done=lambda result: self.on_feed_changes(since, result),
+                key="change_feed",
+            )
+        self.root.after(CHANGE_POLL_MS, self.poll_changes)
+
+    def on_feed_changes(self, since, result):
+        if since != self.feed_seq:
+            # A full reload moved the feed position while this poll ran
+            return
+        self.feed_seq, self.feed_version = result.seq, result.version
+        self.on_data_changed(result.radio_ids, result.department_ids)
 
-            if match:
-                tag = ""
-                if str(row[8]).strip().lower() == "yes":
-                    tag = "missing"
-                elif str(row[7]).strip().lower() == "in service":
-                    tag = "in_service"
+    def on_data_changed(self, radio_ids, department_ids):
+        if department_ids:
+            self.load_departments()
+        if len(radio_ids) > MAX_PATCHED_ROWS:
+            self.load_data()
+        elif radio_ids or department_ids:
+            self.refresh_radios(radio_ids, department_ids)
+
+    def refresh_radios(self, radio_ids, department_ids=()):
+        if self.search_index is None:
+            # The initial load is still running; patch once it lands
+            self.pending_changes |= set(radio_ids)
+            if department_ids:
+                self.load_data()
+            return
+        self.runner.submit(
+            radios.grid_rows_for, radio_ids, department_ids,
+            on_done=self.patch_radios,
+            on_error=self.on_load_failed,
+        )
 
-                self.tree.insert("", tk.END, values=row, tags=(tag,))
+    def patch_radios(self, result):
+        # Patch just the changed radios into the index and the current result
+        # list; only re-run the filter if a row entered or left the visible set.
+        radio_ids, found = result
+        if self.match_positions is None:
+            self.match_positions = {row[0]: i for i, row in enumerate(self.matches)}
+
+        filters = self.current_filters()
+        membership_changed = False
+        for radio_id in radio_ids:
+            row = found.get(radio_id)
+            was_visible = radio_id in self.match_positions
+            if row is None:
+                self.search_index.remove(radio_id)
+                membership_changed = membership_changed or was_visible
+                continue
+
+            self.search_index.upsert(row)
+            now_visible = self.search_index.matches(row, **filters)
+            if was_visible and now_visible:
+                self.matches[self.match_positions[radio_id]] = row
+            elif was_visible != now_visible:
+                membership_changed = True
+
+        if membership_changed or self.uses_text_index(filters):
+            # The full-text index also matches text not held in the rows
+            # (service history), so only a new query can tell membership
+            self.filter_rows(keep_position=True)
+        else:
+            self.grid.refresh()
+
+    @staticmethod
+    def row_tags(row, index=None):
+        if str(row[8]).strip().lower() == "yes":
+            return ("missing",)
+        if str(row[7]).strip().lower() == "in service":
+            return ("in_service",)
+        return ("",)
 
     def open_add_radio(self):
-        form = AddRadioForm(self.root, self.load_data)
+        from ui.add_radio_form import AddRadioForm
+        form = AddRadioForm(self.root)
         self.root.wait_window(form)
 
     def edit_selected_radio(self):
-        selected = self.tree.selection()
-        if not selected:
+        rows = self.selected_rows()
+        if not rows:
             messagebox.showwarning("No selection", "Please select a radio to edit.")
             return
 
-        values = self.tree.item(selected[0], "values")
-        radio_id = values[0]
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT radio_id FROM radios WHERE id = ?", (radio_id,))
-        radio_id_val = cursor.fetchone()[0]
-        conn.close()
-
-        radio = {
-            "id": values[0],
-            "radio_id": radio_id_val,
-            "serial": values[1],
-            "model": values[2],
-            "last_updated": values[3],
-            "department_id": values[4],
-            "department": values[5],
-            "assigned_to": values[6],
-            "status": values[7],
-            "missing": values[8],
-            "notes": values[9]
-        }
+        # The loaded row already carries every field the form needs
+        radio = {field: "" if value is None else value for field, value in rows[0]._asdict().items()}
 
-        form = AddRadioForm(self.root, self.load_data, existing=radio)
+        from ui.add_radio_form import AddRadioForm
+        form = AddRadioForm(self.root, existing=radio)
         self.root.wait_window(form)
 
+    def selected_rows(self):
+        # The loaded RadioRow for each selected radio, including any scrolled
+        # out of view (keys are str(id))
+        if self.search_index is None:
+            return []
+        rows = self.search_index.rows
+        return [rows[int(iid)] for iid in self.grid.selected_keys() if int(iid) in rows]
+
+    def describe_selection(self, rows):
+        return f"radio {rows[0][1]}" if len(rows) == 1 else f"{len(rows)} radios"
+
+    def run_bulk_action(self, action, rows, *args):
+        try:
+            write_with_audit_fallback(action, [values[0] for values in rows], *args)
+            return True
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to update {self.describe_selection(rows)}: {e}")
+            return False
+
     def delete_selected_radio(self):
-        selected = self.tree.selection()
-        if not selected:
+        rows = self.selected_rows()
+        if not rows:
             messagebox.showwarning("No selection", "Please select a radio to delete.")
             return
 
-        confirm = messagebox.askyesno("Confirm Delete", "Are you sure you want to delete this radio?")
+        confirm = messagebox.askyesno("Confirm Delete", f"Are you sure you want to delete {self.describe_selection(rows)}?")
         if not confirm:
             return
 
-        values = self.tree.item(selected[0], "values")
-        radio_id = values[0]
-        serial = values[1]
-
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM radios WHERE id = ?", (radio_id,))
-        conn.commit()
-        log_radio_change(cursor, radio_id, "DELETE", "ALL", serial, "")
-        conn.close()
-        self.load_data()
+        self.run_bulk_action(radios.delete_radios, rows)
 
     def put_radio_in_service(self):
-        selected = self.tree.selection()
-        if not selected:
+        rows = self.selected_rows()
+        if not rows:
             messagebox.showwarning("No Selection", "Please select a radio.")
             return
 
-        values = self.tree.item(selected[0], "values")
-        radio_id = values[0]
-        serial = values[1]
-
-        confirm = messagebox.askyesno("Confirm", f"Mark radio {serial} as 'In Service' and log service entry?")
-        if not confirm:
+        if len(rows) == 1:
+            prompt = f"Mark radio {rows[0][1]} as 'In Service' and log service entry?"
+        else:
+            prompt = f"Mark {len(rows)} radios as 'In Service'?"
+        if not messagebox.askyesno("Confirm", prompt):
             return
 
-        # Update status to In Service
-        conn = get_connection()
-        cursor = conn.cursor()
-        try:
-            cursor.execute("UPDATE radios SET status = 'In Service' WHERE id = ?", (radio_id,))
-            conn.commit()
-            log_radio_change(cursor, radio_id, "STATUS", "status", values[7], "In Service")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to update status: {e}")
-        finally:
-            conn.close()
-
-        # Open Service Manager to log service
-        win = ServiceManager(self.root, radio_id, serial)
-        self.root.wait_window(win)
-        self.load_data()
+        if self.run_bulk_action(radios.set_status, rows, "In Service") and len(rows) == 1:
+            # Open Service Manager to log service
+            from ui.service_manager import ServiceManager
+            win = ServiceManager(self.root, rows[0][0], rows[0][1])
+            self.root.wait_window(win)
 
     def take_out_of_service(self):
-        selected = self.tree.selection()
-        if not selected:
+        rows = self.selected_rows()
+        if not rows:
             messagebox.showwarning("No Selection", "Please select a radio.")
             return
 
-        values = self.tree.item(selected[0], "values")
-        radio_id = values[0]
-        serial = values[1]
-        old_status = values[7]
-
-        confirm = messagebox.askyesno("Confirm", f"Mark radio {serial} as 'Active' after service?")
+        confirm = messagebox.askyesno("Confirm", f"Mark {self.describe_selection(rows)} as 'Active' after service?")
         if not confirm:
             return
 
-        # Update status to Active
-        conn = get_connection()
-        cursor = conn.cursor()
-        try:
-            cursor.execute("UPDATE radios SET status = 'Active' WHERE id = ?", (radio_id,))
-            conn.commit()
-            log_radio_change(cursor, radio_id, "STATUS", "status", old_status, "Active")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to update status: {e}")
-        finally:
-            conn.close()
-
-        # Open service form to log service removal
-        win = ServiceManager(self.root, radio_id, serial)
-        self.root.wait_window(win)
-        self.load_data()
+        if self.run_bulk_action(radios.set_status, rows, "Active") and len(rows) == 1:
+            # Open service form to log service removal
+            from ui.service_manager import ServiceManager
+            win = ServiceManager(self.root, rows[0][0], rows[0][1])
+            self.root.wait_window(win)
 
     def toggle_missing_status(self):
-        selected = self.tree.selection()
-        if not selected:
+        rows = self.selected_rows()
+        if not rows:
             messagebox.showwarning("No Selection", "Please select a radio.")
             return
 
-        values = self.tree.item(selected[0], "values")
-        radio_id = values[0]
-        serial = values[1]
-        current_missing = values[8]
+        # A mixed selection is marked missing; found only when all are missing
+        all_missing = all(str(values[8]).strip() == "Yes" for values in rows)
+        new_missing = "No" if all_missing else "Yes"
 
-        new_missing = "No" if current_missing == "Yes" else "Yes"
-
-        confirm = messagebox.askyesno("Confirm", f"Mark radio {serial} as {'Missing' if new_missing == 'Yes' else 'Found'}?")
+        confirm = messagebox.askyesno("Confirm", f"Mark {self.describe_selection(rows)} as {'Missing' if new_missing == 'Yes' else 'Found'}?")
         if not confirm:
             return
 
-        conn = get_connection()
-        cursor = conn.cursor()
-        try:
-            cursor.execute("UPDATE radios SET missing = ? WHERE id = ?", (new_missing, radio_id))
-            conn.commit()
-            log_radio_change(cursor, radio_id, "MISSING", "missing", current_missing, new_missing)
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to update missing status: {e}")
-        finally:
-            conn.close()
-            self.load_data()
+        self.run_bulk_action(radios.set_missing, rows, new_missing)
+
+    def reassign_selected_radios(self):
+        rows = self.selected_rows()
+        if not rows:
+            messagebox.showwarning("No Selection", "Please select a radio.")
+            return
+
+        from ui.department_picker import DepartmentPicker
+        picker = DepartmentPicker(self.root, f"Move {self.describe_selection(rows)} to:")
+        self.root.wait_window(picker)
+        if picker.department_id is not None:
+            self.run_bulk_action(radios.reassign_department, rows, picker.department_id)
 
     def show_context_menu(self, event):
         row_id = self.tree.identify_row(event.y)
         if row_id:
-            self.tree.selection_set(row_id)
+            # Right-clicking inside a multi-selection keeps it for bulk actions
+            if row_id not in self.grid.selected_keys():
+                self.grid.select_item(row_id)
+            rows = self.selected_rows()
             self.menu.delete(0, tk.END)
 
-            self.menu.add_command(label="Edit Radio", command=self.edit_selected_radio)
-            self.menu.add_command(label="Delete Radio", command=self.delete_selected_radio)
-
-            values = self.tree.item(row_id, "values")
-            current_status = str(values[7]).lower()
-
-            if current_status == "in service":
-                self.menu.add_command(label="Take Out of Service", command=self.take_out_of_service)
+            if len(rows) == 1:
+                self.menu.add_command(label="Edit Radio", command=self.edit_selected_radio)
+                self.menu.add_command(label="Delete Radio", command=self.delete_selected_radio)
+                self.menu.add_command(label="View History", command=self.open_radio_history)
             else:
+                self.menu.add_command(label=f"Delete {len(rows)} Radios", command=self.delete_selected_radio)
+
+            statuses = {str(values[7]).lower() for values in rows}
+            if statuses != {"in service"}:
                 self.menu.add_command(label="Put Into Service", command=self.put_radio_in_service)
+            if "in service" in statuses:
+                self.menu.add_command(label="Take Out of Service", command=self.take_out_of_service)
 
             # Add Missing toggle
-            missing_status = str(values[8]).strip().lower()
-            if missing_status == "yes":
+            if all(str(values[8]).strip().lower() == "yes" for values in rows):
                 self.menu.add_command(label="Mark as Found", command=self.toggle_missing_status)
             else:
                 self.menu.add_command(label="Mark as Missing", command=self.toggle_missing_status)
 
+            self.menu.add_command(label="Move to Department...", command=self.reassign_selected_radios)
+
             self.menu.post(event.x_root, event.y_root)
 
     def open_departments(self):
+        from ui.department_manager import DepartmentManager
         win = DepartmentManager(self.root)
         self.root.wait_window(win)
-        self.load_data()
 
     def open_services(self):
-        selected = self.tree.selection()
-        if not selected:
+        rows = self.selected_rows()
+        if not rows:
             messagebox.showwarning("No Selection", "Please select a radio from the list first.")
             return
 
-        item = self.tree.item(selected[0])
-        values = item["values"]
-        radio_id = values[0]
-        serial = values[1]
+        radio_id, serial = rows[0].id, rows[0].serial
 
+        from ui.service_manager import ServiceManager
         win = ServiceManager(self.root, radio_id, serial)
         self.root.wait_window(win)
-        self.load_data()
 
     def open_all_services_viewer(self):
+        from ui.all_services_viewer import AllServicesViewer
         win = AllServicesViewer(self.root)
         self.root.wait_window(win)
 
+    def open_radio_history(self):
+        rows = self.selected_rows()
+        if not rows:
+            messagebox.showwarning("No Selection", "Please select a radio from the list first.")
+            return
+
+        from ui.history_viewer import HistoryViewer
+        win = HistoryViewer(self.root, rows[0].id, rows[0].serial)
+        self.root.wait_window(win)
+
+    def open_audit_history(self):
+        from ui.history_viewer import HistoryViewer
+        win = HistoryViewer(self.root)
+        self.root.wait_window(win)
+
     def open_reports(self):
+        from ui.reports_window import ReportsWindow
         win = ReportsWindow(self.root)
         self.root.wait_window(win)
 
+    def open_import(self):
+        from ui.import_window import ImportWindow
+        win = ImportWindow(self.root)
+        self.root.wait_window(win)
+
+def report_first_paint(root, path):
+    root.update()
+    with open(path, "w") as f:
+        f.write(f"first-paint {time.perf_counter() - STARTED:.4f}\n")
+    root.destroy()
+
 if __name__ == '__main__':
+    import configparser
+    import multiprocessing
+    multiprocessing.freeze_support()
     root = tk.Tk()
-    app = RadioInventoryApp(root)
-    root.mainloop()
+    try:
+        settings = config.apply(config.load())
+    except (ValueError, OSError, configparser.Error) as e:
+        messagebox.showerror("Configuration", f"Could not read {config.CONFIG_FILE}:\n{e}")
+        raise SystemExit(1)
+    app = RadioInventoryApp(root, settings)
+    if os.environ.get(STARTUP_PROBE_ENV):
+        root.after_idle(report_first_paint, root, os.environ[STARTUP_PROBE_ENV])
+    try:
+        root.mainloop()
+    finally:
+        app.runner.shutdown()
+        close_pool()
+        if settings.mode == config.READWRITE:
+            # With this desk's connections closed, the checkpoint can
+            # truncate the WAL unless another desk is mid-read
+            run_maintenance("exit", busy_timeout=EXIT_BUSY_TIMEOUT)
+            close_pool()
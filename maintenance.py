@@ -0,0 +1,277 @@
+import argparse
+import datetime
+import os
+import time
+from collections import namedtuple
+
+import config
+import database
+from database import get_connection, init_db
+
+# Audit rows older than this move out of radios.db into the archive file
+AUDIT_RETENTION_DAYS = 365
+# Rows moved per transaction; each batch holds the write lock only briefly
+ARCHIVE_BATCH_SIZE = 500
+# Pause between batches so dispatch desks get the write lock in between
+ARCHIVE_PAUSE = 0.02
+# Rows ANALYZE samples per index; keeps it to tens of ms on a large fleet
+ANALYSIS_LIMIT = 400
+# Free pages handed back to the filesystem per run (4 KB pages: 8 MB), so a
+# run at shutdown never turns into a long rewrite of the file
+VACUUM_PAGES = 2048
+# A maintenance log past this size is moved to <log>.1 before appending
+MAX_LOG_BYTES = 1024 * 1024
+
+ARCHIVE_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS archive.radio_changes (
+        id INTEGER PRIMARY KEY,
+        radio_id INTEGER,
+        change_type TEXT,
+        field_changed TEXT,
+        old_value TEXT,
+        new_value TEXT,
+        timestamp TEXT,
+        merged_rows INTEGER NOT NULL DEFAULT 1
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS archive.idx_radio_changes_radio ON radio_changes(radio_id, timestamp)",
+]
+
+# The oldest rows past the cutoff, in index order; archived rows are deleted,
+# so each batch simply takes the oldest that are left
+SELECT_BATCH = """
+    INSERT INTO temp.archive_batch (id)
+    SELECT id FROM radio_changes
+    WHERE COALESCE(timestamp, '') < ?
+    ORDER BY COALESCE(timestamp, ''), id
+    LIMIT ?
+"""
+
+# When collapsing, pull in the rest of every save the batch touched, so one
+# form save is never split across two batches
+COMPLETE_GROUPS = """
+    INSERT OR IGNORE INTO temp.archive_batch (id)
+    SELECT c.id FROM (
+        SELECT DISTINCT radio_id, COALESCE(timestamp, '') AS ts FROM radio_changes
+        WHERE id IN (SELECT id FROM temp.archive_batch) AND change_type = 'EDIT'
+    ) g
+    JOIN radio_changes c ON c.radio_id = g.radio_id AND COALESCE(c.timestamp, '') = g.ts
+    WHERE c.change_type = 'EDIT'
+"""
+
+# INSERT OR REPLACE keeps a batch re-run after a crash from duplicating rows:
+# the main and archive files don't commit as one atomic unit under WAL
+COPY_ROWS = """
+    INSERT OR REPLACE INTO archive.radio_changes
+        (id, radio_id, change_type, field_changed, old_value, new_value, timestamp)
+    SELECT id, radio_id, change_type, field_changed, old_value, new_value, timestamp
+    FROM radio_changes WHERE id IN (SELECT id FROM temp.archive_batch)
+"""
+
+# The fields one form save changed (same radio, same second) become a single
+# row whose old and new values are JSON objects keyed by field
+COPY_COLLAPSED = """
+    INSERT OR REPLACE INTO archive.radio_changes
+        (id, radio_id, change_type, field_changed, old_value, new_value, timestamp, merged_rows)
+    SELECT MIN(id), radio_id, change_type,
+           group_concat(field_changed, ','),
+           CASE WHEN COUNT(*) > 1 THEN json_group_object(field_changed, old_value) ELSE MIN(old_value) END,
+           CASE WHEN COUNT(*) > 1 THEN json_group_object(field_changed, new_value) ELSE MIN(new_value) END,
+           timestamp, COUNT(*)
+    FROM (SELECT * FROM radio_changes WHERE id IN (SELECT id FROM temp.archive_batch) ORDER BY id)
+    GROUP BY radio_id, timestamp, CASE WHEN change_type = 'EDIT' THEN '' ELSE id END
+"""
+
+
+# One maintenance step: how long it took and what it measured before and
+# after (WAL bytes, statistics rows, free pages)
+MaintenanceStep = namedtuple("MaintenanceStep", ["name", "seconds", "before", "after", "unit"])
+
+
+class ArchiveResult:
+    def __init__(self, cutoff, archive_path):
+        self.cutoff = cutoff
+        self.archive_path = archive_path
+        self.moved = 0
+        self.written = 0
+        self.batches = 0
+        self.seconds = 0.0
+
+
+def archive_path_for(db_file=None):
+    # radios.db -> radios-archive.db, next to it
+    root, ext = os.path.splitext(os.path.abspath(db_file or database.DB_FILE))
+    return f"{root}-archive{ext or '.db'}"
+
+
+def audit_cutoff(days=AUDIT_RETENTION_DAYS, now=None):
+    # radio_changes.timestamp defaults to CURRENT_TIMESTAMP, which is UTC
+    now = now or datetime.datetime.now(datetime.UTC)
+    return (now - datetime.timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def archive_audit(days=AUDIT_RETENTION_DAYS, archive_path=None, collapse=False,
+                  batch_size=ARCHIVE_BATCH_SIZE, pause=ARCHIVE_PAUSE, cutoff=None, progress=None):
+    # Moves radio_changes rows older than `days` into the archive database,
+    # one short transaction per batch. Safe to stop and re-run at any point.
+    init_db()
+    result = ArchiveResult(cutoff or audit_cutoff(days), archive_path or archive_path_for())
+    started = time.perf_counter()
+
+    # A connection of its own: ATTACH must not leak into the shared pool
+    conn = get_connection()
+    try:
+        conn.execute("ATTACH DATABASE ? AS archive", (result.archive_path,))
+        with conn:
+            for statement in ARCHIVE_SCHEMA:
+                conn.execute(statement)
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS archive_batch (id INTEGER PRIMARY KEY)")
+
+        while True:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("DELETE FROM temp.archive_batch")
+                conn.execute(SELECT_BATCH, (result.cutoff, batch_size))
+                if collapse:
+                    conn.execute(COMPLETE_GROUPS)
+                count = conn.execute("SELECT COUNT(*) FROM temp.archive_batch").fetchone()[0]
+                if not count:
+                    conn.rollback()
+                    break
+                written = conn.execute(COPY_COLLAPSED if collapse else COPY_ROWS).rowcount
+                conn.execute("DELETE FROM radio_changes WHERE id IN (SELECT id FROM temp.archive_batch)")
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+
+            result.moved += count
+            result.written += written
+            result.batches += 1
+            if progress:
+                progress(result.moved)
+            if pause:
+                time.sleep(pause)
+
+        conn.execute("DETACH DATABASE archive")
+    finally:
+        conn.close()
+
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+def _wal_bytes():
+    wal = os.path.abspath(database.DB_FILE) + "-wal"
+    return os.path.getsize(wal) if os.path.exists(wal) else 0
+
+
+def _stat_rows(conn):
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone():
+        return 0
+    return conn.execute("SELECT COUNT(*) FROM sqlite_stat1").fetchone()[0]
+
+
+def _step(steps, name, unit, measure, work):
+    before = measure()
+    started = time.perf_counter()
+    work()
+    steps.append(MaintenanceStep(name, time.perf_counter() - started, before, measure(), unit))
+
+
+def run_maintenance(vacuum_pages=VACUUM_PAGES, analysis_limit=ANALYSIS_LIMIT, convert=False, busy_timeout=None):
+    # Refreshes planner statistics, returns free pages to the filesystem and
+    # checkpoints the WAL back to zero bytes. Each step is short; run it when
+    # the app is idle or closing. Returns a MaintenanceStep per step.
+    # `busy_timeout` (seconds) caps the wait for other desks' locks.
+    init_db()
+    steps = []
+    conn = get_connection()
+    try:
+        if busy_timeout is not None:
+            conn.execute(f"PRAGMA busy_timeout={int(busy_timeout * 1000)}")
+        # PRAGMA optimize in this SQLite only looks at tables the connection
+        # itself has queried, so a bounded ANALYZE stands in for it
+        conn.execute(f"PRAGMA analysis_limit={int(analysis_limit)}")
+        _step(steps, "analyze", "statistics rows", lambda: _stat_rows(conn), lambda: conn.execute("ANALYZE"))
+
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+            _step(steps, "incremental_vacuum", "free pages",
+                  lambda: conn.execute("PRAGMA freelist_count").fetchone()[0],
+                  # executescript steps the pragma to the end; execute() would
+                  # free a single page
+                  lambda: conn.executescript(f"PRAGMA incremental_vacuum({int(vacuum_pages)});"))
+        elif convert:
+            # Databases created before incremental vacuum: one full rebuild,
+            # holding the write lock throughout. Only on request.
+            _step(steps, "vacuum (now incremental)", "bytes", lambda: os.path.getsize(database.DB_FILE),
+                  lambda: conn.executescript("PRAGMA auto_vacuum = INCREMENTAL; VACUUM;"))
+
+        # After the other steps, so their writes are folded in too. TRUNCATE
+        # waits out the busy timeout for readers, then leaves what it can't
+        # copy yet for the next run.
+        _step(steps, "wal_checkpoint(TRUNCATE)", "WAL bytes", _wal_bytes,
+              lambda: conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone())
+    finally:
+        conn.close()
+    return steps
+
+
+def format_steps(steps):
+    return [f"{step.name:<26} {step.seconds * 1000:8.1f} ms   {step.unit}: {step.before} -> {step.after}"
+            for step in steps]
+
+
+def log_steps(path, reason, steps=(), error=None):
+    # Appends one timestamped line per step, or the error, to `path`
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    if os.path.exists(path) and os.path.getsize(path) > MAX_LOG_BYTES:
+        os.replace(path, path + ".1")
+    stamp = f"{datetime.datetime.now():%Y-%m-%d %H:%M:%S} {reason}"
+    lines = [f"{stamp}: failed: {error}"] if error else [f"{stamp}: {line}" for line in format_steps(steps)]
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def _report_steps(steps):
+    for line in format_steps(steps):
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Database housekeeping for radios.db.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    archive = commands.add_parser("archive", help="Move old audit history into the archive database")
+    archive.add_argument("--days", type=int, default=AUDIT_RETENTION_DAYS,
+                         help=f"Keep this many days of history in the main database (default {AUDIT_RETENTION_DAYS})")
+    archive.add_argument("--archive", help="Archive database file (default: <database>-archive.db)")
+    archive.add_argument("--collapse", action="store_true",
+                         help="Store each multi-field edit as one row with JSON old/new values")
+    archive.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE)
+
+    optimize = commands.add_parser("optimize", help="Update statistics, reclaim free pages and checkpoint the WAL")
+    optimize.add_argument("--vacuum-pages", type=int, default=VACUUM_PAGES,
+                          help=f"Most free pages to reclaim in one run (default {VACUUM_PAGES})")
+    optimize.add_argument("--convert", action="store_true",
+                          help="Switch an older database to incremental vacuum (full VACUUM; locks the file)")
+    parser.add_argument("--db", help="Database file (default: the configured database)")
+    args = parser.parse_args(argv)
+
+    # The shared database itself, even on a terminal configured for snapshots
+    database.DB_FILE = args.db or config.load().source_path
+
+    if args.command == "archive":
+        result = archive_audit(args.days, args.archive, args.collapse, args.batch_size)
+        print(f"Moved {result.moved} audit rows older than {result.cutoff} into {result.archive_path} "
+              f"as {result.written} rows, in {result.batches} batches ({result.seconds:.1f} s)")
+        return result
+    if args.command == "optimize":
+        steps = run_maintenance(args.vacuum_pages, convert=args.convert)
+        _report_steps(steps)
+        return steps
+
+
+if __name__ == "__main__":
+    main()
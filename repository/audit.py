@@ -0,0 +1,43 @@
+from collections import namedtuple
+
+from database import connection
+from repository.sources import QuerySource
+
+Change = namedtuple("Change", [
+    "id", "radio_id", "change_type", "field_changed", "old_value", "new_value", "timestamp",
+])
+
+# Matches idx_radio_changes_radio / idx_radio_changes_recent, so both reading
+# one radio's history and browsing the whole log walk an index newest first
+HISTORY_ORDER = ("COALESCE(c.timestamp, '')", "c.id")
+
+FOR_RADIO_QUERY = f"""
+    SELECT {", ".join(f"c.{field}" for field in Change._fields)}
+    FROM radio_changes c
+    WHERE c.radio_id = ?
+    ORDER BY {", ".join(f"{expr} DESC" for expr in HISTORY_ORDER)}
+"""
+
+
+def for_radio(radio_id, limit=None):
+    # A radio's change history, newest first
+    sql, params = FOR_RADIO_QUERY, (radio_id,)
+    if limit is not None:
+        sql, params = sql + " LIMIT ?", params + (int(limit),)
+    with connection(readonly=True) as conn:
+        return [Change._make(row) for row in conn.execute(sql, params)]
+
+
+def history_source(radio_id=None):
+    # Audit rows newest first, paged by keyset: one radio's timeline, or the
+    # whole fleet's with each radio's serial (looked up only for shown rows)
+    columns = ["c.timestamp", "c.change_type", "c.field_changed", "c.old_value", "c.new_value"]
+    if radio_id is not None:
+        return QuerySource(columns, "radio_changes c", where="c.radio_id = ?", params=(radio_id,),
+                           order=HISTORY_ORDER, descending=True)
+    return QuerySource(
+        ["c.radio_id", "(SELECT serial FROM radios WHERE id = c.radio_id)"] + columns,
+        "radio_changes c",
+        order=HISTORY_ORDER,
+        descending=True,
+    )
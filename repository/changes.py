@@ -0,0 +1,34 @@
+from collections import namedtuple
+
+from database import connection, data_version
+
+# What a client needs to catch up: the new feed position, the data_version
+# token it was read under, and the ids committed since the previous position
+Changes = namedtuple("Changes", ["seq", "version", "radio_ids", "department_ids"])
+
+SEQ_QUERY = "SELECT COALESCE(MAX(seq), 0) FROM change_log"
+SINCE_QUERY = "SELECT seq, source, row_id FROM change_log WHERE seq > ? ORDER BY seq"
+
+
+def current_seq():
+    # Take this before a full load: anything committed while loading is
+    # pulled again by the next changes_since() rather than missed
+    with connection(readonly=True) as conn:
+        return conn.execute(SEQ_QUERY).fetchone()[0]
+
+
+def changes_since(seq, version=None):
+    # Ids of radios and departments changed after feed position `seq`. When
+    # `version` (a database.data_version() token from the previous call) is
+    # unchanged nothing has been committed anywhere and no query runs.
+    now = data_version()
+    if version is not None and now == version:
+        return Changes(seq, now, frozenset(), frozenset())
+
+    latest = seq
+    ids = {"radios": set(), "departments": set()}
+    with connection(readonly=True) as conn:
+        for latest, source, row_id in conn.execute(SINCE_QUERY, (seq,)):
+            if source in ids:
+                ids[source].add(row_id)
+    return Changes(latest, now, frozenset(ids["radios"]), frozenset(ids["departments"]))
@@ -0,0 +1,102 @@
+import threading
+from collections import namedtuple
+
+from database import connection, data_version, notify_changes, subscribe
+
+Department = namedtuple("Department", ["id", "name", "contact"])
+# One load of the departments table, in the shapes the windows ask for
+DepartmentSnapshot = namedtuple("DepartmentSnapshot", ["by_id", "by_name", "names", "id_to_name", "name_to_id"])
+
+ALL_QUERY = "SELECT id, name, contact FROM departments ORDER BY id"
+
+
+def _load():
+    with connection(readonly=True) as conn:
+        by_id = tuple(Department._make(row) for row in conn.execute(ALL_QUERY))
+    # Stable sort over id order matches ORDER BY name, id
+    by_name = tuple(sorted(by_id, key=lambda dept: dept.name))
+    name_to_id = {}
+    for dept in by_name:
+        name_to_id.setdefault(dept.name, dept.id)
+    return DepartmentSnapshot(
+        by_id, by_name, tuple(name_to_id), {dept.id: dept.name for dept in by_id}, name_to_id,
+    )
+
+
+class DepartmentCache:
+    # Process-wide copy of the departments table. Every read revalidates with
+    # database.data_version(), which moves when anyone commits, so changes
+    # from other workstations are picked up; department changes made here
+    # also drop the copy straight away through notify_changes().
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._version = None
+
+    def invalidate(self):
+        with self._lock:
+            self._snapshot = None
+
+    def on_changes(self, radio_ids, department_ids):
+        if department_ids:
+            self.invalidate()
+
+    def snapshot(self):
+        # The version is read before loading: a commit in between only costs
+        # one extra reload on the next read, never a stale answer
+        version = data_version()
+        with self._lock:
+            if self._snapshot is not None and self._version == version:
+                return self._snapshot
+        snapshot = _load()
+        with self._lock:
+            self._snapshot, self._version = snapshot, version
+        return snapshot
+
+
+cache = DepartmentCache()
+subscribe(cache.on_changes)
+
+
+def all_departments(by_name=False):
+    snapshot = cache.snapshot()
+    return list(snapshot.by_name if by_name else snapshot.by_id)
+
+
+def names():
+    return list(cache.snapshot().names)
+
+
+def name_for(dept_id):
+    return cache.snapshot().id_to_name.get(dept_id)
+
+
+def id_for(name):
+    return cache.snapshot().name_to_id.get(name)
+
+
+def labels(departments):
+    # "ID - Name" labels for comboboxes, mapped back to the department id
+    return {f"{dept.id} - {dept.name}": dept.id for dept in departments}
+
+
+def add_department(dept_id, name, contact):
+    with connection() as conn:
+        conn.execute("INSERT INTO departments (id, name, contact) VALUES (?, ?, ?)", (dept_id, name, contact))
+        notify_changes(department_ids=[dept_id])
+
+
+def update_department(dept_id, name, contact):
+    with connection() as conn:
+        conn.execute("UPDATE departments SET name=?, contact=? WHERE id=?", (name, contact, dept_id))
+        notify_changes(department_ids=[dept_id])
+
+
+def delete_department(dept_id):
+    with connection() as conn:
+        # The foreign key would refuse anyway; say why
+        in_use = conn.execute("SELECT COUNT(*) FROM radios WHERE department_id = ?", (dept_id,)).fetchone()[0]
+        if in_use:
+            raise ValueError(f"{in_use} radio(s) are still assigned to department {dept_id}")
+        conn.execute("DELETE FROM departments WHERE id = ?", (dept_id,))
+        notify_changes(department_ids=[dept_id])
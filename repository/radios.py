@@ -0,0 +1,181 @@
+import datetime
+from collections import namedtuple
+
+from database import connection, notify_changes, unit_of_work
+
+# Ids per statement; keeps each IN (...) list under SQLite's variable limit
+CHUNK_SIZE = 500
+
+STATUS_VALUES = ("Active", "In Service")
+MISSING_VALUES = ("Yes", "No")
+
+# One radio as held in memory by the main window. The first GRID_COLUMNS
+# fields are the grid's columns, in order; the rest are what the edit form
+# needs, so editing never has to go back to the database. A namedtuple is a
+# tuple subclass with empty __slots__: no per-row __dict__, and the grid,
+# search index and tree sync keep treating rows as plain tuples.
+RadioRow = namedtuple("RadioRow", [
+    "id", "serial", "model", "last_updated", "department_id",
+    "department", "assigned_to", "status", "missing", "notes",
+    "radio_id", "date_received", "date_issued", "date_returned",
+])
+GRID_COLUMNS = 10
+# Columns with few distinct values; rows share one string object per value
+# instead of each holding its own copy from the cursor
+SHARED_COLUMNS = frozenset(
+    RadioRow._fields.index(field) for field in (
+        "model", "last_updated", "department_id", "department", "assigned_to",
+        "status", "missing", "notes", "date_received", "date_issued", "date_returned",
+    )
+)
+
+# Fields set by the Add/Edit form and the importer
+EDITABLE_FIELDS = (
+    "radio_id", "serial", "model", "assigned_to", "notes", "department_id",
+    "date_received", "date_issued", "date_returned",
+)
+RadioRecord = namedtuple("RadioRecord", ("id",) + EDITABLE_FIELDS + ("last_updated", "status", "missing"))
+
+# Statements are module constants so each connection's statement cache
+# reuses the prepared query instead of re-parsing it
+GRID_QUERY = """
+    SELECT r.id, r.serial, r.model, r.last_updated, r.department_id,
+           d.name, r.assigned_to, r.status, r.missing, r.notes,
+           r.radio_id, r.date_received, r.date_issued, r.date_returned
+    FROM radios r
+    LEFT JOIN departments d ON r.department_id = d.id
+"""
+RECORD_QUERY = f"SELECT {', '.join(RadioRecord._fields)} FROM radios WHERE id = ?"
+INSERT_RADIO = f"""
+    INSERT INTO radios ({", ".join(EDITABLE_FIELDS)})
+    VALUES ({", ".join("?" for _ in EDITABLE_FIELDS)})
+"""
+UPDATE_RADIO = f"""
+    UPDATE radios SET {", ".join(f"{field}=?" for field in EDITABLE_FIELDS)}, last_updated=?
+    WHERE id=?
+"""
+
+
+def _chunks(ids, size=CHUNK_SIZE):
+    ids = [int(radio_id) for radio_id in ids]
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def _compact(rows, shared):
+    make = RadioRow._make
+    for row in rows:
+        yield make([shared.setdefault(value, value) if i in SHARED_COLUMNS else value
+                    for i, value in enumerate(row)])
+
+
+def grid_rows():
+    with connection(readonly=True) as conn:
+        return list(_compact(conn.execute(GRID_QUERY), {}))
+
+
+def grid_rows_for(radio_ids, department_ids=()):
+    # Rows for the given radios plus every radio in the given departments;
+    # ids with no row left have been deleted.
+    radio_ids = set(radio_ids)
+    with connection(readonly=True) as conn:
+        if department_ids:
+            placeholders = ", ".join("?" for _ in department_ids)
+            cursor = conn.execute(
+                f"SELECT id FROM radios WHERE department_id IN ({placeholders})", tuple(department_ids)
+            )
+            radio_ids |= {row[0] for row in cursor.fetchall()}
+        found = {}
+        for chunk in _chunks(radio_ids):
+            placeholders = ", ".join("?" for _ in chunk)
+            for row in _compact(conn.execute(f"{GRID_QUERY} WHERE r.id IN ({placeholders})", chunk), {}):
+                found[row.id] = row
+        return radio_ids, found
+
+
+def get_radio(radio_id):
+    with connection(readonly=True) as conn:
+        row = conn.execute(RECORD_QUERY, (radio_id,)).fetchone()
+    return RadioRecord._make(row) if row else None
+
+
+def _form_values(values):
+    # No department is stored as NULL: the foreign key rejects ''
+    return [values.get(field) or None if field == "department_id" else values.get(field, "")
+            for field in EDITABLE_FIELDS]
+
+
+def add_radio(values):
+    # values: {field: value} for EDITABLE_FIELDS; returns the new id
+    params = tuple(_form_values(values))
+    with unit_of_work() as (conn, audit):
+        new_id = conn.execute(INSERT_RADIO, params).lastrowid
+        summary = ", ".join(str(values.get(field, "")) for field in ("radio_id", "serial", "model", "assigned_to", "notes"))
+        audit.record(new_id, "ADD", "ALL", "", summary)
+        notify_changes(radio_ids=[new_id])
+    return new_id
+
+
+def update_radio(radio_id, values):
+    # Saves the form's fields and audits each one that changed
+    last_updated = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    with unit_of_work() as (conn, audit):
+        old = conn.execute(RECORD_QUERY, (radio_id,)).fetchone()
+        if old is None:
+            raise LookupError(f"Radio {radio_id} no longer exists")
+        old = RadioRecord._make(old)
+        new_values = _form_values(values)
+        for field, new_val in zip(EDITABLE_FIELDS, new_values):
+            old_val = getattr(old, field)
+            if str(old_val) != str(new_val):
+                audit.record(radio_id, "EDIT", field, old_val, new_val)
+        conn.execute(UPDATE_RADIO, (*new_values, last_updated, radio_id))
+        notify_changes(radio_ids=[radio_id])
+
+
+def _set_field(ids, column, change_type, value, defer_audit=False):
+    # One UPDATE per chunk for every radio whose value actually changes, with
+    # the matching audit rows written in the same transaction (or, with
+    # defer_audit, by the background audit writer right after it).
+    changed = []
+    with unit_of_work(defer_audit=defer_audit) as (conn, audit):
+        for chunk in _chunks(ids):
+            placeholders = ", ".join("?" for _ in chunk)
+            where = f"id IN ({placeholders}) AND {column} IS NOT ?"
+            rows = conn.execute(f"SELECT id, {column} FROM radios WHERE {where}", (*chunk, value)).fetchall()
+            if not rows:
+                continue
+            conn.execute(f"UPDATE radios SET {column} = ? WHERE {where}", (value, *chunk, value))
+            audit.record_many((radio_id, change_type, column, old, value) for radio_id, old in rows)
+            changed.extend(radio_id for radio_id, _ in rows)
+        notify_changes(radio_ids=changed)
+    return changed
+
+
+def set_status(ids, status, defer_audit=False):
+    if status not in STATUS_VALUES:
+        raise ValueError(f"Unknown status '{status}'")
+    return _set_field(ids, "status", "STATUS", status, defer_audit)
+
+
+def set_missing(ids, missing, defer_audit=False):
+    if missing not in MISSING_VALUES:
+        raise ValueError(f"Missing must be one of {', '.join(MISSING_VALUES)}")
+    return _set_field(ids, "missing", "MISSING", missing, defer_audit)
+
+
+def reassign_department(ids, department_id, defer_audit=False):
+    return _set_field(ids, "department_id", "EDIT", department_id, defer_audit)
+
+
+def delete_radios(ids, defer_audit=False):
+    deleted = []
+    with unit_of_work(defer_audit=defer_audit) as (conn, audit):
+        for chunk in _chunks(ids):
+            placeholders = ", ".join("?" for _ in chunk)
+            rows = conn.execute(f"SELECT id, serial FROM radios WHERE id IN ({placeholders})", chunk).fetchall()
+            conn.execute(f"DELETE FROM radios WHERE id IN ({placeholders})", chunk)
+            audit.record_many((radio_id, "DELETE", "ALL", serial, "") for radio_id, serial in rows)
+            deleted.extend(radio_id for radio_id, _ in rows)
+        notify_changes(radio_ids=deleted)
+    return deleted
@@ -0,0 +1,210 @@
+from repository.sources import QuerySource
+
+REPORT_TITLE = "GOLDEN NUGGET LAKE CHARLES"
+PDF_ROWS_PER_PAGE = 28
+PDF_MARGIN = 36
+PDF_FONT_SIZE = 8
+
+REPORT_TYPES = (
+    "Fleet Summary", "All Radios", "Radios by Department", "Radios in Service", "Disabled Radios", "Missing Radios",
+)
+
+# Reads the trigger-maintained department_summary counters (database.py),
+# one row per department plus a total, so it costs the same at any fleet size
+FLEET_SUMMARY_TABLE = """(
+    SELECT 0 AS grp, COALESCE(d.name, NULLIF(s.department_id, ''), '(No department)') AS department,
+           s.department_id AS dept_key, s.radios, s.active, s.in_service, s.missing,
+           s.open_services, s.services, s.repair_spend
+    FROM department_summary s
+    LEFT JOIN departments d ON d.id = s.department_id
+    WHERE s.radios > 0 OR s.services > 0
+    UNION ALL
+    SELECT 1, 'All Departments', '', TOTAL(radios), TOTAL(active), TOTAL(in_service), TOTAL(missing),
+           TOTAL(open_services), TOTAL(services), TOTAL(repair_spend)
+    FROM department_summary
+) summary"""
+
+
+def report_source(report, department=None):
+    # (column headings, QuerySource) for one of REPORT_TYPES
+    radios_with_dept = "radios r LEFT JOIN departments d ON r.department_id = d.id"
+    summary_columns = ["r.id", "r.serial", "r.model", "d.name", "r.assigned_to"]
+    summary_headings = ["ID", "Serial", "Model", "Department", "Assigned"]
+
+    if report == "Fleet Summary":
+        return [
+            "Department", "Radios", "Active", "In Service", "Missing", "Open Services", "Total Services",
+            "Repair Spend",
+        ], QuerySource([
+            "department", "CAST(radios AS INTEGER)", "CAST(active AS INTEGER)", "CAST(in_service AS INTEGER)",
+            "CAST(missing AS INTEGER)", "CAST(open_services AS INTEGER)", "CAST(services AS INTEGER)",
+            "printf('%.2f', repair_spend)",
+        ], FLEET_SUMMARY_TABLE, order=("grp", "department", "dept_key"))
+
+    if report == "All Radios":
+        return [
+            "Radio ID", "Serial", "Model", "Department", "Assigned To", "Notes",
+            "Date Received", "Date Issued", "Date Returned", "In Service"
+        ], QuerySource([
+            "r.radio_id", "r.serial", "r.model", "d.name", "r.assigned_to", "r.notes",
+            "r.date_received", "r.date_issued", "r.date_returned",
+            "CASE WHEN r.status = 'Active' THEN 'Yes' ELSE 'No' END"
+        ], radios_with_dept, order=("r.id",))
+
+    if report == "Radios by Department":
+        return ["ID", "Serial", "Model", "Assigned", "Status", "Missing", "Notes"], QuerySource(
+            ["r.id", "r.serial", "r.model", "r.assigned_to", "r.status", "r.missing", "r.notes"],
+            "radios r JOIN departments d ON r.department_id = d.id",
+            where="d.name = ?", params=(department,), order=("r.id",)
+        )
+
+    if report == "Radios in Service":
+        return summary_headings, QuerySource(summary_columns, radios_with_dept, where="r.status = 'In Service'", order=("r.id",))
+
+    if report == "Disabled Radios":
+        return summary_headings, QuerySource(summary_columns, radios_with_dept, where="r.status = 0", order=("r.id",))
+
+    if report == "Missing Radios":
+        return summary_headings, QuerySource(summary_columns, radios_with_dept, where="r.missing = 'Yes'", order=("r.id",))
+
+    raise ValueError(f"Unknown report '{report}'")
+
+
+def _report_styles():
+    from openpyxl.styles import Alignment, Border, Font, NamedStyle, PatternFill, Side
+    align = Alignment(horizontal="center", vertical="center", wrap_text=True)
+    border = Border(left=Side(style='thin'), right=Side(style='thin'),
+                    top=Side(style='thin'), bottom=Side(style='thin'))
+    centered = Alignment(horizontal="center", vertical="center")
+    return [
+        NamedStyle(name="report_title", font=Font(size=14, bold=True), alignment=centered),
+        NamedStyle(name="report_subtitle", font=Font(size=12), alignment=centered),
+        NamedStyle(name="report_header", font=Font(bold=True, color="FFFFFF"),
+                   fill=PatternFill("solid", fgColor="305496"), alignment=align, border=border),
+        NamedStyle(name="report_cell", alignment=align, border=border),
+    ]
+
+
+def write_excel_report(path, headers, subtitle, source, progress=None):
+    # Streams the report straight from the source's cursor into a write-only
+    # sheet, so memory stays flat however many rows there are. Write-only
+    # sheets emit column widths before any row, so widths come from a
+    # MAX(LENGTH()) pass in SQLite rather than from a second walk of the sheet.
+    # openpyxl is imported here rather than at module level so opening the
+    # app (or the Reports window) doesn't pay for it until an export runs.
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.utils import get_column_letter
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Radio Report")
+    for style in _report_styles():
+        wb.add_named_style(style)
+
+    def styled(value, style):
+        cell = WriteOnlyCell(ws, value=value)
+        cell.style = style
+        return cell
+
+    lengths = source.max_lengths() or [0] * len(headers)
+    for col_index, header in enumerate(headers, start=1):
+        max_length = max(len(header), lengths[col_index - 1] if col_index <= len(lengths) else 0) or 10
+        ws.column_dimensions[get_column_letter(col_index)].width = min(max_length + 4, 50)
+
+    last_column = get_column_letter(len(headers))
+    ws.merged_cells.add(f"A1:{last_column}1")
+    ws.merged_cells.add(f"A2:{last_column}2")
+
+    ws.append([styled(REPORT_TITLE, "report_title")])
+    ws.append([styled(subtitle, "report_subtitle")])
+    ws.append([])
+    ws.append([styled(header, "report_header") for header in headers])
+
+    for count, row_data in enumerate(source.iter_rows(), start=1):
+        ws.append([styled(value, "report_cell") for value in row_data])
+        if progress and count % 1000 == 0:
+            progress(count)
+
+    wb.save(path)
+    return path
+
+
+def _pdf_column_widths(headers, lengths, available):
+    # Share the page width in proportion to each column's longest value,
+    # within sensible bounds
+    weights = []
+    for i, header in enumerate(headers):
+        length = lengths[i] if i < len(lengths) else 0
+        weights.append(min(max(length, len(header), 6), 40))
+    total = sum(weights)
+    return [available * weight / total for weight in weights]
+
+
+def _pdf_cell(value, width):
+    text = "" if value is None else str(value)
+    max_chars = max(3, int(width / (PDF_FONT_SIZE * 0.5)))
+    if len(text) > max_chars:
+        text = text[:max_chars - 3] + "..."
+    return text
+
+
+def write_pdf_report(path, headers, subtitle, source, rows_per_page=PDF_ROWS_PER_PAGE):
+    # Draws one fixed-size table per page straight onto the canvas instead of
+    # building a single Table flowable for the whole report, whose layout cost
+    # grows much faster than the row count. Only one page of rows is in
+    # memory at a time.
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import landscape, letter
+    from reportlab.pdfgen import canvas
+    from reportlab.platypus import Table, TableStyle
+
+    page_width, page_height = landscape(letter)
+    available = page_width - 2 * PDF_MARGIN
+    widths = _pdf_column_widths(headers, source.max_lengths(), available)
+    total_pages = max(1, -(-source.count() // rows_per_page))
+
+    style = TableStyle([
+        ("FONT", (0, 0), (-1, -1), "Helvetica", PDF_FONT_SIZE),
+        ("FONT", (0, 0), (-1, 0), "Helvetica-Bold", PDF_FONT_SIZE),
+        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#305496")),
+        ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+        ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.HexColor("#f8f8f8"), colors.HexColor("#e6f2ff")]),
+        ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
+        ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+    ])
+
+    pdf = canvas.Canvas(path, pagesize=(page_width, page_height))
+    pdf.setTitle(f"{REPORT_TITLE} - {subtitle}")
+
+    def draw_page(page_number, chunk):
+        top = page_height - PDF_MARGIN
+        pdf.setFont("Helvetica-Bold", 14)
+        pdf.drawCentredString(page_width / 2, top - 14, REPORT_TITLE)
+        pdf.setFont("Helvetica", 11)
+        pdf.drawCentredString(page_width / 2, top - 32, subtitle)
+
+        data = [list(headers)] + [
+            [_pdf_cell(value, widths[i]) for i, value in enumerate(row)] for row in chunk
+        ]
+        table = Table(data, colWidths=widths, repeatRows=1)
+        table.setStyle(style)
+        _, height = table.wrapOn(pdf, available, page_height)
+        table.drawOn(pdf, PDF_MARGIN, top - 48 - height)
+
+        pdf.setFont("Helvetica", 8)
+        pdf.drawRightString(page_width - PDF_MARGIN, PDF_MARGIN / 2, f"Page {page_number} of {total_pages}")
+        pdf.showPage()
+
+    page_number, chunk = 0, []
+    for row in source.iter_rows():
+        chunk.append(row)
+        if len(chunk) == rows_per_page:
+            page_number += 1
+            draw_page(page_number, chunk)
+            chunk = []
+    if chunk or page_number == 0:
+        draw_page(page_number + 1, chunk)
+
+    pdf.save()
+    return path
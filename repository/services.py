@@ -0,0 +1,67 @@
+from collections import namedtuple
+
+from database import connection, notify_changes
+from repository.sources import QuerySource
+
+Service = namedtuple("Service", [
+    "id", "status", "date_service", "lrc_service_num", "date_sent",
+    "date_repaired", "amount", "problem", "notes",
+])
+
+FOR_RADIO_QUERY = f"""
+    SELECT {", ".join(Service._fields)}
+    FROM services
+    WHERE radio_id=?
+    ORDER BY date_service DESC
+"""
+INSERT_SERVICE = """
+    INSERT INTO services (radio_id, status, date_service, lrc_service_num,
+                          date_sent, problem, notes, amount)
+    VALUES (?, 'open', DATE('now'), ?, ?, ?, ?, ?)
+"""
+CLOSE_SERVICE = """
+    UPDATE services
+    SET status='closed', date_repaired=DATE('now')
+    WHERE id=?
+"""
+
+
+def for_radio(radio_id):
+    with connection(readonly=True) as conn:
+        return [Service._make(row) for row in conn.execute(FOR_RADIO_QUERY, (radio_id,))]
+
+
+# The main grid's full-text search matches service text, so a service change
+# is a change to its radio
+def add_service(radio_id, lrc_service_num, date_sent, problem, notes, amount):
+    with connection() as conn:
+        service_id = conn.execute(
+            INSERT_SERVICE, (radio_id, lrc_service_num, date_sent, problem, notes, amount)
+        ).lastrowid
+        notify_changes(radio_ids=[radio_id])
+    return service_id
+
+
+def close_service(service_id):
+    with connection() as conn:
+        row = conn.execute("SELECT radio_id FROM services WHERE id = ?", (service_id,)).fetchone()
+        conn.execute(CLOSE_SERVICE, (service_id,))
+        if row and row[0] is not None:
+            notify_changes(radio_ids=[row[0]])
+
+
+def history_source(status="all"):
+    # Every service record, newest first; status "open" or "closed" narrows it
+    where, params = None, ()
+    if status in ("open", "closed"):
+        where, params = "s.status = ?", (status,)
+
+    return QuerySource(
+        ["s.id", "r.serial", "s.status", "s.date_service", "s.lrc_service_num",
+         "s.date_sent", "s.date_repaired", "s.amount", "s.problem", "s.notes"],
+        "services s LEFT JOIN radios r ON s.radio_id = r.id",
+        where=where,
+        params=params,
+        order=("COALESCE(s.date_service, '')", "s.id"),
+        descending=True,
+    )
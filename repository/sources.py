@@ -0,0 +1,211 @@
+import threading
+from collections import OrderedDict
+
+from database import connection
+
+PAGE_SIZE = 200
+MAX_CACHED_PAGES = 8
+
+
+class ListSource:
+    # Rows already held in memory (e.g. the main grid's search results)
+    def __init__(self, rows, key=lambda row: row[0]):
+        self.rows = rows
+        self.key = key
+
+    def count(self):
+        return len(self.rows)
+
+    def fetch(self, start, limit):
+        return [(self.key(row), row) for row in self.rows[start:start + limit]]
+
+    # Everything is in memory: nothing is ever waiting to be fetched
+    cached = fetch
+
+    def keys(self, start, limit):
+        return [self.key(row) for row in self.rows[start:start + limit]]
+
+    def iter_rows(self):
+        return iter(self.rows)
+
+    def max_lengths(self):
+        widths = []
+        for row in self.rows:
+            for i, value in enumerate(row):
+                length = len(str(value)) if value is not None else 0
+                if i == len(widths):
+                    widths.append(length)
+                elif length > widths[i]:
+                    widths[i] = length
+        return widths
+
+    def present(self, keys):
+        # Which of `keys` (as shown in the tree: strings) the list holds
+        held = {str(self.key(row)) for row in self.rows}
+        return {key for key in keys if key in held}
+
+    def invalidate(self):
+        pass
+
+    def prefetch(self):
+        return self
+
+
+class QuerySource:
+    # Pages through a SELECT with keyset pagination. `order` must identify a
+    # row uniquely (end it with a primary key) and must not contain NULLs;
+    # wrap nullable columns in COALESCE. Sequential scrolling continues from
+    # the neighbouring cached page's boundary key; only a jump to an uncached
+    # part of the list falls back to OFFSET. Pages are fetched on worker
+    # threads while the Tk thread reads what is cached, hence the lock.
+    def __init__(self, columns, tables, where=None, params=(), order=("id",), descending=False):
+        self.columns = list(columns)
+        self.tables = tables
+        self.where = where
+        self.params = tuple(params)
+        self.order = list(order)
+        self.descending = descending
+        self._count = None
+        self._pages = OrderedDict()
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        with self._lock:
+            self._count = None
+            self._pages.clear()
+
+    def present(self, keys):
+        # Telling would take a query per key; a replaced database-backed
+        # list simply starts with nothing selected
+        return set()
+
+    def __getstate__(self):
+        # Sent to export processes without the page cache
+        state = self.__dict__.copy()
+        state["_pages"] = OrderedDict()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def prefetch(self):
+        # Warm the count and first page; safe to call from a worker thread
+        # before handing the source to set_source() on the Tk thread.
+        self.count()
+        self._page(0)
+        return self
+
+    def _sql(self, boundary=None, backward=False, keys_only=False):
+        conditions = [f"({self.where})"] if self.where else []
+        descending = self.descending != backward
+        if boundary is not None:
+            op = "<" if descending else ">"
+            placeholders = ", ".join("?" for _ in self.order)
+            # SQLite won't seek an index on a row-value comparison against
+            # expressions; bounding the first column as well lets it start
+            # at the boundary instead of scanning every row before it
+            if len(self.order) > 1:
+                conditions.append(f"{self.order[0]} {op}= ?")
+            conditions.append(f"({', '.join(self.order)}) {op} ({placeholders})")
+
+        direction = "DESC" if descending else "ASC"
+        selected = self.order if keys_only else self.columns + self.order
+        sql = f"SELECT {', '.join(selected)} FROM {self.tables}"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY " + ", ".join(f"{expr} {direction}" for expr in self.order)
+        return sql
+
+    def _boundary(self, key):
+        # Parameters for _sql(boundary=True): the first column's bound, then the full key
+        return key[:1] + key if len(self.order) > 1 else key
+
+    def _run(self, sql, params):
+        split = len(self.columns)
+        with connection(readonly=True) as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [(tuple(row[split:]), tuple(row[:split])) for row in rows]
+
+    def count(self):
+        if self._count is None:
+            sql = f"SELECT COUNT(*) FROM {self.tables}"
+            if self.where:
+                sql += f" WHERE {self.where}"
+            with connection(readonly=True) as conn:
+                self._count = conn.execute(sql, self.params).fetchone()[0]
+        return self._count
+
+    def _page(self, number):
+        with self._lock:
+            if number in self._pages:
+                self._pages.move_to_end(number)
+                return self._pages[number]
+            previous = self._pages.get(number - 1)
+            following = self._pages.get(number + 1)
+
+        if previous and len(previous) == PAGE_SIZE:
+            params = self.params + self._boundary(previous[-1][0]) + (PAGE_SIZE,)
+            page = self._run(self._sql(boundary=True) + " LIMIT ?", params)
+        elif following:
+            params = self.params + self._boundary(following[0][0]) + (PAGE_SIZE,)
+            page = self._run(self._sql(boundary=True, backward=True) + " LIMIT ?", params)
+            page.reverse()
+        else:
+            params = self.params + (PAGE_SIZE, number * PAGE_SIZE)
+            page = self._run(self._sql() + " LIMIT ? OFFSET ?", params)
+
+        with self._lock:
+            self._pages[number] = page
+            while len(self._pages) > MAX_CACHED_PAGES:
+                self._pages.popitem(last=False)
+        return page
+
+    def fetch(self, start, limit):
+        items = []
+        if limit <= 0:
+            return items
+        first, last = start // PAGE_SIZE, (start + limit - 1) // PAGE_SIZE
+        for number in range(first, last + 1):
+            items.extend(self._page(number))
+        offset = start - first * PAGE_SIZE
+        return items[offset:offset + limit]
+
+    def cached(self, start, limit):
+        # Like fetch(), but only from pages already cached, with None for rows
+        # on the others. Never queries, so the Tk thread can render from it
+        # while a worker fetches the rest.
+        items = []
+        if limit <= 0:
+            return items
+        first, last = start // PAGE_SIZE, (start + limit - 1) // PAGE_SIZE
+        with self._lock:
+            for number in range(first, last + 1):
+                page = self._pages.get(number)
+                items.extend(page if page is not None else [None] * PAGE_SIZE)
+        offset = start - first * PAGE_SIZE
+        return items[offset:offset + limit]
+
+    def keys(self, start, limit):
+        # Just the keys of rows start..start+limit, for selecting a range
+        # without pulling (or caching) every column
+        with connection(readonly=True) as conn:
+            rows = conn.execute(self._sql(keys_only=True) + " LIMIT ? OFFSET ?", self.params + (limit, start))
+            return [tuple(row) for row in rows]
+
+    def max_lengths(self):
+        # Longest rendered value per column, computed by SQLite without
+        # pulling the rows into Python
+        lengths = ", ".join(f"MAX(LENGTH(CAST({expr} AS TEXT)))" for expr in self.columns)
+        sql = f"SELECT {lengths} FROM {self.tables}"
+        if self.where:
+            sql += f" WHERE {self.where}"
+        with connection(readonly=True) as conn:
+            row = conn.execute(sql, self.params).fetchone()
+        return [value or 0 for value in row]
+
+    def iter_rows(self):
+        with connection(readonly=True) as conn:
+            for row in conn.execute(self._sql(), self.params):
+                yield tuple(row[:len(self.columns)])
@@ -0,0 +1,190 @@
+from collections import defaultdict
+
+# Column positions in the main grid rows loaded by RadioInventoryApp.load_data.
+# The id, Last Updated, Dept ID, Status and Missing columns aren't in the
+# database's full-text index (radio_search); ranked() matches terms against
+# them here.
+ID_COL = 0
+UPDATED_COL = 3
+DEPT_ID_COL = 4
+DEPT_COL = 5
+STATUS_COL = 7
+MISSING_COL = 8
+# Only the grid's columns are searched; rows may carry more fields after them
+SEARCH_COLUMNS = 10
+
+# Joins cells so a search term can never match across two cells
+CELL_SEPARATOR = "\x1f"
+
+
+def _grams(text, size):
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+class RadioSearchIndex:
+    # Built once per load. The dropdown filters are plain set lookups. Text
+    # search verifies candidates against the pre-lowered row text; terms of
+    # three or more characters narrow the candidates through trigram postings
+    # first. Those postings cost several KB per radio, so they are only built
+    # the first time a long term is searched here or checked against the
+    # columns the database's full-text index lacks (ranked()). Typing more
+    # characters refines the previous hit set instead of starting over.
+    def __init__(self, rows):
+        self.rows = {}
+        self.position = {}
+        self.text = {}
+        self.trigrams = None
+        self.by_status = defaultdict(set)
+        self.by_missing = defaultdict(set)
+        self.by_department = defaultdict(set)
+        self._last_term = None
+        self._last_hits = None
+
+        for position, row in enumerate(rows):
+            key = row[ID_COL]
+            self.rows[key] = row
+            self.position[key] = position
+            self._index(key, row)
+        self._next_position = len(self.position)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _index(self, key, row):
+        text = CELL_SEPARATOR.join(str(cell).lower() for cell in row[:SEARCH_COLUMNS])
+        self.text[key] = text
+        if self.trigrams is not None:
+            for gram in _grams(text, 3):
+                self.trigrams[gram].add(key)
+        self.by_status[str(row[STATUS_COL]).lower()].add(key)
+        self.by_missing[str(row[MISSING_COL]).lower()].add(key)
+        self.by_department[str(row[DEPT_COL]).lower()].add(key)
+
+    def _unindex(self, key):
+        row, text = self.rows[key], self.text.pop(key)
+        if self.trigrams is not None:
+            for gram in _grams(text, 3):
+                self.trigrams[gram].discard(key)
+        self.by_status[str(row[STATUS_COL]).lower()].discard(key)
+        self.by_missing[str(row[MISSING_COL]).lower()].discard(key)
+        self.by_department[str(row[DEPT_COL]).lower()].discard(key)
+
+    def upsert(self, row):
+        key = row[ID_COL]
+        if key in self.rows:
+            self._unindex(key)
+        else:
+            self.position[key] = self._next_position
+            self._next_position += 1
+        self.rows[key] = row
+        self._index(key, row)
+        self._last_term = None
+
+    def remove(self, key):
+        if key in self.rows:
+            self._unindex(key)
+            del self.rows[key]
+            del self.position[key]
+            self._last_term = None
+
+    def matches(self, row, term="", status="", missing="", department=""):
+        key = row[ID_COL]
+        for value, column in ((status, STATUS_COL), (missing, MISSING_COL), (department, DEPT_COL)):
+            if value and value.lower() != str(row[column]).lower():
+                return False
+        return not term or term.lower() in self.text[key]
+
+    def _postings(self, term):
+        if len(term) < 3:
+            # Too short for trigrams; every row is a candidate
+            return self.text.keys()
+        if self.trigrams is None:
+            self.trigrams = defaultdict(set)
+            for key, text in self.text.items():
+                for gram in _grams(text, 3):
+                    self.trigrams[gram].add(key)
+        lists = sorted((self.trigrams.get(gram, set()) for gram in _grams(term, 3)), key=len)
+        candidates = set(lists[0])
+        for postings in lists[1:]:
+            candidates &= postings
+            if not candidates:
+                break
+        return candidates
+
+    def match_text(self, term):
+        term = term.lower()
+        if not term:
+            return None
+
+        if term == self._last_term:
+            return self._last_hits
+
+        if self._last_term and self._last_term in term:
+            candidates = self._last_hits
+        else:
+            candidates = self._postings(term)
+
+        text = self.text
+        hits = {key for key in candidates if term in text[key]}
+        self._last_term, self._last_hits = term, hits
+        return hits
+
+    def _filtered(self, status, missing, department):
+        selected = None
+        for value, index in (
+            (status, self.by_status),
+            (missing, self.by_missing),
+            (department, self.by_department),
+        ):
+            if value:
+                keys = index.get(value.lower(), set())
+                selected = set(keys) if selected is None else selected & keys
+        return selected
+
+    def search(self, term="", status="", missing="", department=""):
+        selected = self._filtered(status, missing, department)
+
+        text_hits = self.match_text(term)
+        if text_hits is not None:
+            selected = set(text_hits) if selected is None else selected & text_hits
+
+        if selected is None:
+            return list(self.rows.values())
+        return [self.rows[key] for key in sorted(selected, key=self.position.__getitem__)]
+
+    def unindexed_hits(self, term):
+        # Keys whose id, Last Updated, Dept ID, Status or Missing cell
+        # contains `term`. Status and Missing hold a handful of values, so
+        # their filter sets answer directly; the other cells are only checked
+        # on the rows match_text() finds through the trigram postings.
+        term = term.lower()
+        hits = set()
+        for index in (self.by_status, self.by_missing):
+            for value, keys in index.items():
+                if term in value:
+                    hits |= keys
+        rows = self.rows
+        for key in self.match_text(term) or ():
+            if key not in hits:
+                row = rows[key]
+                if (term in str(row[ID_COL]) or term in str(row[UPDATED_COL]).lower()
+                        or term in str(row[DEPT_ID_COL]).lower()):
+                    hits.add(key)
+        return hits
+
+    def ranked(self, keys, term="", status="", missing="", department=""):
+        # Rows for keys already ranked elsewhere (database.search_radios),
+        # kept in that order and narrowed by the dropdown filters. With
+        # `term`, rows matching it only in columns the full-text index lacks
+        # (id, dates, codes, status) follow in grid order.
+        selected = self._filtered(status, missing, department)
+        rows, seen = [], set()
+        for key in keys:
+            if key in self.rows and key not in seen and (selected is None or key in selected):
+                rows.append(self.rows[key])
+                seen.add(key)
+        if term:
+            extra = [key for key in self.unindexed_hits(term)
+                     if key not in seen and (selected is None or key in selected)]
+            rows += [self.rows[key] for key in sorted(extra, key=self.position.__getitem__)]
+        return rows
@@ -0,0 +1,25 @@
+import os
+import tempfile
+import unittest
+
+import database
+from database import close_pool, init_db
+
+
+class DatabaseTestCase(unittest.TestCase):
+    # Every test gets a fresh database in its own temporary directory
+    # (self.tmp.name). The database module's file, mode and pragmas are put
+    # back, and the pool closed, once the test and its tearDown are done.
+    DB_NAME = "radios.db"
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(self._restore_database, database.DB_FILE, database.READ_ONLY, database.PRAGMAS)
+        database.DB_FILE = os.path.join(self.tmp.name, self.DB_NAME)
+        init_db()
+
+    @staticmethod
+    def _restore_database(db_file, read_only, pragmas):
+        close_pool()
+        database.DB_FILE, database.READ_ONLY, database.PRAGMAS = db_file, read_only, pragmas
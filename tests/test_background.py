@@ -0,0 +1,161 @@
+import os
+import re
+import threading
+import time
+import unittest
+
+import database
+from database import connection
+from repository.reports import report_source, write_pdf_report
+from tests.fixtures import DatabaseTestCase
+from ui.background import BackgroundRunner, get_runner, run_in_process
+
+
+class FakeRoot:
+    # Stands in for Tk: after() callbacks run only when the test calls update()
+    def __init__(self):
+        self.pending = []
+
+    def after(self, ms, callback):
+        self.pending.append(callback)
+
+    def update(self):
+        pending, self.pending = self.pending, []
+        for callback in pending:
+            callback()
+
+
+class FakeWidget:
+    def __init__(self, root=None, exists=True):
+        self.root = root
+        self.exists = exists
+
+    def _root(self):
+        return self.root
+
+    def winfo_exists(self):
+        return self.exists
+
+
+class TestBackgroundRunner(unittest.TestCase):
+    def setUp(self):
+        self.root = FakeRoot()
+        self.runner = BackgroundRunner(self.root, workers=1)
+        self.addCleanup(self.runner.shutdown)
+
+    def wait_for(self, condition, timeout=5.0):
+        # Poll the fake root like Tk's event loop until condition() holds
+        deadline = time.monotonic() + timeout
+        while not condition():
+            self.assertLess(time.monotonic(), deadline, "timed out waiting for the runner")
+            self.root.update()
+            time.sleep(0.01)
+
+    def test_result_is_delivered_on_the_polling_thread(self):
+        results = []
+        self.runner.submit(lambda a, b: a + b, 2, 3,
+                           on_done=lambda value: results.append((value, threading.current_thread())))
+        self.wait_for(lambda: results)
+        self.assertEqual(results, [(5, threading.current_thread())])
+
+    def test_error_and_progress_are_delivered(self):
+        progress, errors = [], []
+
+        def work(progress):
+            progress(50)
+            raise ValueError("boom")
+
+        self.runner.submit(work, on_progress=progress.append, on_error=errors.append)
+        self.wait_for(lambda: errors)
+        self.assertEqual(progress, [50])
+        self.assertEqual(str(errors[0]), "boom")
+
+    def test_newer_task_with_the_same_key_supersedes_the_older(self):
+        gate = threading.Event()
+        started, results = [], []
+        self.runner.submit(gate.wait)  # occupies the only worker
+
+        def work(name):
+            started.append(name)
+            return name
+
+        self.runner.submit(work, "first", on_done=results.append, key="search")
+        self.runner.submit(work, "second", on_done=results.append, key="search")
+        gate.set()
+        self.wait_for(lambda: results)
+        self.runner.submit(lambda: None, on_done=results.append)
+        self.wait_for(lambda: len(results) == 2)
+        # The superseded task was skipped before it ran
+        self.assertEqual(started, ["second"])
+        self.assertEqual(results, ["second", None])
+
+    def test_superseded_running_task_is_not_delivered(self):
+        running, release = threading.Event(), threading.Event()
+        results = []
+
+        def slow():
+            running.set()
+            release.wait()
+            return "old"
+
+        self.runner.submit(slow, on_done=results.append, key="report")
+        running.wait(5)
+        self.runner.submit(lambda: "new", on_done=results.append, key="report")
+        release.set()
+        self.wait_for(lambda: results)
+        self.runner.submit(lambda: None, on_done=results.append)
+        self.wait_for(lambda: len(results) == 2)
+        self.assertEqual(results, ["new", None])
+
+    def test_cancel_and_destroyed_owner_drop_the_result(self):
+        gate = threading.Event()
+        results = []
+        self.runner.submit(gate.wait)
+        self.runner.submit(lambda: "cancelled", on_done=results.append, key="export")
+        self.runner.cancel("export")
+        self.runner.submit(lambda: "closed", on_done=results.append, owner=FakeWidget(exists=False))
+        self.runner.submit(lambda: "kept", on_done=results.append, owner=FakeWidget())
+        gate.set()
+        self.wait_for(lambda: results)
+        self.assertEqual(results, ["kept"])
+
+    def test_shutdown_stops_polling(self):
+        self.runner.shutdown()
+        self.root.update()
+        self.assertEqual(self.root.pending, [])
+
+    def test_one_runner_per_root(self):
+        root = FakeRoot()
+        runner = get_runner(FakeWidget(root))
+        self.addCleanup(runner.shutdown)
+        self.assertIs(get_runner(FakeWidget(root)), runner)
+        self.assertIsNot(runner, self.runner)
+
+
+class TestRunInProcess(DatabaseTestCase):
+    DB_NAME = "configured.db"
+
+    def setUp(self):
+        super().setUp()
+        with connection() as conn:
+            conn.executemany("INSERT INTO radios (radio_id, serial) VALUES (?, ?)",
+                             [(f"R{i}", f"SN{i}") for i in range(45)])
+        # The child must not find a default radios.db in its working directory
+        empty = os.path.join(self.tmp.name, "elsewhere")
+        os.mkdir(empty)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(empty)
+
+    def test_pdf_export_reads_the_configured_database(self):
+        database.READ_ONLY = True
+        headers, source = report_source("All Radios")
+        self.assertEqual(run_in_process(source.count), 45)
+
+        path = os.path.join(self.tmp.name, "radios.pdf")
+        self.assertEqual(run_in_process(write_pdf_report, path, headers, "All", source, 20), path)
+        with open(path, "rb") as f:
+            self.assertEqual(len(re.findall(rb"/Type /Page\b(?!s)", f.read())), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import datetime
+import os
+import sqlite3
+import unittest
+from unittest import mock
+
+import backup
+import database
+from database import connection
+from tests.fixtures import DatabaseTestCase
+
+
+class TestSnapshot(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        with connection() as conn:
+            conn.executemany(
+                "INSERT INTO radios (radio_id, serial, notes) VALUES (?, ?, ?)",
+                [(f"R{i}", f"SN{i}", "x" * 200) for i in range(2000)],
+            )
+
+    def restored_count(self, path):
+        dest = os.path.join(self.tmp.name, "restored.db")
+        if os.path.exists(dest):
+            os.remove(dest)
+        self.assertEqual(backup.restore_snapshot(path, dest), [])
+        conn = sqlite3.connect(dest)
+        try:
+            return conn.execute("SELECT COUNT(*) FROM radios").fetchone()[0]
+        finally:
+            conn.close()
+
+    def test_snapshot_is_compressed_verified_and_restorable(self):
+        result = backup.snapshot(pages=8, pause=0, now=datetime.datetime(2025, 3, 1, 6, 30))
+        self.assertEqual(os.path.basename(result.path), "radios-20250301-063000.db.gz")
+        self.assertEqual(os.path.dirname(result.path), os.path.join(self.tmp.name, "backups"))
+        self.assertGreater(result.pages, 8)
+        self.assertEqual(os.listdir(os.path.dirname(result.path)), [os.path.basename(result.path)])
+        self.assertLess(result.bytes, result.pages * 4096 // 4)
+        self.assertEqual(self.restored_count(result.path), 2000)
+
+    def test_busy_database_falls_back_to_one_step(self):
+        # Another desk writes between every step, restarting the copy
+        other = sqlite3.connect(database.DB_FILE)
+        self.addCleanup(other.close)
+
+        def write_between_steps(seconds):
+            with other:
+                other.execute("INSERT INTO radios (serial) VALUES ('busy')")
+
+        with mock.patch.object(backup.time, "sleep", write_between_steps):
+            result = backup.snapshot(pages=4, pause=0.001)
+        self.assertGreater(result.restarts, backup.MAX_RESTARTS)
+        self.assertGreater(self.restored_count(result.path), 2000)
+
+    def test_prune_keeps_newest(self):
+        directory = os.path.join(self.tmp.name, "snaps")
+        for day in range(1, 5):
+            backup.snapshot(directory, keep=2, pause=0, now=datetime.datetime(2025, 3, day))
+        self.assertEqual(sorted(os.listdir(directory)), ["radios-20250303-000000.db.gz", "radios-20250304-000000.db.gz"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import os
+import sqlite3
+import unittest
+
+import config
+import database
+from database import close_pool, connection, init_db
+from repository import changes, departments
+from tests.fixtures import DatabaseTestCase
+
+
+class TestConfig(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.ini = os.path.join(self.tmp.name, config.CONFIG_FILE)
+
+    def write_ini(self, text):
+        with open(self.ini, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def test_defaults_resolve_next_to_the_app(self):
+        settings = config.load(os.path.join(self.tmp.name, "missing.ini"), environ={})
+        self.assertEqual(settings.source_path, os.path.join(config.app_dir(), "radios.db"))
+        self.assertEqual((settings.mode, settings.pragmas, settings.config_file), (config.READWRITE, {}, None))
+
+    def test_file_paths_are_relative_to_the_file_and_env_overrides(self):
+        self.write_ini("[database]\npath = data/radios.db\n[pragmas]\ncache_size = -8000\nforeign_keys = ON\n")
+        settings = config.load(self.ini, environ={})
+        self.assertEqual(settings.db_path, os.path.join(self.tmp.name, "data", "radios.db"))
+        self.assertEqual(settings.pragmas, {"cache_size": "-8000", "foreign_keys": "ON"})
+
+        settings = config.load(environ={config.CONFIG_ENV: self.ini, config.DB_ENV: "/srv/shared.db",
+                                        config.MODE_ENV: "ReadOnly"})
+        self.assertEqual((settings.db_path, settings.mode), (os.path.normpath("/srv/shared.db"), config.READONLY))
+
+    def test_rejects_unknown_mode_and_unsafe_pragmas(self):
+        for text in ("[database]\nmode = replica\n", "[pragmas]\njournal_mode = DELETE\n",
+                     "[pragmas]\ncache_size = 1; DROP TABLE radios\n"):
+            with self.subTest(text=text):
+                self.write_ini(text)
+                with self.assertRaises(ValueError):
+                    config.load(self.ini, environ={})
+
+    def test_readonly_mode_never_writes(self):
+        self.write_ini("[database]\npath = radios.db\n[pragmas]\ncache_size = -4000\n")
+        config.apply(config.load(self.ini, environ={}))
+        init_db()
+        with connection(readonly=True) as conn:
+            self.assertEqual(conn.execute("PRAGMA cache_size").fetchone()[0], -4000)
+
+        config.apply(config.load(self.ini, environ={config.MODE_ENV: "readonly"}))
+        self.assertEqual(departments.names(), [])
+        with self.assertRaises(sqlite3.OperationalError):
+            departments.add_department("FIRE", "Fire", "")
+
+    def test_mmap_is_off_unless_configured(self):
+        self.write_ini("[database]\npath = radios.db\n")
+        config.apply(config.load(self.ini, environ={}))
+        init_db()
+        with connection() as conn:
+            self.assertEqual(conn.execute("PRAGMA mmap_size").fetchone()[0], 0)
+
+        self.write_ini("[database]\npath = radios.db\n[pragmas]\nmmap_size = 1048576\n")
+        config.apply(config.load(self.ini, environ={}))
+        with connection(readonly=True) as conn:
+            self.assertEqual(conn.execute("PRAGMA mmap_size").fetchone()[0], 1048576)
+
+    def test_snapshot_refresh_is_picked_up_by_the_change_feed(self):
+        self.write_ini("[database]\npath = shared.db\nmode = snapshot\nsnapshot_path = local/copy.db\n")
+        settings = config.load(self.ini, environ={})
+        self.assertEqual(settings.db_path, os.path.join(self.tmp.name, "local", "copy.db"))
+        shared = os.path.join(self.tmp.name, "shared.db")
+        database.DB_FILE = shared
+        init_db()
+        close_pool()
+
+        config.apply(settings)
+        config.refresh_snapshot(settings)
+        seq = changes.current_seq()
+        self.assertEqual(departments.names(), [])
+
+        desk = sqlite3.connect(shared)
+        with desk:
+            desk.execute("INSERT INTO departments (id, name) VALUES ('FIRE', 'Fire')")
+        desk.close()
+        self.assertEqual(departments.names(), [])
+
+        config.refresh_snapshot(settings)
+        self.assertEqual(changes.changes_since(seq).department_ids, {"FIRE"})
+        self.assertEqual(departments.names(), ["Fire"])
+
+
+if __name__ == "__main__":
+    unittest.main()
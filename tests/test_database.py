@@ -1,11 +1,35 @@
-import unittest
 import os
-from database import get_connection, init_db
+import queue
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
 import HtmlTestRunner
 
-class TestRadioDatabase(unittest.TestCase):
+import database
+from database import (
+    SCHEMA_VERSION,
+    close_pool,
+    connection,
+    get_connection,
+    get_pool,
+    get_schema_version,
+    migrate,
+    notify_changes,
+    search_radios,
+    subscribe,
+    unit_of_work,
+    unsubscribe,
+    write_with_audit_fallback,
+)
+from repository.radios import set_status
+from tests.fixtures import DatabaseTestCase
+
+
+class TestRadioDatabase(DatabaseTestCase):
     def setUp(self):
-        init_db()
+        super().setUp()
         self.conn = get_connection()
         self.cursor = self.conn.cursor()
 
@@ -107,6 +131,232 @@ class TestRadioDatabase(unittest.TestCase):
       self.assertIsNotNone(service)
       self.assertEqual(service[4], "LRC001")  # LRC #
 
+    def test_pooled_writer_is_reused(self):
+      with connection() as first:
+          pass
+      with connection() as second:
+          pass
+      self.assertIs(first, second)
+      self.assertIs(get_pool().writer(), first)
+
+    def test_connection_rolls_back_on_error(self):
+      with self.assertRaises(RuntimeError), connection() as conn:
+          conn.execute("INSERT INTO radios (radio_id, serial, model) VALUES (?, ?, ?)",
+                       ("TEST129", "SN0007", "ModelG"))
+          raise RuntimeError("boom")
+
+      with connection(readonly=True) as conn:
+          row = conn.execute("SELECT id FROM radios WHERE radio_id = ?", ("TEST129",)).fetchone()
+      self.assertIsNone(row)
+
+    def test_nested_connection_commits_once(self):
+      with connection() as outer:
+          outer.execute("INSERT INTO radios (radio_id, serial, model) VALUES (?, ?, ?)",
+                        ("TEST130", "SN0008", "ModelH"))
+          with connection() as inner:
+              inner.execute("UPDATE radios SET model = ? WHERE radio_id = ?", ("ModelI", "TEST130"))
+          self.assertTrue(outer.in_transaction)
+
+      self.cursor.execute("SELECT model FROM radios WHERE radio_id = ?", ("TEST130",))
+      self.assertEqual(self.cursor.fetchone()[0], "ModelI")
+
+    def test_reader_is_read_only(self):
+      with connection(readonly=True) as conn, self.assertRaises(sqlite3.OperationalError):
+          conn.execute("INSERT INTO departments (id, name) VALUES ('X', 'Y')")
+
+    def test_schema_is_current(self):
+      self.assertEqual(get_schema_version(self.conn), SCHEMA_VERSION)
+      self.cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND name = 'idx_services_radio'")
+      self.assertIsNotNone(self.cursor.fetchone())
+
+    def test_migrate_legacy_database(self):
+      with tempfile.TemporaryDirectory() as tmp:
+          conn = sqlite3.connect(os.path.join(tmp, "legacy.db"))
+          conn.execute("CREATE TABLE radios (id INTEGER PRIMARY KEY AUTOINCREMENT, radio_id TEXT, serial TEXT NOT NULL, model TEXT, "
+                       "assigned_to TEXT, notes TEXT, department_id TEXT, date_received TEXT, date_issued TEXT, "
+                       "date_returned TEXT, last_updated TEXT, status TEXT DEFAULT 'Active', missing TEXT DEFAULT 'No')")
+          conn.execute("INSERT INTO radios (radio_id, serial) VALUES ('OLD1', 'SN-OLD')")
+          conn.executemany("INSERT INTO radios (radio_id, serial, department_id) VALUES (?, ?, ?)",
+                           [("OLD2", "SN-2", ""), ("OLD3", "SN-3", "GONE")])
+          conn.commit()
+
+          self.assertEqual(migrate(conn), list(range(1, SCHEMA_VERSION + 1)))
+          self.assertEqual(get_schema_version(conn), SCHEMA_VERSION)
+          self.assertEqual(migrate(conn), [])
+          self.assertEqual(conn.execute("SELECT serial FROM radios").fetchone()[0], "SN-OLD")
+          # Ready for foreign keys: no '' departments, none left dangling
+          self.assertEqual(conn.execute("SELECT department_id FROM radios ORDER BY id").fetchall(),
+                           [(None,), (None,), ("GONE",)])
+          self.assertEqual(conn.execute("PRAGMA foreign_key_check").fetchall(), [])
+          conn.close()
+
+    def test_changes_dispatched_after_commit(self):
+      received = []
+      listener = lambda radio_ids, department_ids: received.append((radio_ids, department_ids))
+      subscribe(listener)
+      try:
+          with connection() as conn:
+              conn.execute("UPDATE radios SET notes = notes WHERE 0")
+              notify_changes(radio_ids=["7"], department_ids=["SEC"])
+              self.assertEqual(received, [])
+          self.assertEqual(received, [({7}, {"SEC"})])
+
+          with self.assertRaises(RuntimeError), connection():
+              notify_changes(radio_ids=[8])
+              raise RuntimeError("boom")
+          self.assertEqual(len(received), 1)
+      finally:
+          unsubscribe(listener)
+
+    def test_unit_of_work_flushes_audit_with_data(self):
+      with unit_of_work() as (conn, audit):
+          cursor = conn.execute("INSERT INTO radios (radio_id, serial) VALUES ('UOW-1', 'SN-UOW-1')")
+          radio_id = cursor.lastrowid
+          for field in ("radio_id", "serial", "model"):
+              audit.record(radio_id, "EDIT", field, "old", "new")
+          self.assertEqual(len(audit), 3)
+      rows = self.cursor.execute("SELECT field_changed FROM radio_changes WHERE radio_id = ? ORDER BY id", (radio_id,)).fetchall()
+      self.assertEqual([row[0] for row in rows], ["radio_id", "serial", "model"])
+
+      # A failed unit of work leaves neither the change nor its audit rows
+      with self.assertRaises(RuntimeError), unit_of_work() as (conn, audit):
+          conn.execute("DELETE FROM radios WHERE id = ?", (radio_id,))
+          audit.record(radio_id, "DELETE", "ALL", "SN-UOW-1", "")
+          raise RuntimeError("boom")
+      count = self.cursor.execute("SELECT COUNT(*) FROM radio_changes WHERE radio_id = ? AND change_type = 'DELETE'", (radio_id,)).fetchone()[0]
+      self.assertEqual(count, 0)
+      self.cursor.execute("DELETE FROM radios WHERE id = ?", (radio_id,))
+      self.conn.commit()
+
+    def test_deferred_audit_is_written_after_commit(self):
+      with unit_of_work(defer_audit=True) as (conn, audit):
+          cursor = conn.execute("INSERT INTO radios (radio_id, serial) VALUES ('UOW-2', 'SN-UOW-2')")
+          radio_id = cursor.lastrowid
+          audit.record(radio_id, "ADD", "ALL", "", "UOW-2")
+      close_pool()
+      count = self.cursor.execute("SELECT COUNT(*) FROM radio_changes WHERE radio_id = ?", (radio_id,)).fetchone()[0]
+      self.assertEqual(count, 1)
+      self.cursor.execute("DELETE FROM radios WHERE id = ?", (radio_id,))
+      self.conn.commit()
+
+    def test_deferred_audit_retries_while_database_is_locked(self):
+      with connection() as conn:
+          radio_id = conn.execute("INSERT INTO radios (radio_id, serial, status) VALUES ('UOW-3', 'SN-UOW-3', 'Active')").lastrowid
+      write = database.DeferredAuditQueue._write
+      attempts = []
+
+      def busy_twice(queue, records):
+          attempts.append(len(records))
+          if len(attempts) <= 2:
+              raise sqlite3.OperationalError("database is locked")
+          write(queue, records)
+
+      with mock.patch.object(database.DeferredAuditQueue, "_write", busy_twice):
+          self.assertEqual(set_status([radio_id], "In Service", defer_audit=True), [radio_id])
+          # The change is committed without waiting for its audit row
+          status = self.cursor.execute("SELECT status FROM radios WHERE id = ?", (radio_id,)).fetchone()[0]
+          self.assertEqual(status, "In Service")
+          close_pool()
+      self.assertEqual(attempts, [1, 1, 1])
+      rows = self.cursor.execute("SELECT change_type, old_value, new_value FROM radio_changes WHERE radio_id = ?", (radio_id,)).fetchall()
+      self.assertEqual(rows, [("STATUS", "Active", "In Service")])
+      self.cursor.execute("DELETE FROM radios WHERE id = ?", (radio_id,))
+      self.conn.commit()
+
+    def test_submit_racing_the_writer_exit_is_still_written(self):
+      with connection() as conn:
+          radio_id = conn.execute("INSERT INTO radios (radio_id, serial) VALUES ('UOW-4', 'SN-UOW-4')").lastrowid
+      writer = database.DeferredAuditQueue()
+      take = writer._take
+      calls = []
+
+      def idle_then_submit(timeout):
+          calls.append(timeout)
+          if len(calls) == 2:
+              # Lands just as the writer gives up waiting, while it is alive
+              writer.submit([(radio_id, "EDIT", "notes", "", "second")])
+              raise queue.Empty
+          return take(timeout)
+
+      with mock.patch.object(writer, "_take", idle_then_submit):
+          writer.submit([(radio_id, "EDIT", "notes", "", "first")])
+          writer._thread.join(5)
+      self.assertIsNone(writer._thread)
+      rows = self.cursor.execute("SELECT new_value FROM radio_changes WHERE radio_id = ? ORDER BY id", (radio_id,)).fetchall()
+      self.assertEqual(rows, [("first",), ("second",)])
+      self.cursor.execute("DELETE FROM radios WHERE id = ?", (radio_id,))
+      self.conn.commit()
+
+    def test_deferred_audit_keeps_records_after_other_errors(self):
+      with connection() as conn:
+          radio_id = conn.execute("INSERT INTO radios (radio_id, serial) VALUES ('UOW-5', 'SN-UOW-5')").lastrowid
+      writer = database.DeferredAuditQueue()
+      write = writer._write
+      attempts = []
+
+      def fail_once(records):
+          attempts.append(records)
+          if len(attempts) == 1:
+              raise RuntimeError("disk hiccup")
+          write(records)
+
+      with mock.patch.object(writer, "_write", fail_once), mock.patch("traceback.print_exc") as report:
+          writer.submit([(radio_id, "EDIT", "notes", "", "kept")])
+          writer._thread.join(5)
+      self.assertEqual(report.call_count, 1)
+      self.assertEqual(len(attempts), 2)
+      count = self.cursor.execute("SELECT COUNT(*) FROM radio_changes WHERE radio_id = ?", (radio_id,)).fetchone()[0]
+      self.assertEqual(count, 1)
+      self.cursor.execute("DELETE FROM radios WHERE id = ?", (radio_id,))
+      self.conn.commit()
+
+    def test_audit_is_deferred_only_when_the_database_stays_locked(self):
+      calls = []
+
+      def write(ids, value, defer_audit=False):
+          calls.append(defer_audit)
+          if len(calls) == 1 and fail:
+              raise fail
+          return ids
+
+      fail = None
+      self.assertEqual(write_with_audit_fallback(write, [1], "x"), [1])
+      self.assertEqual(calls, [False])
+
+      calls, fail = [], sqlite3.OperationalError("database is locked")
+      self.assertEqual(write_with_audit_fallback(write, [1], "x"), [1])
+      self.assertEqual(calls, [False, True])
+
+      calls, fail = [], sqlite3.OperationalError("no such table: radios")
+      with self.assertRaises(sqlite3.OperationalError):
+          write_with_audit_fallback(write, [1], "x")
+      self.assertEqual(calls, [False])
+
+    def test_search_index_follows_radios_services_and_departments(self):
+      with connection() as conn:
+          conn.execute("INSERT OR REPLACE INTO departments (id, name) VALUES ('FTSD', 'Qwzx Harbor Patrol')")
+          first = conn.execute("INSERT INTO radios (radio_id, serial, model, department_id) VALUES ('F1', 'FTS-QWZX-1', 'APX', 'FTSD')").lastrowid
+          second = conn.execute("INSERT INTO radios (radio_id, serial, model, notes) VALUES ('F2', 'FTS-2', 'APX', 'qwzx')").lastrowid
+          conn.execute("INSERT INTO services (radio_id, problem, notes) VALUES (?, 'Zyxq cracked housing', '')", (second,))
+      try:
+          # The serial hit outranks the notes hit
+          self.assertEqual(search_radios("QWZX"), [first, second])
+          self.assertEqual(search_radios("zyxq"), [second])
+          self.assertEqual(search_radios("harbor patrol"), [first])
+          self.assertIsNone(search_radios("qw"))
+
+          with connection() as conn:
+              conn.execute("UPDATE departments SET name = 'Qwzx Marine' WHERE id = 'FTSD'")
+              conn.execute("DELETE FROM services WHERE radio_id = ?", (second,))
+          self.assertEqual(search_radios("harbor patrol"), [])
+          self.assertEqual(search_radios("qwzx marine"), [first])
+          self.assertEqual(search_radios("zyxq"), [])
+      finally:
+          with connection() as conn:
+              conn.execute("DELETE FROM radios WHERE id IN (?, ?)", (first, second))
+              conn.execute("DELETE FROM departments WHERE id = 'FTSD'")
+      self.assertEqual(search_radios("qwzx"), [])
+
     def tearDown(self):
         self.conn.close()
 
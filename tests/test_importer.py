@@ -0,0 +1,63 @@
+import os
+import unittest
+
+from database import connection
+from importer import import_departments, import_radios
+from tests.fixtures import DatabaseTestCase
+
+
+class TestBulkImport(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        with connection() as conn:
+            conn.execute("INSERT INTO departments (id, name, contact) VALUES ('IMPA', 'Import Alpha', '')")
+
+    def write(self, name, text):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            f.write(text)
+        return path
+
+    def test_dry_run_reports_conflicts_without_writing(self):
+        path = self.write("radios.csv",
+            "Radio ID,Serial,Model,Department,Date Received\n"
+            "R1,IMP-1,XTS,Import Alpha,2025-01-01\n"
+            "R2,IMP-1,XTS,IMPA,\n"
+            "R3,IMP-3,XTS,Nowhere,\n"
+            "R4,IMP-4,XTS,,01/02/2025\n"
+            ",IMP-5,XTS,,\n")
+        result = import_radios(path, dry_run=True)
+
+        self.assertEqual(result.rows_read, 5)
+        self.assertEqual(result.valid, 1)
+        self.assertEqual([line for line, _, _ in result.conflicts], [3, 4, 5, 6])
+        with connection(readonly=True) as conn:
+            count = conn.execute("SELECT COUNT(*) FROM radios WHERE serial LIKE 'IMP-%'").fetchone()[0]
+        self.assertEqual(count, 0)
+
+    def test_import_writes_radios_and_audit_rows(self):
+        path = self.write("radios.csv",
+            "radio_id,serial,model,dept id,assigned to\n"
+            + "".join(f"R{i},IMP-{i},APX,impa,Tech {i}\n" for i in range(1200)))
+        self.assertEqual(import_radios(path).imported, 1200)
+
+        again = import_radios(path)
+        self.assertEqual(again.imported, 0)
+        self.assertEqual(len(again.conflicts), 1200)
+
+        with connection(readonly=True) as conn:
+            row = conn.execute("""
+                SELECT r.department_id, c.change_type, c.new_value
+                FROM radios r JOIN radio_changes c ON c.radio_id = r.id
+                WHERE r.serial = 'IMP-7'
+            """).fetchone()
+        self.assertEqual(row, ("IMPA", "ADD", "R7, IMP-7, APX, Tech 7, "))
+
+    def test_import_departments(self):
+        path = self.write("departments.csv", "ID,Name,Contact\nIMPB,Import Beta,x100\nIMPA,Dup,\n")
+        result = import_departments(path)
+        self.assertEqual(result.imported, 1)
+        self.assertEqual(result.conflicts, [(3, "IMPA", "Department already exists")])
+
+if __name__ == "__main__":
+    unittest.main()
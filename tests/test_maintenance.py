@@ -0,0 +1,115 @@
+import json
+import os
+import sqlite3
+import time
+import unittest
+
+import database
+import maintenance
+from database import connection
+from tests.fixtures import DatabaseTestCase
+
+
+class TestArchiveAudit(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        with connection() as conn:
+            rows = []
+            for radio_id in range(1, 51):
+                # One form save touching three fields, then a status change
+                rows += [(radio_id, "EDIT", field, "old", "new", "2020-01-01 08:00:00")
+                         for field in ("serial", "model", "notes")]
+                rows.append((radio_id, "STATUS", "status", "Active", "In Service", "2020-01-01 08:00:00"))
+                rows.append((radio_id, "EDIT", "notes", "a", "b", "2099-01-01 08:00:00"))
+            conn.executemany(
+                "INSERT INTO radio_changes (radio_id, change_type, field_changed, old_value, new_value, timestamp)"
+                " VALUES (?, ?, ?, ?, ?, ?)", rows,
+            )
+
+    def archived(self, path):
+        with sqlite3.connect(path) as conn:
+            return conn.execute(
+                "SELECT radio_id, change_type, field_changed, old_value, new_value, merged_rows"
+                " FROM radio_changes ORDER BY id"
+            ).fetchall()
+
+    def remaining(self):
+        with connection(readonly=True) as conn:
+            return conn.execute("SELECT COUNT(*) FROM radio_changes").fetchone()[0]
+
+    def test_moves_rows_older_than_cutoff_in_batches(self):
+        batches = []
+        result = maintenance.archive_audit(cutoff="2021-01-01", batch_size=30, pause=0, progress=batches.append)
+        self.assertEqual((result.moved, result.written, result.batches), (200, 200, 7))
+        self.assertEqual(batches[-1], 200)
+        self.assertEqual(self.remaining(), 50)
+        self.assertEqual(result.archive_path, os.path.join(self.tmp.name, "radios-archive.db"))
+        self.assertEqual(len(self.archived(result.archive_path)), 200)
+
+        # Nothing left to move; a re-run is a no-op
+        self.assertEqual(maintenance.archive_audit(cutoff="2021-01-01", pause=0).moved, 0)
+
+    def test_collapse_keeps_each_save_in_one_row(self):
+        # Batches of 5 would split the 3-row saves without group completion
+        result = maintenance.archive_audit(cutoff="2021-01-01", batch_size=5, pause=0, collapse=True)
+        self.assertEqual((result.moved, result.written), (200, 100))
+        rows = self.archived(result.archive_path)
+        edit, status = rows[0], rows[1]
+        self.assertEqual(edit[:3], (1, "EDIT", "serial,model,notes"))
+        self.assertEqual(json.loads(edit[4]), {"serial": "new", "model": "new", "notes": "new"})
+        self.assertEqual(edit[5], 3)
+        self.assertEqual(status, (1, "STATUS", "status", "Active", "In Service", 1))
+        self.assertEqual(self.remaining(), 50)
+
+
+class TestRunMaintenance(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        with connection() as conn:
+            conn.executemany("INSERT INTO radios (radio_id, serial, notes) VALUES (?, ?, ?)",
+                             [(f"R{i}", f"SN{i}", "x" * 500) for i in range(2000)])
+        with connection() as conn:
+            conn.execute("DELETE FROM radios WHERE id > 100")
+
+    def test_new_database_profile(self):
+        with connection() as conn:
+            settings = [conn.execute(f"PRAGMA {name}").fetchone()[0]
+                        for name in ("auto_vacuum", "foreign_keys", "synchronous", "temp_store")]
+        self.assertEqual(settings, [2, 1, 1, 2])
+
+    def test_reclaims_pages_and_truncates_wal(self):
+        steps = {step.name: step for step in maintenance.run_maintenance(vacuum_pages=50)}
+        self.assertEqual(list(steps), ["analyze", "incremental_vacuum", "wal_checkpoint(TRUNCATE)"])
+        self.assertGreater(steps["analyze"].after, 0)
+        vacuum = steps["incremental_vacuum"]
+        self.assertEqual(vacuum.before - vacuum.after, 50)
+        self.assertGreater(steps["wal_checkpoint(TRUNCATE)"].before, 0)
+        self.assertEqual(steps["wal_checkpoint(TRUNCATE)"].after, 0)
+
+        maintenance.run_maintenance(vacuum_pages=100000)
+        with connection(readonly=True) as conn:
+            self.assertEqual(conn.execute("PRAGMA freelist_count").fetchone()[0], 0)
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM radios").fetchone()[0], 100)
+
+    def test_short_busy_timeout_and_log(self):
+        other = sqlite3.connect(database.DB_FILE)
+        self.addCleanup(other.close)
+        other.execute("BEGIN IMMEDIATE")
+        started = time.monotonic()
+        with self.assertRaises(sqlite3.OperationalError) as raised:
+            maintenance.run_maintenance(busy_timeout=0.1)
+        self.assertLess(time.monotonic() - started, 2)
+        other.rollback()
+
+        log = os.path.join(self.tmp.name, "logs", "maintenance.log")
+        maintenance.log_steps(log, "exit", error=raised.exception)
+        maintenance.log_steps(log, "idle", maintenance.run_maintenance())
+        with open(log, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        self.assertRegex(lines[0], r" exit: failed: database is locked$")
+        self.assertEqual([line.split(": ", 1)[1].split()[0] for line in lines[1:]],
+                         ["analyze", "incremental_vacuum", "wal_checkpoint(TRUNCATE)"])
+
+
+if __name__ == "__main__":
+    unittest.main()
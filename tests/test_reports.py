@@ -0,0 +1,81 @@
+import os
+import re
+import unittest
+
+from openpyxl import load_workbook
+
+from database import connection
+from repository.reports import (
+    REPORT_TYPES,
+    report_source,
+    write_excel_report,
+    write_pdf_report,
+)
+from tests.fixtures import DatabaseTestCase
+
+ROWS_PER_PAGE = 5
+# Rows each report should hold for the fleet built in setUp
+EXPECTED_ROWS = {
+    "Fleet Summary": 4,  # EMS, Fire, (No department) and the total
+    "All Radios": 24,
+    "Radios by Department": 8,
+    "Radios in Service": 6,
+    "Disabled Radios": 1,  # status = 0: the legacy radio
+    "Missing Radios": 5,
+}
+
+
+class TestReportExports(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        departments = ("EMS", "FIRE", None)
+        with connection() as conn:
+            conn.executemany("INSERT INTO departments (id, name) VALUES (?, ?)", [("FIRE", "Fire"), ("EMS", "EMS")])
+            conn.executemany(
+                "INSERT INTO radios (radio_id, serial, department_id, status, missing) VALUES (?, ?, ?, ?, ?)",
+                [(f"R{i}", f"SN{i}", departments[i % 3], "In Service" if i % 4 == 0 else "Active",
+                  "Yes" if i % 5 == 0 else "No") for i in range(23)],
+            )
+            # A legacy integer status, as Disabled Radios selects
+            conn.execute("INSERT INTO radios (radio_id, serial, status) VALUES ('OLD', 'SN-OLD', 0)")
+
+    def test_every_report_type_is_covered(self):
+        self.assertEqual(set(EXPECTED_ROWS), set(REPORT_TYPES))
+
+    def test_excel_export_of_each_report(self):
+        for report in REPORT_TYPES:
+            with self.subTest(report=report):
+                headers, source = report_source(report, "EMS")
+                self.assertEqual(source.count(), EXPECTED_ROWS[report])
+                path = os.path.join(self.tmp.name, f"{report}.xlsx")
+                self.assertEqual(write_excel_report(path, headers, report, source), path)
+
+                sheet = load_workbook(path, read_only=True)["Radio Report"]
+                rows = list(sheet.iter_rows(values_only=True))
+                # Title, subtitle, a blank row and the headings come first
+                self.assertEqual(rows[0][0], "GOLDEN NUGGET LAKE CHARLES")
+                self.assertEqual(list(rows[3]), headers)
+                self.assertEqual(len(rows) - 4, EXPECTED_ROWS[report])
+
+    def test_pdf_export_of_each_report(self):
+        for report in REPORT_TYPES:
+            with self.subTest(report=report):
+                headers, source = report_source(report, "EMS")
+                path = os.path.join(self.tmp.name, f"{report}.pdf")
+                self.assertEqual(write_pdf_report(path, headers, report, source, ROWS_PER_PAGE), path)
+
+                with open(path, "rb") as f:
+                    pages = len(re.findall(rb"/Type /Page\b(?!s)", f.read()))
+                self.assertEqual(pages, max(1, -(-EXPECTED_ROWS[report] // ROWS_PER_PAGE)))
+
+    def test_empty_report_still_exports(self):
+        headers, source = report_source("Radios by Department", "Nobody")
+        excel = write_excel_report(os.path.join(self.tmp.name, "empty.xlsx"), headers, "Nobody", source)
+        self.assertEqual(len(list(load_workbook(excel, read_only=True)["Radio Report"].iter_rows())), 4)
+        pdf = write_pdf_report(os.path.join(self.tmp.name, "empty.pdf"), headers, "Nobody", source)
+        with open(pdf, "rb") as f:
+            self.assertEqual(len(re.findall(rb"/Type /Page\b(?!s)", f.read())), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
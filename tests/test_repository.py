@@ -0,0 +1,259 @@
+import pickle
+import sqlite3
+import unittest
+from unittest import mock
+
+import database
+from database import connection, subscribe, unsubscribe
+from repository import audit, changes, departments, radios, services
+from repository.radios import (
+    delete_radios,
+    reassign_department,
+    set_missing,
+    set_status,
+)
+from repository.reports import report_source
+from tests.fixtures import DatabaseTestCase
+
+
+class TestRepository(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        with connection() as conn:
+            conn.executemany("INSERT INTO departments (id, name) VALUES (?, ?)", [("FIRE", "Fire"), ("EMS", "EMS")])
+            conn.executemany(
+                "INSERT INTO radios (radio_id, serial, department_id) VALUES (?, ?, 'FIRE')",
+                [(f"R{i}", f"SN{i}") for i in range(1200)],
+            )
+            self.ids = [row[0] for row in conn.execute("SELECT id FROM radios ORDER BY id")]
+
+    def audit_rows(self, change_type):
+        with connection(readonly=True) as conn:
+            return conn.execute(
+                "SELECT radio_id, field_changed, old_value, new_value FROM radio_changes WHERE change_type = ?",
+                (change_type,),
+            ).fetchall()
+
+    def test_set_status_updates_only_changed_rows(self):
+        notified = []
+        listener = lambda radio_ids, department_ids: notified.append(radio_ids)
+        subscribe(listener)
+        try:
+            self.assertEqual(len(set_status(self.ids[:700], "In Service")), 700)
+            # Already in service; nothing to change or audit
+            self.assertEqual(set_status(self.ids[:10], "In Service"), [])
+        finally:
+            unsubscribe(listener)
+
+        self.assertEqual(notified, [frozenset(self.ids[:700])])
+        rows = self.audit_rows("STATUS")
+        self.assertEqual(len(rows), 700)
+        self.assertEqual(rows[0][1:], ("status", "Active", "In Service"))
+        with connection(readonly=True) as conn:
+            count = conn.execute("SELECT COUNT(*) FROM radios WHERE status = 'In Service'").fetchone()[0]
+        self.assertEqual(count, 700)
+
+        with self.assertRaises(ValueError):
+            set_status(self.ids, "Lost")
+
+    def test_set_missing_and_reassign(self):
+        set_missing([str(radio_id) for radio_id in self.ids[:3]], "Yes")
+        self.assertEqual(len(self.audit_rows("MISSING")), 3)
+
+        reassign_department(self.ids[:5], "EMS")
+        with connection(readonly=True) as conn:
+            depts = [row[0] for row in conn.execute("SELECT department_id FROM radios ORDER BY id LIMIT 6")]
+        self.assertEqual(depts, ["EMS"] * 5 + ["FIRE"])
+        self.assertEqual({row[1:] for row in self.audit_rows("EDIT")}, {("department_id", "FIRE", "EMS")})
+
+    def test_delete_radios(self):
+        deleted = delete_radios(self.ids[:600] + [999999])
+        self.assertEqual(len(deleted), 600)
+        with connection(readonly=True) as conn:
+            remaining = conn.execute("SELECT COUNT(*) FROM radios").fetchone()[0]
+        self.assertEqual(remaining, 600)
+        self.assertEqual(len(self.audit_rows("DELETE")), 600)
+
+    def test_add_and_update_radio_audits_changed_fields(self):
+        values = {"radio_id": "NEW-1", "serial": "SN-NEW-1", "model": "APX", "department_id": "FIRE",
+                  "date_received": "2025-01-02"}
+        radio_id = radios.add_radio(values)
+        record = radios.get_radio(radio_id)
+        self.assertEqual((record.radio_id, record.date_received, record.status), ("NEW-1", "2025-01-02", "Active"))
+
+        radios.update_radio(radio_id, dict(values, model="XTS", date_issued="2025-02-03"))
+        changes = audit.for_radio(radio_id)
+        self.assertEqual(
+            sorted((change.change_type, change.field_changed) for change in changes),
+            [("ADD", "ALL"), ("EDIT", "date_issued"), ("EDIT", "model")],
+        )
+        self.assertEqual(radios.get_radio(radio_id).model, "XTS")
+        self.assertIsNone(radios.get_radio(999999))
+
+        ids, found = radios.grid_rows_for([radio_id, 999999], department_ids=["EMS"])
+        # The unknown id is still reported, with no row: deleted
+        self.assertEqual(ids, {radio_id, 999999})
+        self.assertEqual(set(found), {radio_id})
+        row = found[radio_id]
+        self.assertEqual(row.department, "Fire")
+        # Grid rows carry what the edit form needs
+        self.assertEqual((row.radio_id, row.date_received, row.date_issued), ("NEW-1", "2025-01-02", "2025-02-03"))
+        self.assertEqual(row[:radios.GRID_COLUMNS], tuple(getattr(row, f) for f in radios.RadioRow._fields[:10]))
+
+    def test_services_and_departments(self):
+        service_id = services.add_service(self.ids[0], "LRC1", "2025-03-01", "no transmit", "", 12.5)
+        [service] = services.for_radio(self.ids[0])
+        self.assertEqual((service.id, service.status, service.problem), (service_id, "open", "no transmit"))
+        services.close_service(service_id)
+        self.assertEqual(services.for_radio(self.ids[0])[0].status, "closed")
+        self.assertEqual(services.history_source("closed").count(), 1)
+
+        departments.add_department("POL", "Police", "x100")
+        departments.update_department("POL", "Police Dept", "x101")
+        self.assertEqual(departments.names(), ["EMS", "Fire", "Police Dept"])
+        labels = departments.labels(departments.all_departments(by_name=True))
+        self.assertEqual(labels["POL - Police Dept"], "POL")
+        departments.delete_department("POL")
+        self.assertEqual([dept.id for dept in departments.all_departments()], ["EMS", "FIRE"])
+
+    def test_department_cache_reloads_only_after_a_commit(self):
+        with mock.patch.object(departments, "_load", wraps=departments._load) as load:
+            self.assertEqual(departments.names(), ["EMS", "Fire"])
+            self.assertEqual(departments.id_for("Fire"), "FIRE")
+            self.assertEqual(departments.name_for("EMS"), "EMS")
+            self.assertEqual(load.call_count, 1)
+
+            departments.add_department("POL", "Police", "")
+            self.assertEqual(departments.name_for("POL"), "Police")
+            self.assertEqual(load.call_count, 2)
+
+            # Another workstation's write: no notification, only data_version moves
+            other = sqlite3.connect(database.DB_FILE)
+            with other:
+                other.execute("UPDATE departments SET name = 'Fire Rescue' WHERE id = 'FIRE'")
+            other.close()
+            self.assertEqual(departments.names(), ["EMS", "Fire Rescue", "Police"])
+            self.assertIsNone(departments.id_for("Fire"))
+            self.assertEqual(load.call_count, 3)
+
+    def test_change_feed_returns_ids_changed_since_a_position(self):
+        seq = changes.current_seq()
+        first = changes.changes_since(seq)
+        self.assertEqual((first.seq, first.radio_ids, first.department_ids), (seq, frozenset(), frozenset()))
+
+        # Another workstation edits twice, deletes and renames a department
+        other = sqlite3.connect(database.DB_FILE)
+        with other:
+            other.execute("UPDATE radios SET notes = 'a' WHERE id = ?", (self.ids[0],))
+            other.execute("UPDATE radios SET notes = 'b' WHERE id = ?", (self.ids[0],))
+            other.execute("DELETE FROM radios WHERE id = ?", (self.ids[1],))
+            other.execute("UPDATE departments SET name = 'Medics' WHERE id = 'EMS'")
+        other.close()
+
+        later = changes.changes_since(first.seq, first.version)
+        self.assertGreater(later.seq, seq)
+        self.assertEqual(later.radio_ids, {self.ids[0], self.ids[1]})
+        self.assertEqual(later.department_ids, {"EMS"})
+        with connection(readonly=True) as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM change_log WHERE row_id = ?", (self.ids[0],)).fetchone()[0], 1)
+
+        # Service records feed their radio, here and on other workstations
+        notified = []
+        listener = lambda radio_ids, department_ids: notified.append(radio_ids)
+        subscribe(listener)
+        try:
+            service_id = services.add_service(self.ids[2], "LRC1", "", "no transmit", "", 10)
+            services.close_service(service_id)
+        finally:
+            unsubscribe(listener)
+        self.assertEqual(notified, [frozenset([self.ids[2]])] * 2)
+        later = changes.changes_since(later.seq, later.version)
+        self.assertEqual(later.radio_ids, {self.ids[2]})
+
+        # Nothing committed since: answered from data_version alone
+        with mock.patch.object(changes, "connection") as conn:
+            idle = changes.changes_since(later.seq, later.version)
+        conn.assert_not_called()
+        self.assertEqual((idle.seq, idle.radio_ids), (later.seq, frozenset()))
+
+    def summary_rows(self):
+        with connection(readonly=True) as conn:
+            kept = conn.execute(
+                "SELECT * FROM department_summary WHERE radios OR services ORDER BY department_id"
+            ).fetchall()
+            rebuilt = conn.execute(f"SELECT * FROM ({database.SUMMARY_TOTALS_QUERY}) ORDER BY 1").fetchall()
+        return [row[:-1] + (round(row[-1], 2),) for row in kept], [row[:-1] + (round(row[-1], 2),) for row in rebuilt]
+
+    def test_summary_counters_follow_radio_and_service_changes(self):
+        first = services.add_service(self.ids[0], "LRC1", "", "cracked", "", 120.5)
+        services.add_service(self.ids[0], "LRC2", "", "battery", "", 30)
+        services.add_service(self.ids[5], "LRC3", "", "antenna", "", 10.25)
+        services.close_service(first)
+        set_status(self.ids[:40], "In Service")
+        set_missing(self.ids[10:15], "Yes")
+        reassign_department(self.ids[:3], "EMS")
+        reassign_department(self.ids[3:6], None)
+        delete_radios(self.ids[5:7])
+        radios.add_radio({"serial": "NEW-1", "department_id": "EMS"})
+
+        kept, rebuilt = self.summary_rows()
+        self.assertEqual(kept, rebuilt)
+        self.assertEqual(kept[1], ("EMS", 4, 1, 3, 0, 2, 1, 150.5))
+
+        headings, source = report_source("Fleet Summary")
+        rows = list(source.iter_rows())
+        self.assertEqual(headings[0], "Department")
+        self.assertEqual([row[0] for row in rows], ["(No department)", "EMS", "Fire", "All Departments"])
+        self.assertEqual(rows[-1][1:], (1199, 1161, 38, 5, 1, 2, "150.50"))
+
+    def test_foreign_keys_cascade_and_protect_departments(self):
+        services.add_service(self.ids[0], "LRC1", "", "cracked", "", 20)
+        services.add_service(self.ids[0], "LRC2", "", "battery", "", 5)
+        delete_radios(self.ids[:1])
+        self.assertEqual(services.history_source().count(), 0)
+        kept, rebuilt = self.summary_rows()
+        self.assertEqual(kept, rebuilt)
+
+        with self.assertRaises(ValueError):
+            departments.delete_department("FIRE")
+        self.assertEqual(departments.names(), ["EMS", "Fire"])
+
+        new_id = radios.add_radio({"serial": "NEW-1", "department_id": ""})
+        radios.update_radio(new_id, {"serial": "NEW-1", "model": "X", "department_id": ""})
+        with connection(readonly=True) as conn:
+            self.assertIsNone(conn.execute("SELECT department_id FROM radios WHERE id = ?", (new_id,)).fetchone()[0])
+
+    def test_history_pages_by_keyset_in_both_directions(self):
+        # Many changes share a timestamp, so paging has to break ties on id
+        with connection() as conn:
+            conn.executemany(
+                "INSERT INTO radio_changes (radio_id, change_type, field_changed, timestamp) VALUES (?, 'EDIT', 'notes', ?)",
+                [(self.ids[i % 2], f"2025-01-{1 + i // 100:02d} 08:00:00") for i in range(900)],
+            )
+        expected = [change.timestamp for change in audit.for_radio(self.ids[0])]
+        self.assertEqual(len(expected), 450)
+
+        timeline = audit.history_source(self.ids[0])
+        self.assertEqual(timeline.count(), 450)
+        walked = [values[0] for start in range(0, 450, 50) for _, values in timeline.fetch(start, 50)]
+        self.assertEqual(walked, expected)
+
+        fleet = audit.history_source()
+        everything = [key for key, _ in fleet.fetch(0, 900)]
+        # Jump to the end (OFFSET), then scroll back up a page at a time
+        fresh = audit.history_source()
+        backwards = [key for start in (800, 600, 400, 200, 0) for key, _ in reversed(fresh.fetch(start, 200))]
+        self.assertEqual(backwards, everything[::-1])
+        self.assertEqual(fresh.fetch(0, 1)[0][1][:2], (self.ids[1], "SN1"))
+
+        # What the grid renders without querying: only pages fetched so far
+        window = audit.history_source()
+        self.assertEqual(window.cached(390, 20), [None] * 20)
+        fetched = window.fetch(400, 10)
+        self.assertEqual(window.cached(390, 20), [None] * 10 + fetched)
+        self.assertEqual([str(key) for key in window.keys(390, 20)], [str(key) for key in everything[390:410]])
+        self.assertEqual(pickle.loads(pickle.dumps(window)).cached(400, 1), [None])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import unittest
+
+from search_index import RadioSearchIndex
+
+ROWS = [
+    (1, "SN1001", "XTS 5000", "2025-01-02", "SEC", "Security", "J. Smith", "Active", "No", "spare battery"),
+    (2, "SN1002", "XTS 5000", None, "SLT", "Slots", "A. Jones", "In Service", "No", ""),
+    (3, "SN2001", "APX 900", None, "SEC", "Security", "", "Active", "Yes", "lost on floor"),
+    (4, "AB77", "APX 900", None, None, None, "Smithers", "Active", "No", None),
+]
+
+def naive(rows, term="", status="", missing="", department=""):
+    result = []
+    for row in rows:
+        if term and not any(term.lower() in str(cell).lower() for cell in row):
+            continue
+        if status and status.lower() != str(row[7]).lower():
+            continue
+        if missing and missing.lower() != str(row[8]).lower():
+            continue
+        if department and department.lower() != str(row[5]).lower():
+            continue
+        result.append(row)
+    return result
+
+class TestRadioSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = RadioSearchIndex(ROWS)
+
+    def test_matches_linear_scan(self):
+        cases = [
+            {}, {"term": "sn"}, {"term": "SMITH"}, {"term": "5000"}, {"term": "x"},
+            {"term": "none"}, {"term": "on f"}, {"status": "active"},
+            {"missing": "Yes"}, {"department": "security", "term": "apx"},
+            {"status": "Active", "missing": "No", "term": "s"}, {"term": "zzz"},
+        ]
+        for case in cases:
+            with self.subTest(**case):
+                self.assertEqual(self.index.search(**case), naive(ROWS, **case))
+
+    def test_term_does_not_match_across_cells(self):
+        self.assertEqual(self.index.search("sn1001xts"), [])
+
+    def test_narrowing_refines_previous_hits(self):
+        for term in ("s", "sm", "smi", "smith", "smithe"):
+            self.assertEqual(self.index.search(term), naive(ROWS, term))
+        self.assertEqual(self.index.search("sn2"), naive(ROWS, "sn2"))
+
+    def test_upsert_and_remove(self):
+        rows = list(ROWS)
+        self.index.search("smith")
+        changed = (2, "SN1002", "XTS 5000", None, "SEC", "Security", "B. Smith", "Active", "Yes", "")
+        added = (5, "SN3001", "APX 900", None, "SLT", "Slots", "C. Smith", "Active", "No", "")
+        rows[1] = changed
+        rows.append(added)
+        del rows[0]
+        self.index.upsert(changed)
+        self.index.upsert(added)
+        self.index.remove(1)
+
+        for case in ({}, {"term": "smith"}, {"term": "sn1"}, {"department": "slots"}, {"missing": "yes"}):
+            with self.subTest(**case):
+                self.assertEqual(self.index.search(**case), naive(rows, **case))
+        self.assertTrue(self.index.matches(changed, term="b. s", department="Security"))
+        self.assertFalse(self.index.matches(changed, status="In Service"))
+
+    def test_fields_after_grid_columns_are_not_searched(self):
+        row = ROWS[0] + ("R-HIDDEN", "2024-01-01", None, None)
+        index = RadioSearchIndex([row])
+        self.assertEqual(index.search("sn"), [row])
+        self.assertIsNone(index.trigrams)  # built on the first long term
+        self.assertEqual(index.search("1001"), [row])
+        self.assertIsNotNone(index.trigrams)
+        self.assertEqual(index.search("r-hidden"), [])
+
+    def test_ranked_keeps_given_order(self):
+        keys = [row[0] for row in reversed(ROWS)] + [999]
+        self.assertEqual(self.index.ranked(keys), list(reversed(ROWS)))
+        filtered = self.index.ranked(keys, status="Active")
+        self.assertEqual(filtered, [row for row in reversed(ROWS) if row[7] == "Active"])
+
+    def test_ranked_adds_matches_from_unindexed_columns(self):
+        # "2025" is only in Last Updated, "sec" in the department code and
+        # "tive" in Status; the full-text index ranked radio 3 first
+        self.assertEqual(self.index.ranked([3], term="2025"), [ROWS[2], ROWS[0]])
+        self.assertEqual(self.index.ranked([], term="SEC"), [ROWS[0], ROWS[2]])
+        self.assertEqual(self.index.ranked([2], term="tive", missing="No"), [ROWS[1], ROWS[0], ROWS[3]])
+
+if __name__ == "__main__":
+    unittest.main()
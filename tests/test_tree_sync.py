@@ -0,0 +1,134 @@
+import random
+import unittest
+
+from ui.tree_sync import TreeviewSync
+
+
+class FakeTree:
+    # The part of ttk.Treeview that TreeviewSync drives, for a flat list:
+    # attached items in order, every item's values and tags, and the calls made
+    def __init__(self):
+        self.children = []
+        self.data = {}
+        self.calls = []
+
+    def insert(self, parent, index, iid, values, tags):
+        assert iid not in self.data, iid
+        self.calls.append(("insert", iid, index))
+        self.data[iid] = (tuple(values), tuple(tags))
+        self.children.insert(index, iid)
+
+    def item(self, iid, values, tags):
+        self.calls.append(("item", iid))
+        self.data[iid] = (tuple(values), tuple(tags))
+
+    def move(self, iid, parent, index):
+        self.calls.append(("move", iid, index))
+        if iid in self.children:
+            self.children.remove(iid)
+        self.children.insert(index, iid)
+
+    def detach(self, *iids):
+        self.calls.append(("detach",) + iids)
+        self.children = [iid for iid in self.children if iid not in iids]
+
+    def delete(self, *iids):
+        self.calls.append(("delete",) + iids)
+        self.children = [iid for iid in self.children if iid not in iids]
+        for iid in iids:
+            del self.data[iid]
+
+    def get_children(self):
+        return tuple(self.children)
+
+
+def rows(*keys, suffix=""):
+    return [(key, f"radio {key}{suffix}") for key in keys]
+
+
+class TestTreeviewSync(unittest.TestCase):
+    def setUp(self):
+        self.tree = FakeTree()
+        self.sync = TreeviewSync(self.tree, values=lambda row: row[1:])
+
+    def apply(self, rows):
+        self.tree.calls = []
+        self.sync.apply(rows)
+        self.assertEqual(self.tree.get_children(), tuple(str(row[0]) for row in rows))
+        for row in rows:
+            self.assertEqual(self.tree.data[str(row[0])], ((row[1],), ()))
+        return self.tree.calls
+
+    def test_unchanged_rows_cost_no_calls(self):
+        self.apply(rows(1, 2, 3))
+        self.assertEqual(self.apply(rows(1, 2, 3)), [])
+
+    def test_reorder_moves_only_the_displaced_row(self):
+        self.apply(rows(1, 2, 3, 4, 5))
+        self.assertEqual(self.apply(rows(5, 1, 2, 3, 4)), [("detach", "5"), ("move", "5", 0)])
+
+    def test_insert_in_the_middle(self):
+        self.apply(rows(1, 2, 4))
+        self.assertEqual(self.apply(rows(1, 2, 3, 4)), [("insert", "3", 2)])
+
+    def test_removed_row_is_detached_and_moved_back(self):
+        self.apply(rows(1, 2, 3))
+        self.assertEqual(self.apply(rows(1, 3)), [("detach", "2")])
+        self.assertIn("2", self.tree.data)
+        self.assertEqual(self.apply(rows(1, 2, 3)), [("move", "2", 1)])
+
+    def test_changed_values_and_tags_are_updated_in_place(self):
+        sync = TreeviewSync(self.tree, values=lambda row: row[1:2], tags=lambda row: row[2:])
+        sync.apply([(1, "a", "even"), (2, "b", "odd")])
+        self.tree.calls = []
+        sync.apply([(1, "a", "even"), (2, "B", "odd")])
+        self.assertEqual(self.tree.calls, [("item", "2")])
+        sync.apply([(1, "a", "odd"), (2, "B", "odd")])
+        self.assertEqual(self.tree.data["1"], (("a",), ("odd",)))
+
+    def test_update_patches_one_known_row(self):
+        self.apply(rows(1, 2))
+        self.tree.calls = []
+        self.sync.update((2, "radio 2"))
+        self.sync.update((9, "not shown"))
+        self.assertEqual(self.tree.calls, [])
+        self.sync.update((2, "radio 2 edited"))
+        self.assertEqual(self.tree.calls, [("item", "2")])
+        self.assertEqual(self.tree.data["2"], (("radio 2 edited",), ()))
+        # The next apply with the same row has nothing left to do
+        self.assertEqual(self.apply([(1, "radio 1"), (2, "radio 2 edited")]), [])
+
+    def test_retain_deletes_rows_outside_the_window(self):
+        self.apply(rows(1, 2, 3))
+        self.apply(rows(4, 5))  # 1-3 scrolled out of view, still cached
+        self.tree.calls = []
+        self.sync.retain(["2", "4", "5"])
+        self.assertEqual(self.tree.calls, [("delete", "1", "3")])
+        self.assertEqual(sorted(self.sync.items), ["2", "4", "5"])
+        self.assertEqual(self.sync.visible, ["4", "5"])
+        self.assertEqual(self.apply(rows(2, 4, 5)), [("move", "2", 0)])
+        self.assertEqual(self.apply(rows(1, 2, 4, 5)), [("insert", "1", 0)])
+
+    def test_retain_drops_deleted_visible_rows(self):
+        self.apply(rows(1, 2, 3))
+        self.sync.retain([1, 3])
+        self.assertEqual(self.tree.get_children(), ("1", "3"))
+        self.assertEqual(self.sync.visible, ["1", "3"])
+        self.assertEqual(self.apply(rows(1, 3)), [])
+
+    def test_clear(self):
+        self.apply(rows(1, 2))
+        self.sync.clear()
+        self.assertEqual((self.tree.data, self.sync.items, self.sync.visible), ({}, {}, []))
+
+    def test_random_windows_match_the_wanted_rows(self):
+        rng = random.Random(4)
+        for _ in range(300):
+            keys = rng.sample(range(40), rng.randint(0, 15))
+            self.apply(rows(*keys, suffix=rng.choice(["", "*"])))
+            if rng.random() < 0.2:
+                self.sync.retain(keys + rng.sample(range(40), 5))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,17 +1,16 @@
 import tkinter as tk
-import datetime
-from tkinter import ttk, messagebox
-from database import get_connection, log_radio_change
+from tkinter import messagebox, ttk
+
+from repository import departments, radios
 
 
 class AddRadioForm(tk.Toplevel):
-    def __init__(self, parent, refresh_callback, existing=None):
+    def __init__(self, parent, existing=None):
         super().__init__(parent)
         self.title("Edit Radio" if existing else "Add New Radio")
         self.geometry("320x550")
         self.resizable(False, False)
 
-        self.refresh_callback = refresh_callback
         self.existing = existing
         self.department_map = {}
 
@@ -62,14 +61,8 @@ class AddRadioForm(tk.Toplevel):
         tk.Button(self, text="Save Radio", command=self.save_radio).pack(pady=15)
 
     def load_departments(self):
-        with get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT id, name FROM departments ORDER BY name")
-            departments = cursor.fetchall()
-
-        dept_labels = [f"{id} - {name}" for id, name in departments]
-        self.department_map = {label: id for label, id in zip(dept_labels, [id for id, _ in departments])}
-        self.dept_combo["values"] = dept_labels
+        self.department_map = departments.labels(departments.all_departments(by_name=True))
+        self.dept_combo["values"] = list(self.department_map)
 
         if self.existing and "department_id" in self.existing:
             for label, dept_id in self.department_map.items():
@@ -94,51 +87,19 @@ class AddRadioForm(tk.Toplevel):
         department_label = self.department_var.get().strip()
         dept_id = self.department_map.get(department_label)
 
+        values = {
+            "radio_id": radio_id, "serial": serial, "model": model, "assigned_to": assigned, "notes": notes,
+            "department_id": dept_id, "date_received": date_received, "date_issued": date_issued,
+            "date_returned": date_returned,
+        }
+
         try:
-            with get_connection() as conn:
-                cursor = conn.cursor()
-
-                if self.existing:
-                    last_updated = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    db_id = self.existing["id"]
-
-                    cursor.execute("""
-                        SELECT radio_id, serial, model, assigned_to, notes, department_id, date_received, date_issued, date_returned
-                        FROM radios WHERE id=?
-                    """, (db_id,))
-                    old = cursor.fetchone()
-
-                    fields = ["radio_id", "serial", "model", "assigned_to", "notes", "department_id", "date_received", "date_issued", "date_returned"]
-                    new_values = [radio_id, serial, model, assigned, notes, dept_id, date_received, date_issued, date_returned]
-
-                    for idx, field in enumerate(fields):
-                        old_val = old[idx]
-                        new_val = new_values[idx]
-                        if str(old_val) != str(new_val):
-                            log_radio_change(cursor, db_id, "EDIT", field, old_val, new_val)
-
-                    cursor.execute("""
-                        UPDATE radios
-                        SET radio_id=?, serial=?, model=?, assigned_to=?, notes=?, department_id=?, last_updated=?,
-                            date_received=?, date_issued=?, date_returned=?
-                        WHERE id=?
-                    """, (radio_id, serial, model, assigned, notes, dept_id,
-                        last_updated, date_received, date_issued, date_returned, db_id))
-
-                    pass  # audit disabled
-
-                else:
-                    cursor.execute("""
-                        INSERT INTO radios (radio_id, serial, model, assigned_to, notes, department_id, date_received, date_issued, date_returned)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (radio_id, serial, model, assigned, notes, dept_id, date_received, date_issued, date_returned))
-
-                    new_id = cursor.lastrowid
-                    log_radio_change(cursor, new_id, "ADD", "ALL", "", f"{radio_id}, {serial}, {model}, {assigned}, {notes}")
-                    
+            if self.existing:
+                radios.update_radio(self.existing["id"], values)
+            else:
+                radios.add_radio(values)
 
             messagebox.showinfo("Success", "Radio saved successfully.")
-            self.refresh_callback()
             self.destroy()
 
         except Exception as e:
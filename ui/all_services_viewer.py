@@ -1,6 +1,10 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
-from database import get_connection
+from tkinter import messagebox, ttk
+
+from repository import services
+from ui.background import get_runner, set_busy
+from ui.virtual_tree import VirtualTreeview
+
 
 class AllServicesViewer(tk.Toplevel):
     def __init__(self, parent):
@@ -15,37 +19,37 @@ class AllServicesViewer(tk.Toplevel):
         self.status_filter = tk.StringVar(value="all")
         ttk.Combobox(filter_frame, textvariable=self.status_filter, values=["all", "open", "closed"], width=10).grid(row=0, column=0)
         tk.Button(filter_frame, text="Apply Filter", command=self.load_services).grid(row=0, column=1, padx=5)
+        self.status_label = tk.Label(filter_frame, text="", fg="gray")
+        self.status_label.grid(row=0, column=2, padx=5)
 
         # Table
-        self.tree = ttk.Treeview(self, columns=(
+        self.grid = VirtualTreeview(self, columns=(
             "ID", "Radio Serial", "Status", "Date", "LRC #", "Sent", "Repaired", "Amount", "Problem", "Notes"
-        ), show="headings")
+        ))
+        self.tree = self.grid.tree
         for col in self.tree["columns"]:
             self.tree.heading(col, text=col)
             self.tree.column(col, anchor="center")
-        self.tree.pack(fill=tk.BOTH, expand=True)
+        self.grid.pack(fill=tk.BOTH, expand=True)
 
         self.load_services()
 
     def load_services(self):
-        self.tree.delete(*self.tree.get_children())
-        conn = get_connection()
-        cursor = conn.cursor()
-
-        base_query = """
-            SELECT s.id, r.serial, s.status, s.date_service, s.lrc_service_num,
-                   s.date_sent, s.date_repaired, s.amount, s.problem, s.notes
-            FROM services s
-            LEFT JOIN radios r ON s.radio_id = r.id
-        """
-        filters = []
-        if self.status_filter.get() in ["open", "closed"]:
-            base_query += " WHERE s.status = ?"
-            filters.append(self.status_filter.get())
-
-        base_query += " ORDER BY s.date_service DESC"
-
-        cursor.execute(base_query, filters)
-        for row in cursor.fetchall():
-            self.tree.insert("", tk.END, values=row)
-        conn.close()
+        source = services.history_source(self.status_filter.get())
+
+        set_busy(self, True, self.status_label, "Loading...")
+        get_runner(self).submit(
+            source.prefetch,
+            on_done=self.show_services,
+            on_error=self.on_load_failed,
+            key="all_services",
+            owner=self,
+        )
+
+    def show_services(self, source):
+        set_busy(self, False, self.status_label, f"{source.count()} records")
+        self.grid.set_source(source)
+
+    def on_load_failed(self, error):
+        set_busy(self, False, self.status_label, "")
+        messagebox.showerror("Error", f"Could not load service records:\n{error}", parent=self)
@@ -0,0 +1,146 @@
+import itertools
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+POLL_MS = 50
+WORKERS = 2
+
+
+class Task:
+    def __init__(self, token, key, owner):
+        self.token = token
+        self.key = key
+        self.owner = owner
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class BackgroundRunner:
+    # Runs blocking work (queries, exports) on worker threads and hands the
+    # results back to Tk on the main thread through a queue polled with
+    # after(). Submitting with a `key` supersedes any earlier task with the
+    # same key, so an outdated search or report never overwrites a newer one.
+    def __init__(self, root, workers=WORKERS):
+        self.root = root
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="radio-db")
+        self._results = queue.Queue()
+        self._latest = {}
+        self._tokens = itertools.count()
+        self._main_thread = threading.current_thread()
+        self._closed = False
+        self.root.after(POLL_MS, self._poll)
+
+    def submit(self, func, *args, on_done=None, on_error=None, on_progress=None, key=None, owner=None):
+        task = Task(next(self._tokens), key, owner)
+        if key is not None:
+            previous = self._latest.get(key)
+            if previous is not None:
+                previous.cancel()
+            self._latest[key] = task
+
+        def run():
+            if task.cancelled:
+                return
+            kwargs = {}
+            if on_progress is not None:
+                kwargs["progress"] = lambda value: self.call_soon(self._deliver, task, on_progress, value)
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                self.call_soon(self._finish, task, on_error, e)
+            else:
+                self.call_soon(self._finish, task, on_done, result)
+
+        self._executor.submit(run)
+        return task
+
+    def cancel(self, key):
+        task = self._latest.pop(key, None)
+        if task is not None:
+            task.cancel()
+
+    def call_soon(self, callback, *args):
+        # Safe from any thread; runs callback on the Tk thread
+        if threading.current_thread() is self._main_thread:
+            callback(*args)
+        else:
+            self._results.put((callback, args))
+
+    def _is_live(self, task):
+        if task.cancelled:
+            return False
+        return task.owner is None or bool(task.owner.winfo_exists())
+
+    def _deliver(self, task, callback, value):
+        if callback is not None and self._is_live(task):
+            callback(value)
+
+    def _finish(self, task, callback, value):
+        if task.key is not None and self._latest.get(task.key) is task:
+            del self._latest[task.key]
+        self._deliver(task, callback, value)
+
+    def _poll(self):
+        if self._closed:
+            return
+        while True:
+            try:
+                callback, args = self._results.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                callback(*args)
+            except Exception:
+                import traceback
+                traceback.print_exc()
+        self.root.after(POLL_MS, self._poll)
+
+    def shutdown(self):
+        self._closed = True
+        for task in self._latest.values():
+            task.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _use_database(db_file, read_only, pragmas):
+    # Child process initializer: a spawned child imports database.py afresh,
+    # with its defaults, so point it at the file and mode the parent uses
+    import database
+    database.DB_FILE, database.READ_ONLY, database.PRAGMAS = db_file, read_only, pragmas
+
+
+def run_in_process(func, *args):
+    # For CPU-bound work (PDF layout) that would otherwise hold the GIL and
+    # stall the Tk thread. Call it through BackgroundRunner.submit so the
+    # wait happens on a worker thread; func and args must be picklable.
+    # Always spawned, as on Windows, so every platform takes the same path
+    # and a child never inherits forked copies of open connections.
+    # Imported here: it pulls in multiprocessing, which startup doesn't need.
+    import multiprocessing
+    import os
+    from concurrent.futures import ProcessPoolExecutor
+
+    import database
+    settings = (os.path.abspath(database.DB_FILE), database.READ_ONLY, dict(database.PRAGMAS))
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_use_database, initargs=settings) as pool:
+        return pool.submit(func, *args).result()
+
+
+def get_runner(widget):
+    # One runner per Tk application, shared by every window
+    root = widget._root()
+    runner = getattr(root, "_background_runner", None)
+    if runner is None:
+        runner = BackgroundRunner(root)
+        root._background_runner = runner
+    return runner
+
+
+def set_busy(widget, busy, label=None, text=""):
+    widget.config(cursor="watch" if busy else "")
+    if label is not None:
+        label.config(text=text)
@@ -1,6 +1,8 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
-from database import get_connection
+from tkinter import messagebox, ttk
+
+from repository import departments
+
 
 class DepartmentManager(tk.Toplevel):
     def __init__(self, parent):
@@ -27,12 +29,8 @@ class DepartmentManager(tk.Toplevel):
 
     def load_departments(self):
         self.tree.delete(*self.tree.get_children())
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT id, name, contact FROM departments ORDER BY id")
-        for row in cursor.fetchall():
+        for row in departments.all_departments():
             self.tree.insert("", tk.END, values=row)
-        conn.close()
 
     def add_department(self):
         self._open_form()
@@ -55,16 +53,11 @@ class DepartmentManager(tk.Toplevel):
         if not confirm:
             return
 
-        conn = get_connection()
-        cursor = conn.cursor()
         try:
-            cursor.execute("DELETE FROM departments WHERE id = ?", (values[0],))
-            conn.commit()
+            departments.delete_department(values[0])
             self.load_departments()
         except Exception as e:
             messagebox.showerror("Error", f"Could not delete department:\n{e}")
-        finally:
-            conn.close()
 
     def _open_form(self, existing=None):
         form = tk.Toplevel(self)
@@ -97,27 +90,15 @@ class DepartmentManager(tk.Toplevel):
                 messagebox.showerror("Validation", "Department ID and Name are required.")
                 return
 
-            conn = get_connection()
-            cursor = conn.cursor()
             try:
                 if existing:
-                    cursor.execute("""
-                        UPDATE departments
-                        SET name=?, contact=?
-                        WHERE id=?
-                    """, (name, contact, dept_id))
+                    departments.update_department(dept_id, name, contact)
                 else:
-                    cursor.execute("""
-                        INSERT INTO departments (id, name, contact)
-                        VALUES (?, ?, ?)
-                    """, (dept_id, name, contact))
+                    departments.add_department(dept_id, name, contact)
 
-                conn.commit()
                 self.load_departments()
                 form.destroy()
             except Exception as e:
                 messagebox.showerror("Error", f"Could not save department:\n{e}")
-            finally:
-                conn.close()
 
         tk.Button(form, text="Save", command=save).pack(pady=10)
@@ -0,0 +1,35 @@
+import tkinter as tk
+from tkinter import ttk
+
+from repository import departments
+
+
+class DepartmentPicker(tk.Toplevel):
+    # Small modal prompt for a department; department_id stays None if cancelled
+    def __init__(self, parent, prompt="Department:"):
+        super().__init__(parent)
+        self.title("Choose Department")
+        self.resizable(False, False)
+        self.transient(parent)
+
+        self.department_id = None
+        self.department_var = tk.StringVar()
+
+        self.department_map = departments.labels(departments.all_departments(by_name=True))
+
+        tk.Label(self, text=prompt).pack(padx=15, pady=(10, 4))
+        ttk.Combobox(
+            self, textvariable=self.department_var, values=list(self.department_map), state="readonly", width=35
+        ).pack(fill="x", padx=15)
+
+        buttons = tk.Frame(self)
+        buttons.pack(pady=10)
+        tk.Button(buttons, text="Move", command=self.choose).pack(side=tk.LEFT, padx=5)
+        tk.Button(buttons, text="Cancel", command=self.destroy).pack(side=tk.LEFT, padx=5)
+        self.grab_set()
+
+    def choose(self):
+        label = self.department_var.get()
+        if label in self.department_map:
+            self.department_id = self.department_map[label]
+            self.destroy()
@@ -0,0 +1,58 @@
+import tkinter as tk
+from tkinter import messagebox
+
+from repository import audit
+from ui.background import get_runner, set_busy
+from ui.virtual_tree import VirtualTreeview
+
+CHANGE_COLUMNS = ("When", "Change", "Field", "Old Value", "New Value")
+
+
+class HistoryViewer(tk.Toplevel):
+    # One radio's change timeline, or with no radio the whole fleet's audit
+    # log; rows are paged from radio_changes as the list scrolls
+    def __init__(self, parent, radio_id=None, serial=None):
+        super().__init__(parent)
+        self.radio_id = radio_id
+        if radio_id is None:
+            self.title("Audit History")
+            columns = ("Radio", "Serial") + CHANGE_COLUMNS
+        else:
+            self.title(f"History for Radio {serial}")
+            columns = CHANGE_COLUMNS
+        self.geometry("1000x500")
+
+        toolbar = tk.Frame(self)
+        toolbar.pack(fill=tk.X, pady=5)
+        tk.Button(toolbar, text="Refresh", command=self.load_history).pack(side=tk.LEFT, padx=10)
+        self.status_label = tk.Label(toolbar, text="", fg="gray")
+        self.status_label.pack(side=tk.LEFT, padx=5)
+
+        self.grid = VirtualTreeview(self, columns=columns)
+        self.tree = self.grid.tree
+        for col in columns:
+            self.tree.heading(col, text=col)
+            self.tree.column(col, anchor="center", width=80 if col in ("Radio", "Change") else 140)
+        self.grid.pack(fill=tk.BOTH, expand=True)
+
+        self.load_history()
+
+    def load_history(self):
+        source = audit.history_source(self.radio_id)
+
+        set_busy(self, True, self.status_label, "Loading...")
+        get_runner(self).submit(
+            source.prefetch,
+            on_done=self.show_history,
+            on_error=self.on_load_failed,
+            key=f"history_{self.radio_id}",
+            owner=self,
+        )
+
+    def show_history(self, source):
+        set_busy(self, False, self.status_label, f"{source.count()} changes")
+        self.grid.set_source(source)
+
+    def on_load_failed(self, error):
+        set_busy(self, False, self.status_label, "")
+        messagebox.showerror("Error", f"Could not load history:\n{error}", parent=self)
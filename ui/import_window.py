@@ -0,0 +1,82 @@
+import tkinter as tk
+from tkinter import filedialog, messagebox, ttk
+
+from importer import import_departments, import_radios
+from ui.background import get_runner, set_busy
+
+IMPORTERS = {
+    "Radios": import_radios,
+    "Departments": import_departments,
+}
+
+
+class ImportWindow(tk.Toplevel):
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.title("Bulk Import")
+        self.geometry("700x450")
+
+        self.path_var = tk.StringVar()
+        self.kind_var = tk.StringVar(value="Radios")
+
+        controls = tk.Frame(self)
+        controls.pack(fill=tk.X, padx=10, pady=10)
+
+        ttk.Combobox(controls, textvariable=self.kind_var, values=list(IMPORTERS), state="readonly", width=12).pack(side=tk.LEFT)
+        tk.Entry(controls, textvariable=self.path_var, width=45).pack(side=tk.LEFT, padx=5)
+        tk.Button(controls, text="Browse...", command=self.browse).pack(side=tk.LEFT)
+
+        buttons = tk.Frame(self)
+        buttons.pack(fill=tk.X, padx=10)
+        tk.Button(buttons, text="Check (Dry Run)", command=lambda: self.run(dry_run=True)).pack(side=tk.LEFT, padx=5)
+        tk.Button(buttons, text="Import", command=lambda: self.run(dry_run=False)).pack(side=tk.LEFT, padx=5)
+        self.status_label = tk.Label(buttons, text="", fg="gray")
+        self.status_label.pack(side=tk.LEFT, padx=10)
+
+        # Conflicts found in the last run
+        self.tree = ttk.Treeview(self, columns=("Line", "Key", "Problem"), show="headings")
+        for col, width in (("Line", 60), ("Key", 140), ("Problem", 420)):
+            self.tree.heading(col, text=col)
+            self.tree.column(col, width=width, anchor="w" if col == "Problem" else "center")
+        self.tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+    def browse(self):
+        path = filedialog.askopenfilename(parent=self, filetypes=[
+            ("Spreadsheets", "*.csv *.xlsx"), ("CSV Files", "*.csv"), ("Excel Files", "*.xlsx")
+        ])
+        if path:
+            self.path_var.set(path)
+
+    def run(self, dry_run):
+        path = self.path_var.get().strip()
+        if not path:
+            messagebox.showwarning("No file", "Choose a CSV or Excel file first.", parent=self)
+            return
+        if not dry_run and not messagebox.askyesno(
+            "Confirm Import", "Import every valid row? Rows with conflicts will be skipped.", parent=self
+        ):
+            return
+
+        set_busy(self, True, self.status_label, "Checking..." if dry_run else "Importing...")
+        get_runner(self).submit(
+            IMPORTERS[self.kind_var.get()], path, dry_run,
+            on_done=self.show_result,
+            on_error=self.on_failed,
+            key="import",
+            owner=self,
+        )
+
+    def show_result(self, result):
+        self.tree.delete(*self.tree.get_children())
+        for conflict in result.conflicts:
+            self.tree.insert("", tk.END, values=conflict)
+
+        if result.dry_run:
+            summary = f"{result.rows_read} rows read, {result.valid} ready to import, {len(result.conflicts)} conflicts"
+        else:
+            summary = f"{result.imported} imported, {len(result.conflicts)} skipped"
+        set_busy(self, False, self.status_label, summary)
+
+    def on_failed(self, error):
+        set_busy(self, False, self.status_label, "")
+        messagebox.showerror("Import Failed", str(error), parent=self)
@@ -1,18 +1,18 @@
-import tkinter as tk
-from tkinter import ttk, messagebox, filedialog
-import csv
-import tempfile
-import os
-import subprocess
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-from openpyxl.utils import get_column_letter
 import datetime
-from database import get_connection
+import os
+import tkinter as tk
+from tkinter import filedialog, messagebox, ttk
+
+from repository import departments
+from repository.reports import (
+    REPORT_TYPES,
+    report_source,
+    write_excel_report,
+    write_pdf_report,
+)
+from ui.background import get_runner, run_in_process, set_busy
+from ui.virtual_tree import VirtualTreeview
+
 
 class ReportsWindow(tk.Toplevel):
     def __init__(self, parent):
@@ -33,9 +33,8 @@ class ReportsWindow(tk.Toplevel):
         right_controls.pack(side=tk.RIGHT)
 
         tk.Label(header, text="Report Type:", font=("Segoe UI", 10)).pack(side=tk.LEFT, padx=(5, 2))
-        self.report_select = ttk.Combobox(header, textvariable=self.report_type, values=[
-            "All Radios", "Radios by Department", "Radios in Service", "Disabled Radios", "Missing Radios"
-        ], state="readonly", width=25)
+        self.report_select = ttk.Combobox(header, textvariable=self.report_type, values=list(REPORT_TYPES),
+                                          state="readonly", width=25)
         self.report_select.pack(side=tk.LEFT)
 
         self.dept_combo = ttk.Combobox(header, textvariable=self.dept_var, state="readonly", width=25)
@@ -44,92 +43,53 @@ class ReportsWindow(tk.Toplevel):
 
         tk.Button(header, text="Run Report", command=self.run_report).pack(side=tk.LEFT, padx=5)
         tk.Button(header, text="Export Excel", command=self.export_excel).pack(side=tk.LEFT, padx=5)
+        tk.Button(header, text="Export PDF", command=self.export_pdf).pack(side=tk.LEFT, padx=5)
+
+        self.status_label = tk.Label(header, text="", font=("Segoe UI", 9), fg="gray")
+        self.status_label.pack(side=tk.RIGHT, padx=5)
 
         self.title_label = tk.Label(self, text="No report selected", font=("Segoe UI", 12, "bold"))
         self.title_label.pack(pady=(5, 0))
 
-        self.tree = ttk.Treeview(self, show="headings")
-        self.tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        self.grid = VirtualTreeview(self, tags=lambda values, i: ('evenrow' if i % 2 == 0 else 'oddrow',))
+        self.tree = self.grid.tree
+        self.grid.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
 
         self.style = ttk.Style()
         self.style.configure("Treeview.Heading", font=("Segoe UI", 10, "bold"))
         self.style.configure("Treeview", rowheight=22, font=("Segoe UI", 9))
         self.style.map("Treeview", background=[('selected', '#ececec')])
 
-        self.data_rows = []
+        self.source = None
 
     def run_report(self):
-        conn = get_connection()
-        cursor = conn.cursor()
         report = self.report_type.get()
-        self.tree.delete(*self.tree.get_children())
-
-        if report == "All Radios":
-            query = '''
-                SELECT r.radio_id, r.serial, r.model, d.name, r.assigned_to, r.notes,
-                       r.date_received, r.date_issued, r.date_returned,
-                       CASE WHEN r.status = 'Active' THEN 'Yes' ELSE 'No' END as in_service
-                FROM radios r
-                LEFT JOIN departments d ON r.department_id = d.id
-            '''
-            columns = [
-                "Radio ID", "Serial", "Model", "Department", "Assigned To", "Notes",
-                "Date Received", "Date Issued", "Date Returned", "In Service"
-            ]
-            cursor.execute(query)
-
-        elif report == "Radios by Department":
+
+        if report == "Radios by Department":
             self.dept_combo.pack(side=tk.LEFT, padx=(10, 0))
-            cursor.execute("SELECT name FROM departments")
-            dept_names = [row[0] for row in cursor.fetchall()]
-            self.dept_combo['values'] = dept_names
+            get_runner(self).submit(
+                departments.names,
+                on_done=lambda names: self.dept_combo.configure(values=names),
+                key="report_departments",
+                owner=self,
+            )
 
             if not self.dept_var.get():
-                conn.close()
                 return
 
-            cursor.execute('''
-                SELECT r.id, r.serial, r.model, r.assigned_to,
-                       r.status, r.missing, r.notes
-                FROM radios r
-                JOIN departments d ON r.department_id = d.id
-                WHERE d.name = ?
-            ''', (self.dept_var.get(),))
-            columns = ["ID", "Serial", "Model", "Assigned", "Status", "Missing", "Notes"]
-
-        elif report == "Radios in Service":
-            query = '''
-                SELECT r.id, r.serial, r.model, d.name, r.assigned_to
-                FROM radios r
-                LEFT JOIN departments d ON r.department_id = d.id
-                WHERE r.status = 1
-            '''
-            columns = ["ID", "Serial", "Model", "Department", "Assigned"]
-            cursor.execute(query)
-
-        elif report == "Disabled Radios":
-            query = '''
-                SELECT r.id, r.serial, r.model, d.name, r.assigned_to
-                FROM radios r
-                LEFT JOIN departments d ON r.department_id = d.id
-                WHERE r.status = 0
-            '''
-            columns = ["ID", "Serial", "Model", "Department", "Assigned"]
-            cursor.execute(query)
-
-        elif report == "Missing Radios":
-            query = '''
-                SELECT r.id, r.serial, r.model, d.name, r.assigned_to
-                FROM radios r
-                LEFT JOIN departments d ON r.department_id = d.id
-                WHERE r.missing = 'Y'
-            '''
-            columns = ["ID", "Serial", "Model", "Department", "Assigned"]
-            cursor.execute(query)
-
-        self.data_rows = cursor.fetchall()
-        conn.close()
+        columns, source = report_source(report, self.dept_var.get())
 
+        set_busy(self, True, self.status_label, f"Running {report}...")
+        get_runner(self).submit(
+            source.prefetch,
+            on_done=lambda source: self.show_report(report, columns, source),
+            on_error=self.on_report_failed,
+            key="run_report",
+            owner=self,
+        )
+
+    def show_report(self, report, columns, source):
+        set_busy(self, False, self.status_label, f"{source.count()} rows")
         self.tree["columns"] = columns
         for col in columns:
             self.tree.heading(col, text=col)
@@ -138,16 +98,21 @@ class ReportsWindow(tk.Toplevel):
                 width = 180
             self.tree.column(col, anchor="center", width=width)
 
-        for i, row in enumerate(self.data_rows):
-            self.tree.insert("", tk.END, values=row, tags=('evenrow' if i % 2 == 0 else 'oddrow'))
-
         self.tree.tag_configure('evenrow', background='#f8f8f8')
         self.tree.tag_configure('oddrow', background='#e6f2ff')
 
+        self.source = source
+        self.grid.sync.clear()
+        self.grid.set_source(source)
+
         self.title_label.config(text=f"{report} - {datetime.datetime.now().strftime('%b %d, %Y %I:%M %p')}")
 
+    def on_report_failed(self, error):
+        set_busy(self, False, self.status_label, "")
+        messagebox.showerror("Report Failed", str(error), parent=self)
+
     def export_excel(self):
-        if not self.data_rows:
+        if self.source is None or not self.source.count():
             messagebox.showwarning("No data", "Run a report first.")
             return
 
@@ -155,54 +120,44 @@ class ReportsWindow(tk.Toplevel):
         if not path:
             return
 
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Radio Report"
+        headers = list(self.tree["columns"])
+        subtitle = f"REPORT: {self.report_type.get().upper()}   {datetime.datetime.now().strftime('%m/%d/%Y')}"
+
+        set_busy(self, True, self.status_label, "Exporting...")
+        get_runner(self).submit(
+            write_excel_report, path, headers, subtitle, self.source,
+            on_done=self.on_export_done,
+            on_error=self.on_export_failed,
+            on_progress=lambda count: self.status_label.config(text=f"Exported {count} rows..."),
+            owner=self,
+        )
+
+    def export_pdf(self):
+        if self.source is None or not self.source.count():
+            messagebox.showwarning("No data", "Run a report first.")
+            return
+
+        path = filedialog.asksaveasfilename(defaultextension=".pdf", filetypes=[("PDF Files", "*.pdf")])
+        if not path:
+            return
 
-        headers = self.tree["columns"]
-        report_title = "GOLDEN NUGGET LAKE CHARLES"
+        headers = list(self.tree["columns"])
         subtitle = f"REPORT: {self.report_type.get().upper()}   {datetime.datetime.now().strftime('%m/%d/%Y')}"
 
-        # Title
-        ws.merge_cells(start_row=1, start_column=1, end_row=1, end_column=len(headers))
-        title_cell = ws.cell(row=1, column=1)
-        title_cell.value = report_title
-        title_cell.font = Font(size=14, bold=True)
-        title_cell.alignment = Alignment(horizontal="center", vertical="center")
-
-        # Subtitle
-        ws.merge_cells(start_row=2, start_column=1, end_row=2, end_column=len(headers))
-        sub_cell = ws.cell(row=2, column=1)
-        sub_cell.value = subtitle
-        sub_cell.font = Font(size=12)
-        sub_cell.alignment = Alignment(horizontal="center", vertical="center")
-
-        # Header
-        header_font = Font(bold=True, color="FFFFFF")
-        fill = PatternFill("solid", fgColor="305496")
-        align = Alignment(horizontal="center", vertical="center", wrap_text=True)
-        border = Border(left=Side(style='thin'), right=Side(style='thin'),
-                        top=Side(style='thin'), bottom=Side(style='thin'))
-
-        for col_index, header in enumerate(headers, start=1):
-            cell = ws.cell(row=4, column=col_index, value=header)
-            cell.font = header_font
-            cell.fill = fill
-            cell.alignment = align
-            cell.border = border
-
-        for row_index, row_data in enumerate(self.data_rows, start=5):
-            for col_index, value in enumerate(row_data, start=1):
-                cell = ws.cell(row=row_index, column=col_index, value=value)
-                cell.alignment = align
-                cell.border = border
-
-        for col in ws.columns:
-            max_length = max((len(str(cell.value)) for cell in col if cell.value), default=10)
-            ws.column_dimensions[get_column_letter(col[0].column)].width = min(max_length + 4, 50)
-
-        try:
-            wb.save(path)
-            messagebox.showinfo("Exported", "Excel file exported successfully.")
-        except Exception as e:
-            messagebox.showerror("Export Failed", str(e))
\ No newline at end of file
+        # Layout runs in a separate process so a long audit printout cannot
+        # stall the window
+        set_busy(self, True, self.status_label, "Exporting PDF...")
+        get_runner(self).submit(
+            run_in_process, write_pdf_report, path, headers, subtitle, self.source,
+            on_done=self.on_export_done,
+            on_error=self.on_export_failed,
+            owner=self,
+        )
+
+    def on_export_done(self, path):
+        set_busy(self, False, self.status_label, "")
+        messagebox.showinfo("Exported", f"Report exported to {os.path.basename(path)}.", parent=self)
+
+    def on_export_failed(self, error):
+        set_busy(self, False, self.status_label, "")
+        messagebox.showerror("Export Failed", str(error), parent=self)
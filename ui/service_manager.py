@@ -1,6 +1,8 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
-from database import get_connection
+from tkinter import messagebox, ttk
+
+from repository import services
+
 
 class ServiceManager(tk.Toplevel):
     def __init__(self, parent, radio_id, serial):
@@ -29,18 +31,8 @@ class ServiceManager(tk.Toplevel):
 
     def load_services(self):
         self.tree.delete(*self.tree.get_children())
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT id, status, date_service, lrc_service_num, date_sent,
-                   date_repaired, amount, problem, notes
-            FROM services
-            WHERE radio_id=?
-            ORDER BY date_service DESC
-        """, (self.radio_id,))
-        for row in cursor.fetchall():
+        for row in services.for_radio(self.radio_id):
             self.tree.insert("", tk.END, values=row)
-        conn.close()
 
     def add_service_form(self):
         form = tk.Toplevel(self)
@@ -65,28 +57,19 @@ class ServiceManager(tk.Toplevel):
         tk.Entry(form, textvariable=amount_var).pack()
 
         def save():
-            conn = get_connection()
-            cursor = conn.cursor()
             try:
-                cursor.execute("""
-                    INSERT INTO services (radio_id, status, date_service, lrc_service_num,
-                                          date_sent, problem, notes, amount)
-                    VALUES (?, 'open', DATE('now'), ?, ?, ?, ?, ?)
-                """, (
+                services.add_service(
                     self.radio_id,
                     lrc_var.get().strip(),
                     date_sent_var.get().strip(),
                     problem_var.get().strip(),
                     notes_var.get().strip(),
                     float(amount_var.get().strip() or 0)
-                ))
-                conn.commit()
+                )
                 self.load_services()
                 form.destroy()
             except Exception as e:
                 messagebox.showerror("Error", f"Could not save service: {e}")
-            finally:
-                conn.close()
 
         tk.Button(form, text="Save Service", command=save).pack(pady=10)
 
@@ -105,17 +88,8 @@ class ServiceManager(tk.Toplevel):
         if not confirm:
             return
 
-        conn = get_connection()
-        cursor = conn.cursor()
         try:
-            cursor.execute("""
-                UPDATE services
-                SET status='closed', date_repaired=DATE('now')
-                WHERE id=?
-            """, (values[0],))
-            conn.commit()
+            services.close_service(values[0])
             self.load_services()
         except Exception as e:
             messagebox.showerror("Error", f"Could not close service: {e}")
-        finally:
-            conn.close()
@@ -0,0 +1,91 @@
+from bisect import bisect_left
+
+
+def _stable_items(order, position):
+    # Longest run of currently attached items that is already in the wanted
+    # relative order; everything else has to be moved.
+    tails, tail_items, previous = [], [], {}
+    for iid in order:
+        pos = position[iid]
+        i = bisect_left(tails, pos)
+        if i == len(tails):
+            tails.append(pos)
+            tail_items.append(iid)
+        else:
+            tails[i] = pos
+            tail_items[i] = iid
+        previous[iid] = tail_items[i - 1] if i else None
+
+    stable = set()
+    iid = tail_items[-1] if tail_items else None
+    while iid is not None:
+        stable.add(iid)
+        iid = previous[iid]
+    return stable
+
+
+class TreeviewSync:
+    # Keeps a Treeview in step with an ordered list of rows keyed by id.
+    # Rows that drop out of view are detached rather than deleted, so showing
+    # them again is a single move; unchanged rows cost no Tk calls at all.
+    def __init__(self, tree, key=lambda row: row[0], values=tuple, tags=None):
+        self.tree = tree
+        self.key = key
+        self.values = values
+        self.tags = tags or (lambda row: ())
+        self.items = {}
+        self.visible = []
+
+    def apply(self, rows):
+        wanted = []
+        state = {}
+        for row in rows:
+            iid = str(self.key(row))
+            wanted.append(iid)
+            state[iid] = (tuple(self.values(row)), tuple(self.tags(row)))
+
+        position = {iid: i for i, iid in enumerate(wanted)}
+        attached = [iid for iid in self.visible if iid in position]
+        stable = _stable_items(attached, position)
+
+        to_detach = [iid for iid in self.visible if iid not in stable]
+        if to_detach:
+            self.tree.detach(*to_detach)
+
+        for index, iid in enumerate(wanted):
+            values, tags = state[iid]
+            cached = self.items.get(iid)
+            if cached is None:
+                self.tree.insert("", index, iid=iid, values=values, tags=tags)
+            else:
+                if cached != state[iid]:
+                    self.tree.item(iid, values=values, tags=tags)
+                if iid not in stable:
+                    self.tree.move(iid, "", index)
+            self.items[iid] = state[iid]
+
+        self.visible = wanted
+
+    def update(self, row):
+        # Patch a single row in place without re-diffing the whole view
+        iid = str(self.key(row))
+        state = (tuple(self.values(row)), tuple(self.tags(row)))
+        if iid in self.items and self.items[iid] != state:
+            self.tree.item(iid, values=state[0], tags=state[1])
+            self.items[iid] = state
+
+    def retain(self, keys):
+        # Drop cached items for rows that no longer exist
+        keep = {str(key) for key in keys}
+        gone = [iid for iid in self.items if iid not in keep]
+        if gone:
+            self.tree.delete(*gone)
+            for iid in gone:
+                del self.items[iid]
+            self.visible = [iid for iid in self.visible if iid in keep]
+
+    def clear(self):
+        if self.items:
+            self.tree.delete(*self.items)
+        self.items = {}
+        self.visible = []
@@ -0,0 +1,281 @@
+import tkinter as tk
+from tkinter import ttk
+
+from repository.sources import ListSource
+from ui.background import get_runner
+from ui.tree_sync import TreeviewSync
+
+BUFFER_ROWS = 20
+HEADER_HEIGHT = 25
+# event.state bits
+SHIFT = 0x0001
+CONTROL = 0x0004
+# Stand-in rows while their page is fetched; real iids are str(key)
+PLACEHOLDER = "loading:"
+LOADING_TEXT = "Loading..."
+
+
+class VirtualTreeview(tk.Frame):
+    # A Treeview that only holds the rows on screen (plus a small buffer of
+    # detached neighbours) as Tk items and pulls the rest from a source as the
+    # user scrolls. `tags(values, index)` gives per-row tags. Rows scrolled
+    # well out of view are deleted from Tk, and Tk's own selection only
+    # covers items that exist, so the selection is kept here as row keys
+    # (read it with selected_keys()) and clicks are handled here too.
+    # Rows a source doesn't hold yet (QuerySource pages) are fetched on the
+    # background runner and shown as placeholders until they arrive, so a
+    # scrollbar jump never waits on the database on the Tk thread.
+    def __init__(self, parent, columns=(), tags=None, **tree_options):
+        super().__init__(parent)
+        self.tree = ttk.Treeview(self, columns=columns, show="headings", **tree_options)
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self.tags = tags or (lambda values, index: ())
+        self.sync = TreeviewSync(
+            self.tree,
+            key=lambda item: item[0],
+            values=lambda item: item[1],
+            tags=lambda item: item[2],
+        )
+        self.source = ListSource([])
+        self.total = 0
+        self.offset = 0
+        self.visible_rows = 20
+        # Selected keys in the order they were picked (a dict as ordered set),
+        # the row Shift extends from, and the row with the keyboard focus
+        self._selected = {}
+        self.anchor = 0
+        self.focus_index = None
+        # Select the focus row once its page arrives (keyboard onto a placeholder)
+        self._select_when_loaded = False
+        # (source, start, end) last asked of the runner, so a window is
+        # requested once, and not retried after it failed
+        self._requested = None
+        self._placeholder_text = LOADING_TEXT
+        self._fetch_key = f"virtual_tree_{id(self)}"
+
+        self.tree.bind("<ButtonPress-1>", self._on_click)
+        self.tree.bind("<Configure>", self._on_resize)
+        self.tree.bind("<MouseWheel>", self._on_mousewheel)
+        self.tree.bind("<Button-4>", lambda e: self._scroll_by(-3))
+        self.tree.bind("<Button-5>", lambda e: self._scroll_by(3))
+        # Plain keys move the selection; with Shift held they extend it from
+        # the anchor instead
+        for key, delta in (("<Up>", -1), ("<Down>", 1), ("<Prior>", "page-"), ("<Next>", "page+")):
+            self.tree.bind(key, lambda e, d=delta: self._on_key(d, e.state & SHIFT))
+        self.tree.bind("<Home>", lambda e: self._select_absolute(0, e.state & SHIFT))
+        self.tree.bind("<End>", lambda e: self._select_absolute(self.total - 1, e.state & SHIFT))
+
+    def set_source(self, source, keep_position=False):
+        self.source = source
+        self.total = source.count()
+        self._requested = None
+        self._placeholder_text = LOADING_TEXT
+        if not keep_position:
+            self.offset = 0
+            self.anchor, self.focus_index = 0, None
+            self._select_when_loaded = False
+        if self._selected:
+            # Never leave rows selected that the new list doesn't show
+            held = source.present(self._selected)
+            self._selected = {key: None for key in self._selected if key in held}
+        self.render()
+
+    def refresh(self):
+        self.source.invalidate()
+        self.set_source(self.source, keep_position=True)
+
+    def _items(self, start, limit):
+        # (iid, values, tags) per row, None where the source has yet to fetch it
+        return [
+            None if item is None else (str(item[0]), item[1], tuple(self.tags(item[1], index)))
+            for index, item in enumerate(self.source.cached(start, limit), start=start)
+        ]
+
+    def _placeholder(self, index):
+        return (f"{PLACEHOLDER}{index}", (self._placeholder_text,), ())
+
+    @staticmethod
+    def _is_placeholder(iid):
+        return iid.startswith(PLACEHOLDER)
+
+    def render(self):
+        self.offset = max(0, min(self.offset, self.total - self.visible_rows))
+        buffer_start = max(0, self.offset - BUFFER_ROWS)
+        buffer_end = min(self.total, self.offset + self.visible_rows + BUFFER_ROWS)
+        items = self._items(buffer_start, buffer_end - buffer_start)
+        if None in items:
+            self._request(buffer_start, buffer_end)
+
+        first = self.offset - buffer_start
+        shown = items[first:first + self.visible_rows]
+        self.sync.apply([item or self._placeholder(self.offset + i) for i, item in enumerate(shown)])
+        self.sync.retain([item[0] for item in items if item] + self.sync.visible)
+
+        if self._select_when_loaded:
+            position = self.focus_index - self.offset
+            if 0 <= position < len(self.sync.visible) and not self._is_placeholder(self.sync.visible[position]):
+                self._selected = {self.sync.visible[position]: None}
+                self._select_when_loaded = False
+        self._show_selection()
+
+        if self.total:
+            self.scrollbar.set(self.offset / self.total, (self.offset + self.visible_rows) / self.total)
+        else:
+            self.scrollbar.set(0, 1)
+
+    def _request(self, start, end):
+        source = self.source
+        if self._requested == (source, start, end):
+            return
+        self._requested = (source, start, end)
+        # Keyed per widget: a newer scroll position supersedes one not yet run
+        get_runner(self).submit(
+            source.fetch, start, end - start,
+            on_done=lambda items: self._on_fetched(source),
+            on_error=lambda error: self._on_fetch_failed(source, error),
+            key=self._fetch_key,
+            owner=self,
+        )
+
+    def _on_fetched(self, source):
+        if source is self.source:
+            self._requested = None
+            self._placeholder_text = LOADING_TEXT
+            self.render()
+
+    def _on_fetch_failed(self, source, error):
+        # Shown in place of the rows; scrolling elsewhere asks again
+        if source is self.source:
+            self._placeholder_text = f"Could not load rows: {error}"
+            self.render()
+
+    def scroll_to(self, offset):
+        offset = max(0, min(int(offset), self.total - self.visible_rows))
+        if offset != self.offset:
+            self.offset = offset
+            self.render()
+
+    def _scroll_by(self, rows):
+        self.scroll_to(self.offset + rows)
+        return "break"
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_to(float(amount) * self.total)
+        elif unit == "pages":
+            self._scroll_by(int(amount) * self.visible_rows)
+        else:
+            self._scroll_by(int(amount))
+
+    def _on_mousewheel(self, event):
+        return self._scroll_by(-3 if event.delta > 0 else 3)
+
+    def _on_resize(self, event):
+        style = ttk.Style()
+        rowheight = int(style.lookup(self.tree.cget("style") or "Treeview", "rowheight") or 20)
+        rows = max(1, (event.height - HEADER_HEIGHT) // rowheight)
+        if rows != self.visible_rows:
+            self.visible_rows = rows
+            self.render()
+
+    def selected_keys(self):
+        return list(self._selected)
+
+    def select_item(self, iid):
+        # Select just this on-screen item, as a plain click would
+        if iid in self.sync.visible and not self._is_placeholder(iid):
+            index = self.offset + self.sync.visible.index(iid)
+            self._selected = {iid: None}
+            self.anchor = self.focus_index = index
+            self._select_when_loaded = False
+            self._show_selection()
+
+    def _show_selection(self):
+        # Mirror the kept selection onto the items that exist right now
+        self.tree.selection_set([iid for iid in self.sync.visible if iid in self._selected])
+        position = None if self.focus_index is None else self.focus_index - self.offset
+        if position is not None and 0 <= position < len(self.sync.visible):
+            self.tree.focus(self.sync.visible[position])
+
+    def _select_range(self, first, last):
+        first, last = min(first, last), max(first, last)
+        items = self.source.cached(first, last - first + 1)
+        self._selected = {str(item[0]): None for item in items if item is not None}
+        self._select_when_loaded = False
+        if None in items:
+            # Rows of the range not fetched yet: ask for just their keys
+            source = self.source
+            get_runner(self).submit(
+                source.keys, first, last - first + 1,
+                on_done=lambda keys: self._on_range_keys(source, (first, last), keys),
+                key=f"{self._fetch_key}_range",
+                owner=self,
+            )
+
+    def _on_range_keys(self, source, span, keys):
+        # Only if the range is still the one being selected
+        if source is self.source and span == tuple(sorted((self.anchor, self.focus_index))):
+            self._selected = {str(key): None for key in keys}
+            self._show_selection()
+
+    def _on_click(self, event):
+        if self.tree.identify_region(event.x, event.y) not in ("cell", "tree"):
+            return None  # headings and column separators keep Tk's handling
+        iid = self.tree.identify_row(event.y)
+        if iid not in self.sync.visible or self._is_placeholder(iid):
+            return "break"
+        index = self.offset + self.sync.visible.index(iid)
+        if event.state & SHIFT:
+            self._select_range(self.anchor, index)
+        elif event.state & CONTROL:
+            if iid in self._selected:
+                del self._selected[iid]
+            else:
+                self._selected[iid] = None
+            self.anchor = index
+        else:
+            self._selected = {iid: None}
+            self.anchor = index
+        self.focus_index = index
+        self._select_when_loaded = False
+        self.tree.focus_set()
+        self._show_selection()
+        return "break"
+
+    def _on_key(self, delta, extend=False):
+        index = self.focus_index if self.focus_index is not None else self.offset
+        if delta == "page-":
+            delta = -self.visible_rows
+        elif delta == "page+":
+            delta = self.visible_rows
+        return self._select_absolute(index + delta, extend)
+
+    def _select_absolute(self, index, extend=False):
+        if not self.total:
+            return "break"
+        index = max(0, min(index, self.total - 1))
+        if index < self.offset:
+            self.scroll_to(index)
+        elif index >= self.offset + self.visible_rows:
+            self.scroll_to(index - self.visible_rows + 1)
+
+        if not 0 <= index - self.offset < len(self.sync.visible):
+            return "break"
+        self.focus_index = index
+        iid = self.sync.visible[index - self.offset]
+        if extend:
+            self._select_range(self.anchor, index)
+        elif self._is_placeholder(iid):
+            # Its page is on the way; render() selects it on arrival
+            self._selected = {}
+            self.anchor = index
+            self._select_when_loaded = True
+        else:
+            self._selected = {iid: None}
+            self.anchor = index
+            self._select_when_loaded = False
+        self._show_selection()
+        return "break"